@@ -1,57 +1,157 @@
 import os
 import json
+import time
+import atexit
+import signal
+import threading
+import click
+import sqlalchemy as sa
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Blueprint, current_app, render_template, request, redirect, url_for, flash, jsonify
 from flask_wtf import FlaskForm
-from wtforms import StringField, BooleanField, TextAreaField, SelectField, IntegerField
-from wtforms.validators import DataRequired, URL, Optional
+from wtforms import StringField, BooleanField, TextAreaField, SelectField, IntegerField, FloatField
+from wtforms.validators import DataRequired, URL, Optional, NumberRange, ValidationError
 from apscheduler.schedulers.background import BackgroundScheduler
 import logging
-import requests
-from bs4 import BeautifulSoup
 import xml.etree.ElementTree as ET
 import html
 from flask import make_response
 
-from models import db, FeedSource, FetchLog, FeedItem, Alert, SystemSettings
+from models import db, FeedSource, FetchLog, FeedItem, FeedStatus, Alert, SystemSettings
+from http_client import http_get
+from scheduler import FeedScheduler
+from leader import LeaderElection
+from polling import get_effective_interval
+from circuit_breaker import get_feed_circuits, reset_feed_circuit
+from rate_limiter import get_rate_limit_stats, parse_overrides
+from system_settings import load_settings, refresh_settings, bump_settings_version
+from job_queue import enqueue_checks, use_job_queue, get_queue_stats, PRIORITY_MANUAL
+from worker import Worker
+from route_validation import validate_route, validate_routes
+from migrations import upgrade, get_migration_status, explain_hot_queries
+from sqlite_tuning import configure_sqlite, get_sqlite_settings
+from rollups import get_rollups, run_rollups, rollup_fetch_logs, prune_fetch_logs
+from item_archive import (
+    archive_old_items, archive_feed_items, get_archived_items, get_archive_stats, delete_feed_archive
+)
 from utils import (
     fetch_and_parse_feed, validate_rsshub_route, check_all_feeds,
-    get_feed_health, get_feed_preview
+    get_feed_health, get_feed_preview, get_feed_host
 )
 
-# Create Flask app
-app = Flask(__name__, instance_relative_config=True)
-
-# Load default configuration, allowing env overrides
-app.config.from_mapping(
-    SECRET_KEY=os.getenv('SECRET_KEY', 'dev'),
-    SQLALCHEMY_DATABASE_URI=os.getenv(
-        'DATABASE_URL',
-        'sqlite:///' + os.path.join(app.instance_path, 'app.db')
-    ),
-    SQLALCHEMY_TRACK_MODIFICATIONS=False,
-    RSSHUB_BASE_URL=os.getenv('RSSHUB_BASE_URL', 'http://localhost:1200'),
-    CHECK_INTERVAL=int(os.getenv('CHECK_INTERVAL', 30)),
-)
+# Routes and CLI commands are registered on the app by create_app()
+bp = Blueprint('main', __name__, cli_group=None)
 
-# Ensure the instance folder exists
-try:
-    os.makedirs(app.instance_path)
-except OSError:
-    pass
-
-# Initialize extensions
-db.init_app(app)
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(app.instance_path, 'app.log')),
-        logging.StreamHandler()
-    ]
-)
+def create_app(test_config=None):
+    """
+    Create and configure the Flask app
+    
+    Building the app has no side effects on the database or the scheduler,
+    those happen once per process in init_app() (see wsgi.py).
+    
+    Args:
+        test_config: Config overrides, applied after the defaults
+    
+    Returns:
+        Flask: The app
+    """
+    app = Flask(__name__, instance_relative_config=True)
+    
+    # Load default configuration, allowing env overrides
+    app.config.from_mapping(
+        SECRET_KEY=os.getenv('SECRET_KEY', 'dev'),
+        SQLALCHEMY_DATABASE_URI=os.getenv(
+            'DATABASE_URL',
+            'sqlite:///' + os.path.join(app.instance_path, 'app.db')
+        ),
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        RSSHUB_BASE_URL=os.getenv('RSSHUB_BASE_URL', 'http://localhost:1200'),
+        CHECK_INTERVAL=int(os.getenv('CHECK_INTERVAL', 30)),
+        CHECK_WORKERS=int(os.getenv('CHECK_WORKERS', 8)),
+        CHECK_PER_HOST_LIMIT=int(os.getenv('CHECK_PER_HOST_LIMIT', 4)),
+        PIPELINE_PARSE_WORKERS=int(os.getenv('PIPELINE_PARSE_WORKERS', 2)),
+        PIPELINE_ENRICH_WORKERS=int(os.getenv('PIPELINE_ENRICH_WORKERS', 4)),
+        PIPELINE_PERSIST_WORKERS=int(os.getenv('PIPELINE_PERSIST_WORKERS', 1)),
+        PIPELINE_PERSIST_BATCH=int(os.getenv('PIPELINE_PERSIST_BATCH', 16)),
+        PIPELINE_QUEUE_SIZE=int(os.getenv('PIPELINE_QUEUE_SIZE', 16)),
+        HTTP_POOL_MAXSIZE=int(os.getenv('HTTP_POOL_MAXSIZE', 20)),
+        HTTP_CONNECT_TIMEOUT=float(os.getenv('HTTP_CONNECT_TIMEOUT', 5)),
+        HTTP_READ_TIMEOUT=float(os.getenv('HTTP_READ_TIMEOUT', 30)),
+        HTTP_MAX_RETRIES=int(os.getenv('HTTP_MAX_RETRIES', 2)),
+        SCHEDULER_TICK_SECONDS=int(os.getenv('SCHEDULER_TICK_SECONDS', 15)),
+        ADAPTIVE_POLLING=os.getenv('ADAPTIVE_POLLING', 'false').lower() in ('1', 'true', 'yes'),
+        ADAPTIVE_MIN_INTERVAL=int(os.getenv('ADAPTIVE_MIN_INTERVAL', 5)),
+        ADAPTIVE_MAX_INTERVAL=int(os.getenv('ADAPTIVE_MAX_INTERVAL', 1440)),
+        INCREMENTAL_INGEST=os.getenv('INCREMENTAL_INGEST', 'true').lower() in ('1', 'true', 'yes'),
+        SELECTOR_FETCH_WORKERS=int(os.getenv('SELECTOR_FETCH_WORKERS', 4)),
+        SELECTOR_CACHE_TTL=int(os.getenv('SELECTOR_CACHE_TTL', 1440)),
+        SELECTOR_CACHE_MAX_BYTES=int(os.getenv('SELECTOR_CACHE_MAX_BYTES', 50 * 1024 * 1024)),
+        ARTICLE_CACHE_MAX_ENTRIES=int(os.getenv('ARTICLE_CACHE_MAX_ENTRIES', 5000)),
+        PARSE_POOL_SIZE=int(os.getenv('PARSE_POOL_SIZE', 0)),
+        FEED_MAX_BYTES=int(os.getenv('FEED_MAX_BYTES', 10 * 1024 * 1024)),
+        FEED_MAX_ITEMS=int(os.getenv('FEED_MAX_ITEMS', 500)),
+        CIRCUIT_FAILURE_THRESHOLD=int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 3)),
+        CIRCUIT_HOST_FAILURE_THRESHOLD=int(os.getenv('CIRCUIT_HOST_FAILURE_THRESHOLD', 5)),
+        CIRCUIT_BASE_DELAY=int(os.getenv('CIRCUIT_BASE_DELAY', 5)),
+        CIRCUIT_MAX_DELAY=int(os.getenv('CIRCUIT_MAX_DELAY', 1440)),
+        RATE_LIMIT_ENABLED=os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        RATE_LIMIT_RSSHUB_RATE=float(os.getenv('RATE_LIMIT_RSSHUB_RATE', 2)),
+        RATE_LIMIT_RSSHUB_BURST=int(os.getenv('RATE_LIMIT_RSSHUB_BURST', 5)),
+        RATE_LIMIT_HOST_RATE=float(os.getenv('RATE_LIMIT_HOST_RATE', 1)),
+        RATE_LIMIT_HOST_BURST=int(os.getenv('RATE_LIMIT_HOST_BURST', 3)),
+        RATE_LIMIT_OVERRIDES=os.getenv('RATE_LIMIT_OVERRIDES', ''),
+        CHECK_MODE=os.getenv('CHECK_MODE', 'inline'),
+        JOB_LEASE_SECONDS=int(os.getenv('JOB_LEASE_SECONDS', 300)),
+        JOB_MAX_ATTEMPTS=int(os.getenv('JOB_MAX_ATTEMPTS', 3)),
+        JOB_POLL_SECONDS=float(os.getenv('JOB_POLL_SECONDS', 5)),
+        JOB_RETENTION_HOURS=int(os.getenv('JOB_RETENTION_HOURS', 24)),
+        LEADER_LEASE_SECONDS=int(os.getenv('LEADER_LEASE_SECONDS', 30)),
+        ROUTE_VALIDATION_WORKERS=int(os.getenv('ROUTE_VALIDATION_WORKERS', 8)),
+        ROUTE_VALIDATION_CACHE_SECONDS=int(os.getenv('ROUTE_VALIDATION_CACHE_SECONDS', 300)),
+        ROUTE_VALIDATION_MAX_ROUTES=int(os.getenv('ROUTE_VALIDATION_MAX_ROUTES', 500)),
+        FETCH_LOG_RETENTION_DAYS=int(os.getenv('FETCH_LOG_RETENTION_DAYS', 14)),
+        HOURLY_ROLLUP_RETENTION_DAYS=int(os.getenv('HOURLY_ROLLUP_RETENTION_DAYS', 90)),
+        ROLLUP_INTERVAL_MINUTES=int(os.getenv('ROLLUP_INTERVAL_MINUTES', 15)),
+        ITEM_ARCHIVE_ENABLED=os.getenv('ITEM_ARCHIVE_ENABLED', 'false').lower() in ('1', 'true', 'yes'),
+        ITEM_ARCHIVE_DIR=os.getenv('ITEM_ARCHIVE_DIR', ''),
+        ITEM_ARCHIVE_KEEP_ITEMS=int(os.getenv('ITEM_ARCHIVE_KEEP_ITEMS', 200)),
+        ITEM_ARCHIVE_KEEP_DAYS=int(os.getenv('ITEM_ARCHIVE_KEEP_DAYS', 30)),
+        ITEM_ARCHIVE_SEGMENT_MB=int(os.getenv('ITEM_ARCHIVE_SEGMENT_MB', 64)),
+        ITEM_ARCHIVE_INTERVAL_MINUTES=int(os.getenv('ITEM_ARCHIVE_INTERVAL_MINUTES', 60)),
+        SQLITE_TUNING=os.getenv('SQLITE_TUNING', 'true').lower() in ('1', 'true', 'yes'),
+        SQLITE_JOURNAL_MODE=os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        SQLITE_SYNCHRONOUS=os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        SQLITE_BUSY_TIMEOUT_MS=int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        SQLITE_MMAP_SIZE=int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        SQLITE_CACHE_SIZE_KB=int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    )
+    if test_config:
+        app.config.update(test_config)
+    
+    # Ensure the instance folder exists
+    try:
+        os.makedirs(app.instance_path)
+    except OSError:
+        pass
+    
+    # Initialize extensions
+    db.init_app(app)
+    with app.app_context():
+        configure_sqlite(app, db.engine)
+    
+    # Configure logging
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(os.path.join(app.instance_path, 'app.log')),
+            logging.StreamHandler()
+        ]
+    )
+    
+    app.extensions['readiness'] = {'ready': False, 'steps': {}, 'error': None, 'ready_at': None}
+    app.register_blueprint(bp)
+    return app
 
 # Forms
 class FeedSourceForm(FlaskForm):
@@ -68,24 +168,37 @@ class FeedSourceForm(FlaskForm):
 class SettingsForm(FlaskForm):
     rsshub_base_url = StringField('RSSHub Base URL', validators=[DataRequired(), URL()])
     check_interval = IntegerField('Default Check Interval (minutes)', default=30)
+    adaptive_polling = BooleanField('Adaptive Polling', default=False)
+    adaptive_min_interval = IntegerField('Minimum Adaptive Interval (minutes)', default=5)
+    adaptive_max_interval = IntegerField('Maximum Adaptive Interval (minutes)', default=1440)
+    rate_limit_enabled = BooleanField('Rate Limiting', default=True)
+    rate_limit_rsshub_rate = FloatField('RSSHub Requests per Second', default=2, validators=[NumberRange(min=0)])
+    rate_limit_rsshub_burst = IntegerField('RSSHub Burst', default=5, validators=[NumberRange(min=1)])
+    rate_limit_host_rate = FloatField('Other Hosts Requests per Second', default=1, validators=[NumberRange(min=0)])
+    rate_limit_host_burst = IntegerField('Other Hosts Burst', default=3, validators=[NumberRange(min=1)])
+    rate_limit_overrides = TextAreaField('Per-Host Limits')
+    
+    def validate_rate_limit_overrides(self, field):
+        try:
+            parse_overrides(field.data)
+        except ValueError as e:
+            raise ValidationError(str(e))
 
 # Routes
-@app.route('/')
+@bp.route('/')
 def dashboard():
     # Get summary stats
     total_feeds = FeedSource.query.count()
     active_feeds = FeedSource.query.filter_by(is_active=True).count()
     
-    # Get feeds with recent status
+    # Get feeds with their latest status
     feeds = db.session.query(
         FeedSource, 
-        db.func.max(FetchLog.fetched_at).label('last_check'),
-        FetchLog.status,
-        FetchLog.quality_score
+        FeedStatus.last_check_at,
+        FeedStatus.status,
+        FeedStatus.quality_score
     ).outerjoin(
-        FetchLog, FeedSource.id == FetchLog.feed_source_id
-    ).group_by(
-        FeedSource.id
+        FeedStatus, FeedSource.id == FeedStatus.feed_source_id
     ).all()
     
     # Get recent alerts
@@ -108,12 +221,12 @@ def dashboard():
         categories=categories
     )
 
-@app.route('/source-builder')
+@bp.route('/source-builder')
 def source_builder():
     """Source Builder interface for easily creating new feeds"""
     return render_template('source_builder.html')
 
-@app.route('/api/feed/add', methods=['POST'])
+@bp.route('/api/feed/add', methods=['POST'])
 def api_add_feed():
     """API endpoint to add a new feed"""
     try:
@@ -143,7 +256,7 @@ def api_add_feed():
         db.session.commit()
         
         # Fetch the feed for the first time
-        fetch_and_parse_feed(feed)
+        check_or_enqueue(feed)
         
         return jsonify({
             'success': True,
@@ -152,7 +265,7 @@ def api_add_feed():
         })
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error adding feed via API: {e}")
+        current_app.logger.error(f"Error adding feed via API: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
@@ -169,9 +282,10 @@ def suggest_selectors(url):
         dict: Suggested selectors
     """
     try:
-        response = requests.get(url, timeout=30)
+        response = http_get(url)
         response.raise_for_status()
         
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(response.content, 'html.parser')
         
         selectors = {}
@@ -227,10 +341,10 @@ def suggest_selectors(url):
         return selectors
     
     except Exception as e:
-        app.logger.error(f"Error suggesting selectors for {url}: {str(e)}")
+        current_app.logger.error(f"Error suggesting selectors for {url}: {str(e)}")
         return {}
 
-@app.route('/feed/<int:feed_id>.xml')
+@bp.route('/feed/<int:feed_id>.xml')
 def get_feed_as_rss(feed_id):
     """Serve a feed's content as RSS format for external RSS readers"""
     try:
@@ -256,7 +370,7 @@ def get_feed_as_rss(feed_id):
         ET.SubElement(channel, 'lastBuildDate').text = datetime.utcnow().strftime('%a, %d %b %Y %H:%M:%S GMT')
         
         # Add atom:link for self-reference (RSS autodiscovery)
-        feed_url = url_for('get_feed_as_rss', feed_id=feed.id, _external=True)
+        feed_url = url_for('main.get_feed_as_rss', feed_id=feed.id, _external=True)
         ET.SubElement(channel, '{http://www.w3.org/2005/Atom}link', {
             'href': feed_url,
             'rel': 'self',
@@ -311,10 +425,10 @@ def get_feed_as_rss(feed_id):
         return response
         
     except Exception as e:
-        app.logger.error(f"Error generating RSS feed: {str(e)}")
+        current_app.logger.error(f"Error generating RSS feed: {str(e)}")
         return f"Error generating feed: {str(e)}", 500
 
-@app.route('/api/feed/suggest-selectors', methods=['POST'])
+@bp.route('/api/feed/suggest-selectors', methods=['POST'])
 def api_suggest_selectors():
     """API endpoint to suggest selectors for a given URL"""
     try:
@@ -337,13 +451,13 @@ def api_suggest_selectors():
             'selectors': selectors
         })
     except Exception as e:
-        app.logger.error(f"Error suggesting selectors: {e}")
+        current_app.logger.error(f"Error suggesting selectors: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/feed/extraction-stats/<int:feed_id>')
+@bp.route('/api/feed/extraction-stats/<int:feed_id>')
 def api_feed_extraction_stats(feed_id):
     """Get content extraction statistics for a feed"""
     try:
@@ -407,12 +521,12 @@ def api_feed_extraction_stats(feed_id):
         })
         
     except Exception as e:
-        app.logger.error(f"Error getting extraction stats: {e}")
+        current_app.logger.error(f"Error getting extraction stats: {e}")
         return jsonify({
             'error': str(e)
         }), 500
 
-@app.route('/feeds')
+@bp.route('/feeds')
 def feed_list():
     # Get query parameters
     category = request.args.get('category')
@@ -422,13 +536,11 @@ def feed_list():
     # Base query
     query = db.session.query(
         FeedSource, 
-        db.func.max(FetchLog.fetched_at).label('last_check'),
-        FetchLog.status,
-        FetchLog.quality_score
+        FeedStatus.last_check_at,
+        FeedStatus.status,
+        FeedStatus.quality_score
     ).outerjoin(
-        FetchLog, FeedSource.id == FetchLog.feed_source_id
-    ).group_by(
-        FeedSource.id
+        FeedStatus, FeedSource.id == FeedStatus.feed_source_id
     )
     
     # Apply filters
@@ -440,8 +552,8 @@ def feed_list():
             query = query.filter(FeedSource.is_active == True)
         elif status == 'inactive':
             query = query.filter(FeedSource.is_active == False)
-        elif status in ['success', 'error', 'warning']:
-            query = query.filter(FetchLog.status == status)
+        elif status in ['success', 'error', 'warning', 'not_modified']:
+            query = query.filter(FeedStatus.status == status)
     
     if search:
         query = query.filter(FeedSource.name.ilike(f'%{search}%'))
@@ -449,6 +561,9 @@ def feed_list():
     # Execute query
     feeds = query.all()
     
+    # Open and half-open circuits, of the feed itself or its upstream host
+    circuits = get_feed_circuits({feed.id: get_feed_host(feed) for feed, _, _, _ in feeds})
+    
     # Get categories for filter
     categories = db.session.query(
         FeedSource.category, 
@@ -460,13 +575,14 @@ def feed_list():
     return render_template(
         'feed_list.html',
         feeds=feeds,
+        circuits=circuits,
         categories=categories,
         current_category=category,
         current_status=status,
         search=search
     )
 
-@app.route('/feed/<int:feed_id>')
+@bp.route('/feed/<int:feed_id>')
 def feed_detail(feed_id):
     feed = FeedSource.query.get_or_404(feed_id)
     
@@ -483,15 +599,21 @@ def feed_detail(feed_id):
     # Get feed health metrics
     health = get_feed_health(feed_id)
     
+    # Get the interval the scheduler actually uses for this feed
+    adaptive_interval = feed.fetch_state.adaptive_interval if feed.fetch_state else None
+    effective_interval = get_effective_interval(feed.check_frequency, adaptive_interval)
+    
     return render_template(
         'feed_detail.html',
         feed=feed,
         logs=logs,
         items=items,
-        health=health
+        health=health,
+        adaptive_polling=current_app.config.get('ADAPTIVE_POLLING'),
+        effective_interval=effective_interval
     )
 
-@app.route('/feed/add', methods=['GET', 'POST'])
+@bp.route('/feed/add', methods=['GET', 'POST'])
 def add_feed():
     form = FeedSourceForm()
     
@@ -523,16 +645,16 @@ def add_feed():
             flash('Feed added successfully!', 'success')
             
             # Fetch the feed for the first time
-            fetch_and_parse_feed(feed)
+            check_or_enqueue(feed)
             
-            return redirect(url_for('feed_detail', feed_id=feed.id))
+            return redirect(url_for('main.feed_detail', feed_id=feed.id))
         except Exception as e:
             db.session.rollback()
             flash(f'Error adding feed: {str(e)}', 'danger')
     
     return render_template('add_feed.html', form=form, mode='add')
 
-@app.route('/feed/edit/<int:feed_id>', methods=['GET', 'POST'])
+@bp.route('/feed/edit/<int:feed_id>', methods=['GET', 'POST'])
 def edit_feed(feed_id):
     feed = FeedSource.query.get_or_404(feed_id)
     
@@ -565,61 +687,93 @@ def edit_feed(feed_id):
             feed.requires_javascript = form.requires_javascript.data
             feed.custom_selectors = form.custom_selectors.data
             
+            # Force a full re-parse so the new settings apply to unchanged feeds
+            if feed.fetch_state:
+                feed.fetch_state.etag = None
+                feed.fetch_state.last_modified = None
+                feed.fetch_state.body_hash = None
+            
+            # The route may have been fixed, give it a fresh circuit
+            reset_feed_circuit(feed)
+            
             try:
                 db.session.commit()
                 flash('Feed updated successfully!', 'success')
                 
                 # Re-fetch the feed if active
                 if feed.is_active:
-                    fetch_and_parse_feed(feed)
+                    check_or_enqueue(feed)
                 
-                return redirect(url_for('feed_detail', feed_id=feed.id))
+                return redirect(url_for('main.feed_detail', feed_id=feed.id))
             except Exception as e:
                 db.session.rollback()
                 flash(f'Error updating feed: {str(e)}', 'danger')
     
     return render_template('add_feed.html', form=form, mode='edit', feed=feed)
 
-@app.route('/feed/delete/<int:feed_id>', methods=['POST'])
+@bp.route('/feed/delete/<int:feed_id>', methods=['POST'])
 def delete_feed(feed_id):
     feed = FeedSource.query.get_or_404(feed_id)
     
     try:
         db.session.delete(feed)
         db.session.commit()
+        delete_feed_archive(feed_id)
         flash('Feed deleted successfully!', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting feed: {str(e)}', 'danger')
     
-    return redirect(url_for('feed_list'))
+    return redirect(url_for('main.feed_list'))
 
-@app.route('/feed/check/<int:feed_id>', methods=['POST'])
+@bp.route('/feed/check/<int:feed_id>', methods=['POST'])
 def check_feed(feed_id):
     feed = FeedSource.query.get_or_404(feed_id)
     
-    status, message, _, item_count = fetch_and_parse_feed(feed)
+    status, message = check_or_enqueue(feed)
     
-    flash(f'Feed check complete: {message}', 'info' if status == 'success' else 'warning')
+    if status == 'queued':
+        flash(message, 'info')
+    else:
+        flash(f'Feed check complete: {message}', 'info' if status == 'success' else 'warning')
     
-    return redirect(url_for('feed_detail', feed_id=feed.id))
+    return redirect(url_for('main.feed_detail', feed_id=feed.id))
 
-@app.route('/settings', methods=['GET', 'POST'])
+@bp.route('/settings', methods=['GET', 'POST'])
 def settings():
-    # Get current settings
-    rsshub_base_url = app.config.get('RSSHUB_BASE_URL')
-    check_interval = app.config.get('CHECK_INTERVAL')
+    # Get current settings, including changes saved through another process
+    refresh_settings(current_app._get_current_object())
+    rsshub_base_url = current_app.config.get('RSSHUB_BASE_URL')
+    check_interval = current_app.config.get('CHECK_INTERVAL')
     
     form = SettingsForm(
         rsshub_base_url=rsshub_base_url,
-        check_interval=check_interval
+        check_interval=check_interval,
+        adaptive_polling=current_app.config.get('ADAPTIVE_POLLING'),
+        adaptive_min_interval=current_app.config.get('ADAPTIVE_MIN_INTERVAL'),
+        adaptive_max_interval=current_app.config.get('ADAPTIVE_MAX_INTERVAL'),
+        rate_limit_enabled=current_app.config.get('RATE_LIMIT_ENABLED'),
+        rate_limit_rsshub_rate=current_app.config.get('RATE_LIMIT_RSSHUB_RATE'),
+        rate_limit_rsshub_burst=current_app.config.get('RATE_LIMIT_RSSHUB_BURST'),
+        rate_limit_host_rate=current_app.config.get('RATE_LIMIT_HOST_RATE'),
+        rate_limit_host_burst=current_app.config.get('RATE_LIMIT_HOST_BURST'),
+        rate_limit_overrides=current_app.config.get('RATE_LIMIT_OVERRIDES')
     )
     
     if form.validate_on_submit():
         # Update settings
         for key, value in [
             ('RSSHUB_BASE_URL', form.rsshub_base_url.data),
-            ('CHECK_INTERVAL', form.check_interval.data)
+            ('CHECK_INTERVAL', form.check_interval.data),
+            ('ADAPTIVE_POLLING', form.adaptive_polling.data),
+            ('ADAPTIVE_MIN_INTERVAL', form.adaptive_min_interval.data),
+            ('ADAPTIVE_MAX_INTERVAL', form.adaptive_max_interval.data),
+            ('RATE_LIMIT_ENABLED', form.rate_limit_enabled.data),
+            ('RATE_LIMIT_RSSHUB_RATE', form.rate_limit_rsshub_rate.data),
+            ('RATE_LIMIT_RSSHUB_BURST', form.rate_limit_rsshub_burst.data),
+            ('RATE_LIMIT_HOST_RATE', form.rate_limit_host_rate.data),
+            ('RATE_LIMIT_HOST_BURST', form.rate_limit_host_burst.data),
+            ('RATE_LIMIT_OVERRIDES', form.rate_limit_overrides.data or '')
         ]:
             setting = SystemSettings.query.filter_by(key=key).first()
             
@@ -630,51 +784,54 @@ def settings():
                 db.session.add(setting)
             
             # Also update app config
-            app.config[key] = value
+            current_app.config[key] = value
+        
+        # Other processes reload their settings once they see the new version
+        bump_settings_version(current_app._get_current_object())
         
         try:
             db.session.commit()
             flash('Settings updated successfully!', 'success')
             
             # Restart the scheduler with new interval
-            init_scheduler()
+            init_scheduler(current_app._get_current_object())
             
-            return redirect(url_for('settings'))
+            return redirect(url_for('main.settings'))
         except Exception as e:
             db.session.rollback()
             flash(f'Error updating settings: {str(e)}', 'danger')
     
     return render_template('settings.html', form=form)
 
-@app.route('/alerts')
+@bp.route('/alerts')
 def alert_list():
     # Get all alerts
     alerts = Alert.query.order_by(Alert.created_at.desc()).all()
     
     return render_template('alerts.html', alerts=alerts)
 
-@app.route('/alerts/read/<int:alert_id>', methods=['POST'])
+@bp.route('/alerts/read/<int:alert_id>', methods=['POST'])
 def mark_alert_read(alert_id):
     alert = Alert.query.get_or_404(alert_id)
     
     alert.is_read = True
     db.session.commit()
     
-    return redirect(url_for('alert_list'))
+    return redirect(url_for('main.alert_list'))
 
-@app.route('/alerts/read-all', methods=['POST'])
+@bp.route('/alerts/read-all', methods=['POST'])
 def mark_all_alerts_read():
     Alert.query.update({Alert.is_read: True})
     db.session.commit()
     
     flash('All alerts marked as read', 'success')
     
-    return redirect(url_for('alert_list'))
+    return redirect(url_for('main.alert_list'))
 
 # API endpoints
 # Add these API endpoints to app.py
 
-@app.route('/api/stats', methods=['GET'])
+@bp.route('/api/stats', methods=['GET'])
 def api_stats():
     """Get basic database stats"""
     total_feeds = FeedSource.query.count()
@@ -687,67 +844,106 @@ def api_stats():
         'total_logs': total_logs
     })
 
-@app.route('/api/feed/check-all', methods=['POST'])
+@bp.route('/api/feed/check-all', methods=['POST'])
 def api_check_all_feeds():
     """Trigger check of all active feeds"""
     try:
-        count = check_all_feeds()
+        if use_job_queue():
+            feed_ids = [feed_id for (feed_id,) in db.session.query(FeedSource.id).filter_by(is_active=True).all()]
+            queued = enqueue_checks(feed_ids, source='api', priority=PRIORITY_MANUAL)
+            return jsonify({
+                'success': True,
+                'count': len(feed_ids),
+                'queued': len(queued),
+                'message': f'Queued {len(queued)} feed checks ({len(feed_ids) - len(queued)} already queued)'
+            })
+        
+        results = check_all_feeds()
+        failed = sum(1 for result in results if result['status'] == 'error')
         return jsonify({
             'success': True,
-            'count': count,
-            'message': f'Started checking {count} feeds'
+            'count': len(results),
+            'failed': failed,
+            'results': results,
+            'message': f'Checked {len(results)} feeds ({failed} failed)'
         })
     except Exception as e:
-        app.logger.error(f"Error checking all feeds: {e}")
+        current_app.logger.error(f"Error checking all feeds: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/scheduler/status', methods=['GET'])
+@bp.route('/api/scheduler/status', methods=['GET'])
 def api_scheduler_status():
     """Get scheduler status"""
     try:
-        scheduler_running = 'scheduler' in globals() and scheduler.running
+        state = current_app.extensions.get('scheduler')
+        scheduler_running = state is not None and state['apscheduler'].running
+        leader = state['election'].status() if state is not None else None
         
-        if scheduler_running:
-            # Find the next run time for the check_all_feeds job
-            jobs = scheduler.get_jobs()
-            next_run = None
-            
-            for job in jobs:
-                if job.func_ref.endswith('check_all_feeds'):
-                    next_run = job.next_run_time.strftime('%Y-%m-%d %H:%M:%S')
-                    break
+        queue = {}
+        next_run = None
+        if scheduler_running and leader['is_leader']:
+            # Report the per-feed queue and the next feed due for a check
+            queue = state['feed_scheduler'].status()
+            if queue['next_due'] is not None:
+                next_run = datetime.fromtimestamp(queue['next_due']).strftime('%Y-%m-%d %H:%M:%S')
+        
+        # Standby and queue-mode processes report the app's pipeline if checks ran through it here
+        pipeline = queue.get('pipeline')
+        if pipeline is None and current_app.extensions.get('check_pipeline') is not None:
+            pipeline = current_app.extensions['check_pipeline'].stats()
         
         return jsonify({
             'running': scheduler_running,
-            'next_run': next_run if scheduler_running else None
+            'role': ('leader' if leader['is_leader'] else 'standby') if scheduler_running else None,
+            'leader': leader,
+            'mode': current_app.config.get('CHECK_MODE', 'inline'),
+            'next_run': next_run,
+            'queue_depth': queue.get('queue_depth', 0),
+            'due': queue.get('due', 0),
+            'in_progress': queue.get('running', 0),
+            'lag_seconds': queue.get('lag_seconds', 0),
+            'pipeline': pipeline,
+            'jobs': get_queue_stats() if use_job_queue() else None
         })
     except Exception as e:
-        app.logger.error(f"Error getting scheduler status: {e}")
+        current_app.logger.error(f"Error getting scheduler status: {e}")
         return jsonify({
             'running': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/scheduler/restart', methods=['POST'])
+@bp.route('/api/rate-limits', methods=['GET'])
+def api_rate_limits():
+    """Get the per-host rate limits and how long requests waited for them"""
+    hosts = get_rate_limit_stats()
+    
+    return jsonify({
+        'enabled': bool(current_app.config.get('RATE_LIMIT_ENABLED')),
+        'requests': sum(host['requests'] for host in hosts),
+        'wait_seconds_total': round(sum(host['wait_seconds_total'] for host in hosts), 3),
+        'hosts': hosts
+    })
+
+@bp.route('/api/scheduler/restart', methods=['POST'])
 def api_restart_scheduler():
     """Restart the scheduler"""
     try:
-        init_scheduler()
+        init_scheduler(current_app._get_current_object())
         return jsonify({
             'success': True,
             'message': 'Scheduler restarted successfully'
         })
     except Exception as e:
-        app.logger.error(f"Error restarting scheduler: {e}")
+        current_app.logger.error(f"Error restarting scheduler: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/feed/toggle-status/<int:feed_id>', methods=['POST'])
+@bp.route('/api/feed/toggle-status/<int:feed_id>', methods=['POST'])
 def api_toggle_feed_status(feed_id):
     """Toggle feed active status"""
     feed = FeedSource.query.get_or_404(feed_id)
@@ -765,13 +961,13 @@ def api_toggle_feed_status(feed_id):
         })
     except Exception as e:
         db.session.rollback()
-        app.logger.error(f"Error toggling feed status: {e}")
+        current_app.logger.error(f"Error toggling feed status: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/feed/preview', methods=['POST'])
+@bp.route('/api/feed/preview', methods=['POST'])
 def api_preview_feed():
     route = request.json.get('route')
     
@@ -788,134 +984,376 @@ def api_preview_feed():
         'items': preview_items
     })
 
-@app.route('/api/feed/validate', methods=['POST'])
+@bp.route('/api/feed/validate', methods=['POST'])
 def api_validate_feed():
     route = request.json.get('route')
     
     if not route:
         return jsonify({'error': 'No route provided'}), 400
     
-    is_valid, message = validate_rsshub_route(route)
+    result = validate_route(route, use_cache=not request.json.get('refresh'))
     
     return jsonify({
-        'valid': is_valid,
-        'message': message
+        'valid': result['valid'],
+        'message': result['message'],
+        'cached': result['cached']
     })
 
-@app.route('/api/feed/stats/<int:feed_id>')
+@bp.route('/api/feed/validate-batch', methods=['POST'])
+def api_validate_feeds():
+    """
+    Validate many routes at once, streaming one JSON result per line (NDJSON)
+    
+    Expects {"routes": [...], "refresh": false}. Routes validated in the last
+    ROUTE_VALIDATION_CACHE_SECONDS are answered from the cache unless refresh
+    is set, the others are probed concurrently and streamed as they complete.
+    """
+    data = request.get_json(silent=True) or {}
+    routes = data.get('routes')
+    
+    if not isinstance(routes, list) or not routes:
+        return jsonify({'error': 'No routes provided'}), 400
+    if not all(isinstance(route, str) for route in routes):
+        return jsonify({'error': 'Routes must be strings'}), 400
+    
+    max_routes = current_app.config.get('ROUTE_VALIDATION_MAX_ROUTES', 500)
+    if len(routes) > max_routes:
+        return jsonify({'error': f'At most {max_routes} routes per request'}), 400
+    
+    results = validate_routes(current_app._get_current_object(), routes, use_cache=not data.get('refresh'))
+    
+    response = current_app.response_class(
+        (json.dumps(result) + '\n' for result in results),
+        mimetype='application/x-ndjson'
+    )
+    # Let reverse proxies pass each line through as soon as it is written
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/api/feed/stats/<int:feed_id>')
 def api_feed_stats(feed_id):
-    # Get logs for the last 30 days
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    """
+    Check statistics of a feed per day (or per hour with ?period=hour)
     
-    logs = FetchLog.query.filter(
-        FetchLog.feed_source_id == feed_id,
-        FetchLog.fetched_at >= thirty_days_ago
-    ).order_by(FetchLog.fetched_at).all()
+    Read from the fetch log rollups, which are brought up to date every
+    ROLLUP_INTERVAL_MINUTES. Defaults to the last 30 days, ?days=N changes it.
+    """
+    period = request.args.get('period', 'day')
+    if period not in ('hour', 'day'):
+        return jsonify({'error': 'period must be hour or day'}), 400
+    days = min(max(request.args.get('days', 30, type=int), 1), 365)
+    
+    rollups = get_rollups(feed_id, period, since=datetime.utcnow() - timedelta(days=days))
+    date_format = '%Y-%m-%d %H:00' if period == 'hour' else '%Y-%m-%d'
     
     stats = {
+        'period': period,
         'dates': [],
         'quality_scores': [],
         'item_counts': [],
         'success_rate': [],
+        'check_counts': [],
+        'duration_avg': [],
+        'duration_p95': [],
     }
     
-    for log in logs:
-        stats['dates'].append(log.fetched_at.strftime('%Y-%m-%d'))
-        stats['quality_scores'].append(log.quality_score or 0)
-        stats['item_counts'].append(log.item_count or 0)
-        stats['success_rate'].append(1 if log.status == 'success' else 0)
+    for rollup in rollups:
+        stats['dates'].append(rollup.bucket_start.strftime(date_format))
+        stats['quality_scores'].append(round(rollup.quality_avg or 0, 1))
+        stats['item_counts'].append(round(rollup.item_count_avg or 0, 1))
+        stats['success_rate'].append(round(rollup.success_rate, 3))
+        stats['check_counts'].append(rollup.check_count)
+        stats['duration_avg'].append(round(rollup.duration_avg, 3) if rollup.duration_avg is not None else None)
+        stats['duration_p95'].append(round(rollup.duration_p95, 3) if rollup.duration_p95 is not None else None)
     
     return jsonify(stats)
 
+@bp.route('/api/feed/archive/<int:feed_id>')
+def api_feed_archive(feed_id):
+    """
+    Items of a feed moved to the archive (ITEM_ARCHIVE_ENABLED), newest first
+    
+    Optional ?start= and ?end= (ISO 8601 dates or times, UTC) limit the
+    range, ?limit= the number of items (default 100).
+    """
+    FeedSource.query.get_or_404(feed_id)
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'start and end must be ISO 8601 dates'}), 400
+    # A bare end date includes that whole day
+    if end is not None and len(request.args['end']) == 10:
+        end += timedelta(days=1) - timedelta(microseconds=1)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+    
+    return jsonify({
+        'archive': get_archive_stats(feed_id),
+        'items': get_archived_items(feed_id, start, end, limit)
+    })
+
 # Helper functions
-def init_scheduler():
-    """Initialize or restart the background scheduler"""
-    global scheduler
+def check_or_enqueue(feed):
+    """
+    Check a feed right away, or queue the check for a worker in queue mode
+    
+    Returns:
+        tuple: (status, message), status is 'queued' in queue mode
+    """
+    if use_job_queue():
+        queued = enqueue_checks([feed.id], source='manual', priority=PRIORITY_MANUAL)
+        if queued:
+            return 'queued', 'Feed check queued, a worker will pick it up shortly'
+        return 'queued', 'A check of this feed is already queued'
+    
+    status, message, _, _ = fetch_and_parse_feed(feed)
+    return status, message
+
+def init_scheduler(app):
+    """
+    Initialize or restart the background scheduler
+    
+    Every process (e.g. each gunicorn worker) runs the scheduler, but only the
+    leader of the scheduler election hands out feeds. The others stand by and
+    take over within LEADER_LEASE_SECONDS if the leader dies.
+    """
+    state = app.extensions.get('scheduler')
     
     # Stop existing scheduler if it exists
-    if 'scheduler' in globals() and scheduler.running:
-        scheduler.shutdown()
+    if state is not None:
+        if state['apscheduler'].running:
+            state['apscheduler'].shutdown()
+        state['feed_scheduler'].shutdown()
+        election = state['election']
+    else:
+        # Keep the election across restarts so a leader stays leader
+        election = LeaderElection(app)
+        atexit.register(election.release)
+    election.heartbeat()
     
     # Create new scheduler
     scheduler = BackgroundScheduler()
     
-    # Add job to check all feeds
-    interval = app.config.get('CHECK_INTERVAL', 30)
-    scheduler.add_job(check_all_feeds, 'interval', minutes=interval)
+    # Each feed is checked on its own frequency, the tick job hands out due feeds
+    feed_scheduler = FeedScheduler(app)
+    
+    def tick():
+        # Standbys keep their settings current too, for when they take over
+        refresh_settings(app)
+        # Only the process that won the scheduler election hands out feeds
+        if election.is_leader:
+            feed_scheduler.tick()
+    
+    def rollup():
+        # Fetch log rollups and retention also run on the leader only
+        if election.is_leader:
+            run_rollups(app)
+    
+    def archive():
+        if election.is_leader:
+            archive_old_items(app)
+    
+    tick_seconds = app.config.get('SCHEDULER_TICK_SECONDS', 15)
+    scheduler.add_job(election.heartbeat, 'interval', seconds=election.heartbeat_seconds)
+    scheduler.add_job(tick, 'interval', seconds=tick_seconds, next_run_time=datetime.now())
+    scheduler.add_job(rollup, 'interval', minutes=app.config.get('ROLLUP_INTERVAL_MINUTES', 15), next_run_time=datetime.now())
+    if app.config.get('ITEM_ARCHIVE_ENABLED'):
+        scheduler.add_job(archive, 'interval', minutes=app.config.get('ITEM_ARCHIVE_INTERVAL_MINUTES', 60))
     
     # Start scheduler
     scheduler.start()
-    app.logger.info(f"Scheduler started with {interval} minute interval")
+    app.extensions['scheduler'] = {'apscheduler': scheduler, 'feed_scheduler': feed_scheduler, 'election': election}
+    role = 'leader' if election.is_leader else 'standby'
+    app.logger.info(f"Scheduler started with {tick_seconds} second tick as {role} ({election.holder})")
 
-def load_settings():
-    """Load settings from database into app config"""
+def warm_up(app):
+    """
+    Do the work a first request would otherwise pay for
+    
+    Configures the SQLAlchemy mappers, opens a pooled database connection,
+    compiles every template and renders the dashboard once.
+    """
     with app.app_context():
-        settings = SystemSettings.query.all()
+        sa.orm.configure_mappers()
+        db.session.execute(sa.text('SELECT 1'))
+        db.session.remove()
         
-        for setting in settings:
-            # Convert value to appropriate type
-            if setting.key == 'CHECK_INTERVAL':
-                app.config[setting.key] = int(setting.value)
-            else:
-                app.config[setting.key] = setting.value
+        for name in app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html')):
+            app.jinja_env.get_template(name)
+    
+    response = app.test_client().get('/')
+    if response.status_code != 200:
+        raise RuntimeError(f"Dashboard warm-up returned HTTP {response.status_code}")
+
+def init_app(app, start_scheduler=True):
+    """
+    One-time initialization of a serving process, before its first request
+    
+    Creates the schema, loads the settings stored in the database, starts
+    the scheduler and warms up the app; /api/ready reports 200 once all of
+    it is done. If a step fails (e.g. the database is not reachable yet) the
+    remaining steps are retried in the background until they succeed.
+    
+    Args:
+        app: App returned by create_app()
+        start_scheduler: Whether this process takes part in scheduling
+    """
+    readiness = app.extensions['readiness']
+    steps = [
+        ('schema', lambda: _create_schema(app)),
+        ('settings', lambda: load_settings(app)),
+    ]
+    if start_scheduler:
+        steps.append(('scheduler', lambda: init_scheduler(app)))
+    steps.append(('warm_up', lambda: warm_up(app)))
+    
+    def run_steps():
+        for name, step in steps:
+            if name in readiness['steps']:
+                continue
+            started = time.perf_counter()
+            step()
+            readiness['steps'][name] = round(time.perf_counter() - started, 3)
+        readiness['ready'] = True
+        readiness['error'] = None
+        readiness['ready_at'] = datetime.utcnow()
+        app.logger.info(f"App ready: {readiness['steps']}")
+    
+    def retry():
+        delay = 1
+        while not readiness['ready']:
+            time.sleep(delay)
+            delay = min(delay * 2, 30)
+            try:
+                run_steps()
+            except Exception as e:
+                readiness['error'] = str(e)
+                app.logger.warning(f"App initialization still failing: {e}")
+    
+    try:
+        run_steps()
+    except Exception as e:
+        readiness['error'] = str(e)
+        app.logger.error(f"App initialization failed, retrying in the background: {e}")
+        threading.Thread(target=retry, name='app-init', daemon=True).start()
+
+def _create_schema(app):
+    with app.app_context():
+        for version, name in upgrade():
+            app.logger.info(f"Applied migration {version}: {name}")
+
+@bp.route('/api/ready', methods=['GET'])
+def api_ready():
+    """Readiness probe: 200 once init_app() has finished, 503 before"""
+    readiness = current_app.extensions['readiness']
+    
+    return jsonify({
+        'ready': readiness['ready'],
+        'steps': readiness['steps'],
+        'error': readiness['error'],
+        'ready_at': readiness['ready_at'].strftime('%Y-%m-%d %H:%M:%S') if readiness['ready_at'] else None
+    }), 200 if readiness['ready'] else 503
 
 # Create a command to initialize the database
-@app.cli.command('init-db')
+@bp.cli.command('init-db')
 def init_db_command():
     """Create the database tables."""
-    db.create_all()
+    upgrade()
     print('Initialized the database.')
 
+# Create a command to apply schema migrations
+@bp.cli.command('db-upgrade')
+def db_upgrade_command():
+    """Apply pending schema migrations."""
+    applied = upgrade()
+    for version, name in applied:
+        print(f'Applied migration {version}: {name}')
+    print(f'Database is up to date ({len(applied)} migrations applied).')
+
+# Create a command to show schema migrations
+@bp.cli.command('db-status')
+def db_status_command():
+    """Show which schema migrations have been applied."""
+    for status in get_migration_status():
+        applied_at = status['applied_at'].strftime('%Y-%m-%d %H:%M:%S') if status['applied_at'] else 'pending'
+        print(f"{status['version']:>4}  {applied_at:<19}  {status['name']}")
+    sqlite_settings = get_sqlite_settings(db.engine)
+    if sqlite_settings:
+        print('SQLite: ' + ', '.join(f'{name}={value}' for name, value in sqlite_settings.items()))
+
+# Create a command to check the query plans of hot queries
+@bp.cli.command('db-explain')
+def db_explain_command():
+    """Check that the hot queries use their indexes (exits 1 if one does not)."""
+    missing = 0
+    for result in explain_hot_queries():
+        print(f"{'OK  ' if result['uses_index'] else 'SCAN'}  {result['query']} ({result['index']})")
+        for line in result['plan']:
+            print(f'        {line}')
+        if not result['uses_index']:
+            missing += 1
+    if missing:
+        raise SystemExit(f'{missing} hot queries do not use their index, run flask db-upgrade')
+
 # Create a command to load settings
-@app.cli.command('load-settings')
+@bp.cli.command('load-settings')
 def load_settings_command():
     """Load settings from database into app config."""
-    settings = SystemSettings.query.all()
+    load_settings(current_app._get_current_object())
+    print('Settings loaded.')
+
+# Create a command to roll up fetch logs
+@bp.cli.command('rollup-logs')
+def rollup_logs_command():
+    """Roll up fetch logs and delete logs past their retention."""
+    days = rollup_fetch_logs()
+    deleted_logs, deleted_rollups = prune_fetch_logs()
+    print(f'Rolled up {days} days of fetch logs, pruned {deleted_logs} logs and {deleted_rollups} hourly rollups.')
+
+# Create a command to archive old feed items
+@bp.cli.command('archive-items')
+@click.option('--feed-id', type=int, default=None, help='Archive one feed only.')
+def archive_items_command(feed_id):
+    """Move old feed items into the compressed item archive."""
+    feeds = [FeedSource.query.get_or_404(feed_id)] if feed_id else FeedSource.query.all()
+    total = sum(archive_feed_items(feed) for feed in feeds)
+    print(f'Archived {total} feed items.')
+
+# Create a command to run a feed check worker
+@bp.cli.command('run-worker')
+@click.option('--concurrency', type=int, default=None, help='Feeds checked in parallel (default: CHECK_WORKERS).')
+@click.option('--worker-id', default=None, help='Worker name shown on claimed jobs (default: host:pid).')
+@click.option('--max-jobs', type=int, default=None, help='Exit after this many jobs.')
+@click.option('--idle-exit', is_flag=True, help='Exit once the queue is empty.')
+def run_worker_command(concurrency, worker_id, max_jobs, idle_exit):
+    """Check feeds queued by the web process (CHECK_MODE=queue)."""
+    app = current_app._get_current_object()
+    upgrade()
+    load_settings(app)
     
-    for setting in settings:
-        # Convert value to appropriate type
-        if setting.key == 'CHECK_INTERVAL':
-            app.config[setting.key] = int(setting.value)
-        else:
-            app.config[setting.key] = setting.value
+    worker = Worker(app, worker_id=worker_id, concurrency=concurrency)
     
-    print('Settings loaded.')
+    # Finish running checks on shutdown, their jobs would otherwise wait for the lease to expire
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: worker.stop())
+    
+    print(f'Worker {worker.worker_id} started.')
+    worker.run(max_jobs=max_jobs, idle_exit=idle_exit)
+    print(f'Worker stopped after {worker.processed} jobs.')
 
 # Create a command to start the scheduler
-@app.cli.command('start-scheduler')
+@bp.cli.command('start-scheduler')
 def start_scheduler_command():
     """Start the background scheduler."""
-    init_scheduler()
+    init_scheduler(current_app._get_current_object())
     print('Scheduler started.')
 
-# Setup code now happens with app context
-def setup_app(app):
-    with app.app_context():
-        # Create tables
-        db.create_all()
-        
-        # Load settings
-        settings = SystemSettings.query.all()
-        for setting in settings:
-            if setting.key == 'CHECK_INTERVAL':
-                app.config[setting.key] = int(setting.value)
-            else:
-                app.config[setting.key] = setting.value
-        
-        # Initialize scheduler
-        init_scheduler()
-
-# Modified app initialization
 if __name__ == '__main__':
     # Get port from environment or use default
     port = int(os.environ.get('PORT', 5000))
     
-    # Setup app
-    setup_app(app)
+    app = create_app()
+    init_app(app)
     
     # Run the app
     app.run(host='0.0.0.0', port=port, debug=True)
-else:
-    # When imported as a module (e.g., by gunicorn)
-    # Still perform setup when the module is imported
-    app.before_request_funcs.setdefault(None, []).insert(0, lambda: setup_app(app) if not getattr(app, '_got_first_request', False) else None)
\ No newline at end of file
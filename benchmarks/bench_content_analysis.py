@@ -0,0 +1,103 @@
+"""
+Benchmark per-entry content analysis on large content:encoded bodies
+
+Compares the previous approach (two BeautifulSoup parses plus a regex word
+count) with the single-pass lxml analysis in content_analysis.py.
+
+Usage:
+    python benchmarks/bench_content_analysis.py [--repeat N]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from content_analysis import analyze_content
+
+PARAGRAPH = (
+    '<p>The council met on <a href="https://example.com/agenda">Tuesday</a> to discuss the '
+    '<strong>new park</strong>, the budget &amp; the timeline. Residents asked questions '
+    'about parking, noise and access for <em>cyclists</em>.</p>\n'
+)
+FIGURE = '<figure><img src="https://example.com/img/{0}.jpg" alt="Photo {0}"><figcaption>Photo {0}</figcaption></figure>\n'
+SCRIPT = '<script>window.dataLayer = window.dataLayer || []; dataLayer.push({"event": "view"});</script>\n'
+
+
+def build_body(target_bytes):
+    """Build an article-like HTML body of roughly target_bytes"""
+    parts = [SCRIPT]
+    size = len(SCRIPT)
+    i = 0
+    while size < target_bytes:
+        chunk = PARAGRAPH if i % 8 else FIGURE.format(i)
+        parts.append(chunk)
+        size += len(chunk)
+        i += 1
+    return ''.join(parts)
+
+
+def legacy_analysis(content, title):
+    """The per-entry work fetch_and_parse_feed used to do"""
+    image_url = None
+    if content:
+        soup = BeautifulSoup(content, 'lxml')
+        img_tag = soup.find('img')
+        if img_tag and img_tag.get('src'):
+            image_url = img_tag.get('src')
+
+    text_content = ''
+    if content:
+        text_content = BeautifulSoup(content, 'lxml').get_text()
+
+    word_count = len(re.findall(r'\w+', text_content)) if text_content else 0
+
+    quality_issues = []
+    if not title or len(title) < 10:
+        quality_issues.append("short_title")
+    if not content or len(text_content) < 100:
+        quality_issues.append("short_content")
+    if not image_url:
+        quality_issues.append("no_image")
+
+    return text_content, word_count, image_url, quality_issues
+
+
+def time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='Iterations per body size')
+    args = parser.parse_args()
+
+    title = 'Council approves the new park'
+    print(f"{'body size':>10} {'legacy ms':>10} {'lxml ms':>10} {'speedup':>8}  match")
+
+    for target in (5_000, 50_000, 200_000, 1_000_000):
+        body = build_body(target)
+        repeat = max(1, args.repeat * 50_000 // target)
+
+        legacy = legacy_analysis(body, title)
+        current = analyze_content(body, title)
+        match = (
+            legacy[0] == current['text'] and legacy[1] == current['word_count']
+            and legacy[2] == current['image_url'] and legacy[3] == current['quality_issues']
+        )
+
+        legacy_ms = time_per_call(lambda: legacy_analysis(body, title), repeat)
+        current_ms = time_per_call(lambda: analyze_content(body, title), repeat)
+
+        print(f"{len(body):>10} {legacy_ms:>10.2f} {current_ms:>10.2f} {legacy_ms / current_ms:>7.1f}x  {match}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark feed parsing throughput with and without the parse process pool
+
+Simulates many feeds being checked at once: CHECK_WORKERS threads each wait
+on a (simulated) download and then parse and analyze a feed body through
+parsing.run_parse, the same way fetch_and_parse_feed does. Throughput with
+PARSE_POOL_SIZE=0 (in-process, bound by the GIL) is compared with pools of
+increasing size; it scales with the number of CPU cores.
+
+Usage:
+    python benchmarks/bench_parse_pool.py [--feeds N] [--entries N] [--workers N]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from parsing import parse_feed, run_parse, shutdown_parse_pool
+
+PARAGRAPH = (
+    '&lt;p&gt;The council met on &lt;a href="https://example.com/agenda"&gt;Tuesday&lt;/a&gt; to '
+    'discuss the &lt;strong&gt;new park&lt;/strong&gt;, the budget and the timeline. Residents '
+    'asked questions about parking, noise and access for cyclists.&lt;/p&gt;'
+)
+
+ITEM = (
+    '<item><title>Council approves the new park, part {0}</title>'
+    '<link>https://example.com/news/{0}.html</link><guid>https://example.com/news/{0}.html</guid>'
+    '<pubDate>Mon, 01 Jan 2024 10:{1:02d}:00 GMT</pubDate>'
+    '<description>{2}</description></item>'
+)
+
+
+def build_feed(entries, paragraphs=40):
+    """Build an RSS body with entries carrying article-sized descriptions"""
+    items = ''.join(ITEM.format(i, i % 60, PARAGRAPH * paragraphs) for i in range(entries))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f'<title>Bench</title><link>https://example.com/</link>{items}</channel></rss>'
+    ).encode('utf-8')
+
+
+def run(app, body, feeds, workers, latency):
+    """Check `feeds` feeds on `workers` threads, returns feeds per second"""
+    def check(_):
+        with app.app_context():
+            time.sleep(latency)  # Network time, releases the GIL
+            return len(run_parse(parse_feed, body))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Warm up the pool so process start-up is not measured
+        list(executor.map(check, range(workers)))
+
+        start = time.perf_counter()
+        counts = list(executor.map(check, range(feeds)))
+        elapsed = time.perf_counter() - start
+
+    assert all(count == counts[0] for count in counts)
+    return feeds / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--feeds', type=int, default=200, help='Feeds checked per run')
+    parser.add_argument('--entries', type=int, default=20, help='Entries per feed')
+    parser.add_argument('--workers', type=int, default=8, help='Checking threads (CHECK_WORKERS)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated download time in seconds')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    body = build_feed(args.entries)
+    cores = os.cpu_count() or 1
+    sizes = sorted({0, 1, max(1, cores // 2), cores})
+
+    print(f"{args.feeds} feeds x {args.entries} entries ({len(body) // 1024} KB), "
+          f"{args.workers} threads, {cores} CPU cores")
+    print(f"{'pool size':>10} {'feeds/s':>10} {'speedup':>8}")
+
+    baseline = None
+    for size in sizes:
+        app.config['PARSE_POOL_SIZE'] = size
+        rate = run(app, body, args.feeds, args.workers, args.latency)
+        shutdown_parse_pool(wait=True)
+        baseline = baseline or rate
+        print(f"{size:>10} {rate:>10.1f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
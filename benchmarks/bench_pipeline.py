@@ -0,0 +1,138 @@
+"""
+Benchmark the staged check pipeline against checks run start to finish per thread
+
+Serves feeds from a local HTTP server with a fixed response delay and makes
+every database commit take --db-delay, one commit at a time, the way a busy
+SQLite file would. Checks all feeds twice: once with run_feed_check in
+a thread pool (fetch, parse and write in one thread, the previous design),
+then with check_all_feeds through the pipeline. Reports when the last feed
+was fetched and when the last check finished, and the pipeline's per-stage
+metrics. While the database is the bottleneck both take about as long, but
+the pipeline is done with the network long before.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--feeds N] [--fetch-delay S] [--db-delay S] [--workers N]
+"""
+import argparse
+import http.server
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+import utils
+from app import create_app
+from models import db, FeedSource
+
+# Time the last feed response was sent
+LAST_FETCH = {'at': 0.0}
+
+ITEM = (
+    '<item><title>Item {0} of feed {1}</title><link>http://example.com/{1}/{0}</link><guid>{1}-{0}</guid>'
+    '<description>Item {0}</description><pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate></item>'
+)
+
+
+def serve_feeds(delay):
+    """Start a local feed server, every response takes `delay` seconds"""
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(delay)
+            # A different body on every request, so no check is 'not modified'
+            items = ''.join(ITEM.format(i, self.path) for i in range(10))
+            body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>{time.monotonic_ns()}</title>{items}</channel></rss>'.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            LAST_FETCH['at'] = time.perf_counter()
+
+    class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+        daemon_threads = True
+
+    server = Server(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+
+def run(app, workers, feed_ids, pipelined):
+    """Check every feed once, returns the seconds until the last fetch and until the end"""
+    start = time.perf_counter()
+    if pipelined:
+        outcomes = utils.check_all_feeds(app)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(lambda feed_id: utils.run_feed_check(app, feed_id), feed_ids))
+    elapsed = time.perf_counter() - start
+    fetched = LAST_FETCH['at'] - start
+    failed = [o for o in outcomes if o['status'] != 'success']
+    if failed:
+        raise SystemExit(f"{len(failed)} checks failed, e.g. {failed[0]['message']}")
+    return fetched, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--feeds', type=int, default=40, help='Feeds to check')
+    parser.add_argument('--fetch-delay', type=float, default=0.2, help='Seconds every feed response takes')
+    parser.add_argument('--db-delay', type=float, default=0.05, help='Seconds added to every database commit')
+    parser.add_argument('--workers', type=int, default=8, help='CHECK_WORKERS, threads fetching at once')
+    args = parser.parse_args()
+
+    port = serve_feeds(args.fetch_delay)
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'bench.db'),
+            'RSSHUB_BASE_URL': f'http://127.0.0.1:{port}/',
+            'CHECK_WORKERS': args.workers,
+            'CHECK_PER_HOST_LIMIT': args.workers,
+            'RATE_LIMIT_ENABLED': False,
+            'CIRCUIT_FAILURE_THRESHOLD': 1000,
+        })
+        with app.app_context():
+            db.create_all()
+            for i in range(args.feeds):
+                db.session.add(FeedSource(name=f'feed {i}', rsshub_route=f'feed/{i}'))
+            db.session.commit()
+            feed_ids = [feed_id for (feed_id,) in db.session.query(FeedSource.id).all()]
+
+            # Every commit waits, one at a time, like a slow single-writer database would
+            write_lock = threading.Lock()
+
+            def slow_commit(conn):
+                with write_lock:
+                    time.sleep(args.db_delay)
+
+            event.listen(db.engine, 'commit', slow_commit)
+
+        print(f"{args.feeds} feeds, {args.fetch_delay * 1000:.0f} ms per fetch, "
+              f"{args.db_delay * 1000:.0f} ms per commit, {args.workers} fetch workers")
+        print(f"{'':<20} {'last fetch':>10} {'done':>8}")
+        for label, pipelined in (('checks per thread', False), ('check pipeline', True)):
+            fetched, elapsed = run(app, args.workers, feed_ids, pipelined)
+            print(f"{label:<20} {fetched:>9.2f}s {elapsed:>7.2f}s")
+
+        print()
+        print(f"{'stage':<10} {'workers':>7} {'avg ms':>8} {'max ms':>8} {'queue peak':>10} {'blocked s':>10}")
+        for stage in utils.get_check_pipeline(app).stats()['stages']:
+            print(f"{stage['stage']:<10} {stage['workers']:>7} {stage['latency_seconds_avg'] * 1000:>8.1f} "
+                  f"{stage['latency_seconds_max'] * 1000:>8.1f} {stage['queue_depth_peak']:>10} "
+                  f"{stage['blocked_seconds_total']:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
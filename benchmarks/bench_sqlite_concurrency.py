@@ -0,0 +1,125 @@
+"""
+Benchmark dashboard reads during a full check cycle on SQLite
+
+Creates a file database with --feeds feeds, then runs check_all_feeds
+against a local feed server while --readers threads keep loading the
+dashboard and the feed list, and one thread runs "Check Now" style checks
+in the request path. Runs twice: with the SQLite profile off and one check
+committed at a time (the previous behaviour), then with the profile on
+(WAL, synchronous=NORMAL, busy_timeout, mmap and cache size) and batched
+persist commits. Reports the cycle time, number of commits, failed checks
+and page latencies.
+
+Usage:
+    python benchmarks/bench_sqlite_concurrency.py [--feeds N] [--readers N] [--fetch-delay S]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+
+import utils
+from app import create_app
+from bench_pipeline import serve_feeds
+from migrations import upgrade
+from models import db, FeedSource
+from sqlite_tuning import get_sqlite_settings
+
+
+def run(mode, tuned, args, port, tmp):
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, f'{mode}.db'),
+        'RSSHUB_BASE_URL': f'http://127.0.0.1:{port}/',
+        'CHECK_WORKERS': args.workers,
+        'CHECK_PER_HOST_LIMIT': args.workers,
+        'RATE_LIMIT_ENABLED': False,
+        'CIRCUIT_FAILURE_THRESHOLD': 1000,
+        'SQLITE_TUNING': tuned,
+        'PIPELINE_PERSIST_BATCH': 16 if tuned else 1,
+    })
+    with app.app_context():
+        upgrade()
+        for i in range(args.feeds):
+            db.session.add(FeedSource(name=f'feed {i}', rsshub_route=f'feed/{i}', category=f'category {i % 5}'))
+        db.session.commit()
+        feed_ids = [feed_id for (feed_id,) in db.session.query(FeedSource.id).all()]
+        settings = get_sqlite_settings(db.engine)
+        commits = []
+        event.listen(db.engine, 'commit', lambda conn: commits.append(1))
+
+    done = threading.Event()
+    latencies = []
+    read_errors = []
+    manual = {'checks': 0, 'errors': 0}
+
+    def reader():
+        client = app.test_client()
+        while not done.is_set():
+            for url in ('/', '/feeds'):
+                start = time.perf_counter()
+                try:
+                    status = client.get(url).status_code
+                except Exception as e:
+                    read_errors.append(str(e))
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    read_errors.append(f'{url} returned {status}')
+
+    def manual_checks():
+        while not done.is_set():
+            outcome = utils.run_feed_check(app, random.choice(feed_ids))
+            manual['checks'] += 1
+            if outcome['status'] == 'error':
+                manual['errors'] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads.append(threading.Thread(target=manual_checks))
+    for thread in threads:
+        thread.start()
+
+    start = time.perf_counter()
+    outcomes = utils.check_all_feeds(app)
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in threads:
+        thread.join()
+    utils.get_check_pipeline(app).shutdown(wait=True)
+
+    failed = [o for o in outcomes if o['status'] == 'error']
+    latencies.sort()
+    print(f"{mode}: {', '.join(f'{k}={v}' for k, v in settings.items())}")
+    print(f"  cycle {elapsed:.2f}s, {len(commits)} commits, {len(failed)}/{len(outcomes)} checks failed"
+          + (f" (e.g. {failed[0]['message'][:80]})" if failed else ''))
+    print(f"  manual checks {manual['checks']}, {manual['errors']} failed")
+    if latencies:
+        print(f"  {len(latencies)} page loads: p50 {statistics.median(latencies) * 1000:.0f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms, "
+              f"{len(read_errors)} errors" + (f" (e.g. {read_errors[0][:80]})" if read_errors else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--feeds', type=int, default=200, help='Feeds to check')
+    parser.add_argument('--readers', type=int, default=4, help='Threads loading dashboard pages')
+    parser.add_argument('--fetch-delay', type=float, default=0.05, help='Seconds every feed response takes')
+    parser.add_argument('--workers', type=int, default=8, help='CHECK_WORKERS, threads fetching at once')
+    args = parser.parse_args()
+
+    port = serve_feeds(args.fetch_delay)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.feeds} feeds, {args.readers} readers, {args.fetch_delay * 1000:.0f} ms per fetch")
+        run('default', False, args, port, tmp)
+        run('tuned', True, args, port, tmp)
+
+
+if __name__ == '__main__':
+    main()
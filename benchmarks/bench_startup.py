@@ -0,0 +1,112 @@
+"""
+Benchmark worker startup: import time and resident memory of the app
+
+Every run imports app.py in a fresh interpreter, the way a gunicorn worker
+boots, and reports the import time and resident set size (RSS) afterwards.
+It also lists which heavy extractors (newspaper3k, NLTK, BeautifulSoup, ...)
+were loaded at startup, and what loading them on first use costs.
+
+Exits with status 1 if a heavy extractor is imported at startup or a
+--max-import-ms / --max-rss-mb budget is exceeded, so it can guard against
+regressions in CI.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--max-import-ms MS] [--max-rss-mb MB]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only needed by custom routes and selector tools, must not load at startup
+HEAVY_MODULES = ('newspaper', 'nltk', 'PIL', 'bs4', 'tldextract', 'lxml.html')
+
+PROBE = r"""
+import json, sys, time
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+heavy = json.loads(sys.argv[1])
+start = time.perf_counter()
+import app
+import_ms = (time.perf_counter() - start) * 1000
+rss = rss_mb()
+loaded = [name for name in heavy if name in sys.modules]
+modules = len(sys.modules)
+
+# What the first custom route check pays for the deferred imports
+start = time.perf_counter()
+import newspaper, bs4
+lazy_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    'import_ms': import_ms,
+    'rss_mb': rss,
+    'lazy_ms': lazy_ms,
+    'lazy_rss_mb': rss_mb() - rss,
+    'modules': modules,
+    'loaded': loaded,
+}))
+"""
+
+
+def measure(env):
+    """Import the app in a fresh interpreter, returns the probe's measurements"""
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps(HEAVY_MODULES)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+    parser.add_argument('--max-import-ms', type=float, default=None, help='Fail if the median import time is higher')
+    parser.add_argument('--max-rss-mb', type=float, default=None, help='Fail if the median RSS is higher')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep the benchmark away from the real database
+        env = dict(os.environ, DATABASE_URL='sqlite:///' + os.path.join(tmp, 'bench.db'))
+        results = [measure(env) for _ in range(args.runs)]
+
+    import_ms = statistics.median(r['import_ms'] for r in results)
+    rss_mb = statistics.median(r['rss_mb'] for r in results)
+    lazy_ms = statistics.median(r['lazy_ms'] for r in results)
+    lazy_rss_mb = statistics.median(r['lazy_rss_mb'] for r in results)
+    loaded = sorted({name for r in results for name in r['loaded']})
+
+    print(f"{args.runs} runs, Python {sys.version.split()[0]}, medians")
+    print(f"{'import app':<28} {import_ms:>8.0f} ms")
+    print(f"{'RSS after import':<28} {rss_mb:>8.1f} MB")
+    print(f"{'modules loaded':<28} {results[0]['modules']:>8}")
+    print(f"{'deferred extractors':<28} {lazy_ms:>8.0f} ms {lazy_rss_mb:>6.1f} MB  (paid on first custom route)")
+    print(f"{'heavy modules at startup':<28} {', '.join(loaded) or 'none'}")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: {', '.join(loaded)} imported at startup")
+        failed = True
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import time {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+        failed = True
+    if args.max_rss_mb is not None and rss_mb > args.max_rss_mb:
+        print(f"FAIL: RSS {rss_mb:.1f} MB > {args.max_rss_mb:.1f} MB")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+import logging
+from datetime import datetime, timedelta
+
+import requests
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, CircuitBreaker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# A half-open circuit lets a single probe through. A probe that never reports
+# back (e.g. the process died) frees the circuit again after this long.
+PROBE_TIMEOUT = timedelta(minutes=10)
+
+
+def feed_key(feed_id):
+    return f"feed:{feed_id}"
+
+
+def host_key(host):
+    return f"host:{host}"
+
+
+def get_backoff(open_count):
+    """
+    Get how long a circuit stays open, doubling with every consecutive opening
+
+    Args:
+        open_count: Number of consecutive openings (1 for the first)
+
+    Returns:
+        timedelta: Between CIRCUIT_BASE_DELAY and CIRCUIT_MAX_DELAY minutes
+    """
+    base = float(current_app.config.get('CIRCUIT_BASE_DELAY', 5))
+    cap = float(current_app.config.get('CIRCUIT_MAX_DELAY', 1440))
+    return timedelta(minutes=min(cap, base * 2 ** max(0, open_count - 1)))
+
+
+def is_host_failure(error):
+    """Whether an error means the upstream host is unavailable, not just the route"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    response = getattr(error, 'response', None)
+    return response is not None and (response.status_code >= 500 or response.status_code == 429)
+
+
+def is_blocking(circuit, now=None):
+    """Whether a circuit currently stops checks"""
+    now = now or datetime.utcnow()
+    if circuit.state == 'open':
+        return circuit.retry_at is not None and circuit.retry_at > now
+    if circuit.state == 'half_open':
+        return circuit.probe_started_at is not None and circuit.probe_started_at + PROBE_TIMEOUT > now
+    return False
+
+
+def get_circuits(feed_source, host):
+    """Get the existing circuits of a feed and its host, keyed by scope"""
+    keys = {feed_key(feed_source.id): 'feed'}
+    if host:
+        keys[host_key(host)] = 'host'
+    return {
+        keys[circuit.key]: circuit
+        for circuit in CircuitBreaker.query.filter(CircuitBreaker.key.in_(list(keys))).all()
+    }
+
+
+def get_or_create_circuit(feed_source, host, scope):
+    """Get a circuit, adding a closed one if it does not exist yet (not committed)"""
+    key = feed_key(feed_source.id) if scope == 'feed' else host_key(host)
+    circuit = CircuitBreaker.query.filter_by(key=key).first()
+    if circuit is not None:
+        return circuit
+
+    try:
+        with db.session.begin_nested():
+            circuit = CircuitBreaker(
+                key=key,
+                scope=scope,
+                feed_source_id=feed_source.id if scope == 'feed' else None,
+                host=host,
+                state='closed',
+                failure_count=0,
+                open_count=0
+            )
+            db.session.add(circuit)
+    except IntegrityError:
+        # Another check of the same host created it first
+        circuit = CircuitBreaker.query.filter_by(key=key).one()
+    return circuit
+
+
+def get_blocking_circuit(feed_source, host, now=None):
+    """
+    Get the circuit that stops checks of a feed right now, if any
+
+    Args:
+        feed_source: FeedSource object
+        host: Upstream host of the feed
+
+    Returns:
+        CircuitBreaker: Open (or probing) feed or host circuit, or None
+    """
+    now = now or datetime.utcnow()
+    for circuit in get_circuits(feed_source, host).values():
+        if is_blocking(circuit, now):
+            return circuit
+    return None
+
+
+def begin_attempt(feed_source, host):
+    """
+    Move the open circuits of a feed to half-open before a check (not committed)
+
+    Returns:
+        bool: True if the check is a probe of a tripped circuit
+    """
+    now = datetime.utcnow()
+    probe = False
+    for circuit in get_circuits(feed_source, host).values():
+        if circuit.state != 'closed':
+            circuit.state = 'half_open'
+            circuit.probe_started_at = now
+            probe = True
+    return probe
+
+
+def close_circuit(circuit):
+    """Reset a circuit to closed (not committed)"""
+    circuit.state = 'closed'
+    circuit.failure_count = 0
+    circuit.open_count = 0
+    circuit.opened_at = None
+    circuit.retry_at = None
+    circuit.probe_started_at = None
+
+
+def record_success(feed_source, host):
+    """
+    Close the circuits of a feed after a successful check (not committed)
+
+    Returns:
+        list: Circuits that were open or half-open before
+    """
+    recovered = []
+    for circuit in get_circuits(feed_source, host).values():
+        if circuit.state != 'closed':
+            recovered.append(circuit)
+            logger.info(f"Circuit {circuit.key} closed")
+        if circuit.state != 'closed' or circuit.failure_count:
+            close_circuit(circuit)
+    return recovered
+
+
+def record_failure(feed_source, host, error_message, host_failure=False):
+    """
+    Count a failed check against the feed's circuit, and the host's if the host failed (not committed)
+
+    A closed circuit opens after CIRCUIT_FAILURE_THRESHOLD (feeds) or
+    CIRCUIT_HOST_FAILURE_THRESHOLD (hosts) consecutive failures. A failed
+    probe re-opens it for twice as long as before.
+
+    Args:
+        feed_source: FeedSource object
+        host: Upstream host of the feed
+        error_message: Error of the failed check
+        host_failure: Whether the host itself failed (see is_host_failure)
+
+    Returns:
+        list: Circuits that opened because of this failure
+    """
+    now = datetime.utcnow()
+    thresholds = {
+        'feed': int(current_app.config.get('CIRCUIT_FAILURE_THRESHOLD', 3)),
+        'host': int(current_app.config.get('CIRCUIT_HOST_FAILURE_THRESHOLD', 5)),
+    }
+
+    scopes = ['feed']
+    if host and host_failure:
+        scopes.append('host')
+    elif host:
+        # The host answered, so it is up even if this route is broken
+        host_circuit = get_circuits(feed_source, host).get('host')
+        if host_circuit is not None and (host_circuit.state != 'closed' or host_circuit.failure_count):
+            close_circuit(host_circuit)
+
+    opened = []
+    for scope in scopes:
+        circuit = get_or_create_circuit(feed_source, host, scope)
+        circuit.failure_count = (circuit.failure_count or 0) + 1
+        circuit.last_error = error_message
+
+        if circuit.state != 'closed' or circuit.failure_count >= thresholds[scope]:
+            circuit.open_count = (circuit.open_count or 0) + 1
+            circuit.state = 'open'
+            circuit.opened_at = now
+            circuit.retry_at = now + get_backoff(circuit.open_count)
+            circuit.probe_started_at = None
+            opened.append(circuit)
+            logger.warning(
+                f"Circuit {circuit.key} opened after {circuit.failure_count} failures, "
+                f"next attempt at {circuit.retry_at:%Y-%m-%d %H:%M:%S}"
+            )
+
+    return opened
+
+
+def reset_feed_circuit(feed_source):
+    """Forget the circuit of a feed, e.g. after its route was edited (not committed)"""
+    CircuitBreaker.query.filter_by(key=feed_key(feed_source.id)).delete(synchronize_session=False)
+
+
+def get_circuit_blocks():
+    """
+    Get until when every tripped circuit holds back checks
+
+    Times in the past mean the circuit lets a probe through.
+
+    Returns:
+        tuple: (feed_id -> datetime, host -> datetime)
+    """
+    feed_blocks = {}
+    host_blocks = {}
+    for circuit in CircuitBreaker.query.filter(CircuitBreaker.state != 'closed').all():
+        if circuit.state == 'open':
+            until = circuit.retry_at
+        else:
+            until = circuit.probe_started_at + PROBE_TIMEOUT if circuit.probe_started_at else None
+        if until is None:
+            continue
+        if circuit.scope == 'feed':
+            feed_blocks[circuit.feed_source_id] = until
+        else:
+            host_blocks[circuit.host] = until
+    return feed_blocks, host_blocks
+
+
+def get_feed_circuits(feed_hosts):
+    """
+    Get the tripped circuit to show for each feed
+
+    Args:
+        feed_hosts: Dict of feed_id -> upstream host
+
+    Returns:
+        dict: feed_id -> CircuitBreaker (the feed's own, else its host's) for feeds with a tripped circuit
+    """
+    circuits = {
+        (circuit.scope, circuit.feed_source_id if circuit.scope == 'feed' else circuit.host): circuit
+        for circuit in CircuitBreaker.query.filter(CircuitBreaker.state != 'closed').all()
+    }
+    if not circuits:
+        return {}
+
+    result = {}
+    for feed_id, host in feed_hosts.items():
+        circuit = circuits.get(('feed', feed_id)) or circuits.get(('host', host))
+        if circuit is not None:
+            result[feed_id] = circuit
+    return result
@@ -8,6 +8,63 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     RSSHUB_BASE_URL = os.environ.get('RSSHUB_BASE_URL') or 'http://localhost:1200'
     CHECK_INTERVAL = int(os.environ.get('CHECK_INTERVAL') or 30)
+    CHECK_WORKERS = int(os.environ.get('CHECK_WORKERS') or 8)
+    CHECK_PER_HOST_LIMIT = int(os.environ.get('CHECK_PER_HOST_LIMIT') or 4)
+    PIPELINE_PARSE_WORKERS = int(os.environ.get('PIPELINE_PARSE_WORKERS') or 2)
+    PIPELINE_ENRICH_WORKERS = int(os.environ.get('PIPELINE_ENRICH_WORKERS') or 4)
+    PIPELINE_PERSIST_WORKERS = int(os.environ.get('PIPELINE_PERSIST_WORKERS') or 1)
+    PIPELINE_PERSIST_BATCH = int(os.environ.get('PIPELINE_PERSIST_BATCH') or 16)
+    PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE') or 16)
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE') or 20)
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get('HTTP_CONNECT_TIMEOUT') or 5)
+    HTTP_READ_TIMEOUT = float(os.environ.get('HTTP_READ_TIMEOUT') or 30)
+    HTTP_MAX_RETRIES = int(os.environ.get('HTTP_MAX_RETRIES') or 2)
+    SCHEDULER_TICK_SECONDS = int(os.environ.get('SCHEDULER_TICK_SECONDS') or 15)
+    ADAPTIVE_POLLING = (os.environ.get('ADAPTIVE_POLLING') or 'false').lower() in ('1', 'true', 'yes')
+    ADAPTIVE_MIN_INTERVAL = int(os.environ.get('ADAPTIVE_MIN_INTERVAL') or 5)
+    ADAPTIVE_MAX_INTERVAL = int(os.environ.get('ADAPTIVE_MAX_INTERVAL') or 1440)
+    INCREMENTAL_INGEST = (os.environ.get('INCREMENTAL_INGEST') or 'true').lower() in ('1', 'true', 'yes')
+    SELECTOR_FETCH_WORKERS = int(os.environ.get('SELECTOR_FETCH_WORKERS') or 4)
+    SELECTOR_CACHE_TTL = int(os.environ.get('SELECTOR_CACHE_TTL') or 1440)
+    SELECTOR_CACHE_MAX_BYTES = int(os.environ.get('SELECTOR_CACHE_MAX_BYTES') or 50 * 1024 * 1024)
+    ARTICLE_CACHE_MAX_ENTRIES = int(os.environ.get('ARTICLE_CACHE_MAX_ENTRIES') or 5000)
+    PARSE_POOL_SIZE = int(os.environ.get('PARSE_POOL_SIZE') or 0)
+    FEED_MAX_BYTES = int(os.environ.get('FEED_MAX_BYTES') or 10 * 1024 * 1024)
+    FEED_MAX_ITEMS = int(os.environ.get('FEED_MAX_ITEMS') or 500)
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD') or 3)
+    CIRCUIT_HOST_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_HOST_FAILURE_THRESHOLD') or 5)
+    CIRCUIT_BASE_DELAY = int(os.environ.get('CIRCUIT_BASE_DELAY') or 5)
+    CIRCUIT_MAX_DELAY = int(os.environ.get('CIRCUIT_MAX_DELAY') or 1440)
+    RATE_LIMIT_ENABLED = (os.environ.get('RATE_LIMIT_ENABLED') or 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMIT_RSSHUB_RATE = float(os.environ.get('RATE_LIMIT_RSSHUB_RATE') or 2)
+    RATE_LIMIT_RSSHUB_BURST = int(os.environ.get('RATE_LIMIT_RSSHUB_BURST') or 5)
+    RATE_LIMIT_HOST_RATE = float(os.environ.get('RATE_LIMIT_HOST_RATE') or 1)
+    RATE_LIMIT_HOST_BURST = int(os.environ.get('RATE_LIMIT_HOST_BURST') or 3)
+    RATE_LIMIT_OVERRIDES = os.environ.get('RATE_LIMIT_OVERRIDES') or ''
+    CHECK_MODE = os.environ.get('CHECK_MODE') or 'inline'
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS') or 300)
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 3)
+    JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS') or 5)
+    JOB_RETENTION_HOURS = int(os.environ.get('JOB_RETENTION_HOURS') or 24)
+    LEADER_LEASE_SECONDS = int(os.environ.get('LEADER_LEASE_SECONDS') or 30)
+    ROUTE_VALIDATION_WORKERS = int(os.environ.get('ROUTE_VALIDATION_WORKERS') or 8)
+    ROUTE_VALIDATION_CACHE_SECONDS = int(os.environ.get('ROUTE_VALIDATION_CACHE_SECONDS') or 300)
+    ROUTE_VALIDATION_MAX_ROUTES = int(os.environ.get('ROUTE_VALIDATION_MAX_ROUTES') or 500)
+    FETCH_LOG_RETENTION_DAYS = int(os.environ.get('FETCH_LOG_RETENTION_DAYS') or 14)
+    HOURLY_ROLLUP_RETENTION_DAYS = int(os.environ.get('HOURLY_ROLLUP_RETENTION_DAYS') or 90)
+    ROLLUP_INTERVAL_MINUTES = int(os.environ.get('ROLLUP_INTERVAL_MINUTES') or 15)
+    ITEM_ARCHIVE_ENABLED = (os.environ.get('ITEM_ARCHIVE_ENABLED') or 'false').lower() in ('1', 'true', 'yes')
+    ITEM_ARCHIVE_DIR = os.environ.get('ITEM_ARCHIVE_DIR') or ''
+    ITEM_ARCHIVE_KEEP_ITEMS = int(os.environ.get('ITEM_ARCHIVE_KEEP_ITEMS') or 200)
+    ITEM_ARCHIVE_KEEP_DAYS = int(os.environ.get('ITEM_ARCHIVE_KEEP_DAYS') or 30)
+    ITEM_ARCHIVE_SEGMENT_MB = int(os.environ.get('ITEM_ARCHIVE_SEGMENT_MB') or 64)
+    ITEM_ARCHIVE_INTERVAL_MINUTES = int(os.environ.get('ITEM_ARCHIVE_INTERVAL_MINUTES') or 60)
+    SQLITE_TUNING = (os.environ.get('SQLITE_TUNING') or 'true').lower() in ('1', 'true', 'yes')
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get('SQLITE_CACHE_SIZE_KB') or 64 * 1024)
     LOG_LEVEL = os.environ.get('LOG_LEVEL') or 'INFO'
 
 class DevelopmentConfig(Config):
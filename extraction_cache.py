@@ -0,0 +1,203 @@
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from models import db, SelectorCache, ArticleCache
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def selector_cache_key(selectors):
+    """Stable key for a custom selector set"""
+    return hashlib.sha1(json.dumps(selectors, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def get_cached_selector_content(urls, selectors):
+    """
+    Look up fresh selector extractions for a set of URLs
+
+    Args:
+        urls: Iterable of article URLs
+        selectors: Dictionary of CSS selectors
+
+    Returns:
+        dict: URL -> extracted content for every cache hit within SELECTOR_CACHE_TTL
+    """
+    urls = list(urls)
+    if not urls:
+        return {}
+
+    ttl = timedelta(minutes=current_app.config.get('SELECTOR_CACHE_TTL', 1440))
+    rows = SelectorCache.query.filter(
+        SelectorCache.selector_key == selector_cache_key(selectors),
+        SelectorCache.url.in_(urls),
+        SelectorCache.fetched_at >= datetime.utcnow() - ttl
+    ).all()
+
+    return {row.url: row.content or '' for row in rows}
+
+
+def store_selector_content(results, selectors):
+    """
+    Store selector extractions in the cache and evict old entries (not committed)
+
+    Args:
+        results: dict of URL -> extracted content ('' when nothing matched)
+        selectors: Dictionary of CSS selectors
+    """
+    if not results:
+        return
+
+    key = selector_cache_key(selectors)
+    now = datetime.utcnow()
+
+    # A savepoint keeps a concurrent insert of the same entry from failing the caller's transaction
+    try:
+        with db.session.begin_nested():
+            existing = {
+                row.url: row for row in SelectorCache.query.filter(
+                    SelectorCache.selector_key == key,
+                    SelectorCache.url.in_(list(results))
+                ).all()
+            }
+
+            for url, content in results.items():
+                row = existing.get(url)
+                if row is None:
+                    row = SelectorCache(url=url, selector_key=key)
+                    db.session.add(row)
+                row.content = content
+                row.size = len(content.encode('utf-8')) if content else 0
+                row.fetched_at = now
+    except IntegrityError:
+        logger.warning("Selector cache entries were stored concurrently, skipping")
+        return
+
+    evict_selector_cache()
+
+
+def evict_selector_cache():
+    """Drop expired entries, then the oldest ones until the cache fits SELECTOR_CACHE_MAX_BYTES (not committed)"""
+    ttl = timedelta(minutes=current_app.config.get('SELECTOR_CACHE_TTL', 1440))
+    max_bytes = current_app.config.get('SELECTOR_CACHE_MAX_BYTES', 50 * 1024 * 1024)
+
+    SelectorCache.query.filter(
+        SelectorCache.fetched_at < datetime.utcnow() - ttl
+    ).delete(synchronize_session=False)
+
+    total = db.session.query(db.func.coalesce(db.func.sum(SelectorCache.size), 0)).scalar()
+    if total <= max_bytes:
+        return
+
+    # Walk from the oldest entry and collect ids until enough bytes are freed
+    excess = total - max_bytes
+    evict_ids = []
+    for row_id, size in db.session.query(SelectorCache.id, SelectorCache.size).order_by(SelectorCache.fetched_at).yield_per(500):
+        if excess <= 0:
+            break
+        evict_ids.append(row_id)
+        excess -= size or 0
+
+    for start in range(0, len(evict_ids), 500):
+        SelectorCache.query.filter(
+            SelectorCache.id.in_(evict_ids[start:start + 500])
+        ).delete(synchronize_session=False)
+    logger.info(f"Evicted {len(evict_ids)} selector cache entries to stay under {max_bytes} bytes")
+
+
+def get_cached_articles(urls):
+    """
+    Look up extracted articles and mark them as recently used (not committed)
+
+    Args:
+        urls: Iterable of article URLs
+
+    Returns:
+        dict: URL -> article record dict for every cache hit
+    """
+    urls = list(urls)
+    if not urls:
+        return {}
+
+    rows = ArticleCache.query.filter(ArticleCache.url.in_(urls)).all()
+    if rows:
+        ArticleCache.query.filter(
+            ArticleCache.id.in_([row.id for row in rows])
+        ).update({ArticleCache.last_accessed_at: datetime.utcnow()}, synchronize_session=False)
+
+    return {
+        row.url: {
+            'url': row.url,
+            'title': row.title,
+            'text': row.text or '',
+            'html': row.html or '',
+            'authors': json.loads(row.authors) if row.authors else [],
+            'publish_date': row.publish_date,
+            'top_image': row.top_image,
+            'meta_description': row.meta_description,
+        }
+        for row in rows
+    }
+
+
+def store_articles(records):
+    """
+    Store extracted article records and evict least recently used ones (not committed)
+
+    Args:
+        records: List of article record dicts as returned by get_cached_articles
+    """
+    if not records:
+        return
+
+    now = datetime.utcnow()
+    try:
+        with db.session.begin_nested():
+            existing = {
+                row.url: row for row in ArticleCache.query.filter(
+                    ArticleCache.url.in_([record['url'] for record in records])
+                ).all()
+            }
+
+            for record in records:
+                row = existing.get(record['url'])
+                if row is None:
+                    row = ArticleCache(url=record['url'], created_at=now)
+                    db.session.add(row)
+                    existing[record['url']] = row
+                row.title = record.get('title')
+                row.text = record.get('text')
+                row.html = record.get('html')
+                row.authors = json.dumps(record.get('authors') or [])
+                row.publish_date = record.get('publish_date')
+                row.top_image = record.get('top_image')
+                row.meta_description = record.get('meta_description')
+                row.last_accessed_at = now
+    except IntegrityError:
+        logger.warning("Article cache entries were stored concurrently, skipping")
+        return
+
+    evict_article_cache()
+
+
+def evict_article_cache():
+    """Drop the least recently used articles beyond ARTICLE_CACHE_MAX_ENTRIES (not committed)"""
+    max_entries = current_app.config.get('ARTICLE_CACHE_MAX_ENTRIES', 5000)
+
+    stale_ids = [
+        row_id for (row_id,) in db.session.query(ArticleCache.id).order_by(
+            ArticleCache.last_accessed_at.desc()
+        ).offset(max_entries).all()
+    ]
+
+    for start in range(0, len(stale_ids), 500):
+        ArticleCache.query.filter(
+            ArticleCache.id.in_(stale_ids[start:start + 500])
+        ).delete(synchronize_session=False)
+    if stale_ids:
+        logger.info(f"Evicted {len(stale_ids)} cached articles to stay under {max_entries} entries")
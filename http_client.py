@@ -0,0 +1,222 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app, has_app_context
+
+from rate_limiter import acquire, defer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults used when no app config is available (e.g. outside an app context)
+DEFAULT_SETTINGS = {
+    'HTTP_POOL_CONNECTIONS': 10,   # Number of hosts to keep pools for
+    'HTTP_POOL_MAXSIZE': 20,       # Keep-alive connections per host
+    'HTTP_CONNECT_TIMEOUT': 5,     # Seconds
+    'HTTP_READ_TIMEOUT': 30,       # Seconds
+    'HTTP_MAX_RETRIES': 2,
+    'HTTP_BACKOFF_BASE': 0.5,      # Seconds, doubled on every retry
+    'HTTP_BACKOFF_MAX': 30,        # Seconds, also the longest Retry-After we honor
+}
+
+# Responses worth retrying, everything else is returned to the caller
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_key = None
+_session_lock = threading.Lock()
+
+
+def get_setting(key):
+    """Read an HTTP setting from the app config, falling back to the defaults"""
+    if has_app_context():
+        value = current_app.config.get(key)
+        if value is not None:
+            return value
+    return DEFAULT_SETTINGS[key]
+
+
+def get_session():
+    """
+    Get the process-wide pooled HTTP session
+
+    The session is shared by all threads. Connection pools are sized from
+    the config and the session is rebuilt if the pool settings change.
+
+    Returns:
+        requests.Session: Shared session
+    """
+    global _session, _session_key
+
+    key = (int(get_setting('HTTP_POOL_CONNECTIONS')), int(get_setting('HTTP_POOL_MAXSIZE')))
+    if _session is not None and _session_key == key:
+        return _session
+
+    with _session_lock:
+        if _session is None or _session_key != key:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=key[0], pool_maxsize=key[1])
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+            if _session is not None:
+                _session.close()
+            _session, _session_key = session, key
+
+    return _session
+
+
+def reset_session():
+    """Close the shared session and its pooled connections"""
+    global _session, _session_key
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session, _session_key = None, None
+
+
+def get_timeout(read_timeout=None):
+    """Get a (connect, read) timeout tuple from the config"""
+    return (
+        float(get_setting('HTTP_CONNECT_TIMEOUT')),
+        float(read_timeout if read_timeout is not None else get_setting('HTTP_READ_TIMEOUT'))
+    )
+
+
+def parse_retry_after(response):
+    """
+    Parse the Retry-After header of a response
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid
+    """
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    base = float(get_setting('HTTP_BACKOFF_BASE'))
+    cap = float(get_setting('HTTP_BACKOFF_MAX'))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def http_get(url, max_retries=None, read_timeout=None, **kwargs):
+    """
+    GET a URL through the shared session with backoff retries
+
+    Every attempt first waits for the per-host rate limit (see
+    rate_limiter). Connection errors, timeouts and retryable status codes
+    (429, 5xx) are retried with exponential backoff and jitter. A
+    Retry-After header is honored as the minimum delay, and also holds back
+    other requests to the same host; if it asks for longer than
+    HTTP_BACKOFF_MAX the response is returned as-is instead of waiting.
+
+    Args:
+        url: URL to fetch
+        max_retries: Number of retries (defaults to HTTP_MAX_RETRIES)
+        read_timeout: Read timeout override in seconds
+        **kwargs: Passed through to requests (headers, stream, ...)
+
+    Returns:
+        requests.Response: The last response, callers should raise_for_status()
+
+    Raises:
+        requests.exceptions.RequestException: If every attempt failed to connect
+    """
+    if max_retries is None:
+        max_retries = int(get_setting('HTTP_MAX_RETRIES'))
+    kwargs.setdefault('timeout', get_timeout(read_timeout))
+    session = get_session()
+
+    attempt = 0
+    while True:
+        acquire(url)
+        try:
+            response = session.get(url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt)
+            reason = str(e)
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= max_retries:
+                return response
+
+            delay = backoff_delay(attempt)
+            retry_after = parse_retry_after(response)
+            if retry_after is not None:
+                defer(url, retry_after)
+                if retry_after > float(get_setting('HTTP_BACKOFF_MAX')):
+                    return response
+                delay = max(delay, retry_after)
+            reason = f"HTTP {response.status_code}"
+            response.close()
+
+        attempt += 1
+        logger.warning(f"Retry {attempt}/{max_retries} for {url} in {delay:.1f}s: {reason}")
+        time.sleep(delay)
+
+
+def read_body(response, max_bytes=None, stop=None, chunk_size=64 * 1024):
+    """
+    Read a streamed response body (http_get(..., stream=True)) with a size cap
+
+    The body is read in chunks and reading stops once max_bytes have been
+    received, so a runaway response never takes more than max_bytes of
+    memory. The response is closed afterwards.
+
+    Args:
+        response: Streamed requests.Response
+        max_bytes: Maximum body size, None for no limit
+        stop: Optional callable given every chunk, reading ends early once it returns True
+        chunk_size: Bytes per read
+
+    Returns:
+        tuple: (body bytes, whether the body was cut off at max_bytes)
+    """
+    chunks = []
+    size = 0
+    truncated = False
+
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if max_bytes is not None and size + len(chunk) > max_bytes:
+                chunks.append(chunk[:max_bytes - size])
+                truncated = True
+                break
+            chunks.append(chunk)
+            size += len(chunk)
+            if stop is not None and stop(chunk):
+                break
+    finally:
+        response.close()
+
+    if truncated:
+        logger.warning(f"Response from {response.url} exceeds {max_bytes} bytes, truncated")
+    return b''.join(chunks), truncated
+
+
+def decode_body(response, body):
+    """Decode a body read with read_body using the response charset, like response.text"""
+    return body.decode(response.encoding or 'utf-8', errors='replace')
@@ -0,0 +1,267 @@
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from flask import current_app
+
+from models import db, FeedSource, FeedItem
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Items compressed together into one block of a segment file
+BLOCK_ITEMS = 500
+
+# Index entry of a block: oldest and newest item time (UTC timestamps),
+# segment number, byte offset and length in the segment, item count
+INDEX_ENTRY = struct.Struct('<ddIQII')
+
+INDEX_FILE = 'index.idx'
+
+# FeedItem columns stored in the archive
+ITEM_FIELDS = (
+    'id', 'title', 'link', 'guid', 'description', 'content', 'author', 'image_url',
+    'published_at', 'fetched_at', 'has_full_content', 'word_count', 'quality_issues', 'extraction_metadata'
+)
+
+_write_lock = threading.Lock()
+
+
+def get_archive_dir(feed_source_id):
+    """Directory holding the segment files and index of a feed"""
+    root = current_app.config.get('ITEM_ARCHIVE_DIR') or os.path.join(current_app.instance_path, 'item_archive')
+    return os.path.join(root, str(feed_source_id))
+
+
+def item_time(published_at, fetched_at):
+    """Time an item is archived and looked up by: its publish date, or when it was fetched"""
+    return published_at or fetched_at or datetime.utcnow()
+
+
+def to_timestamp(moment):
+    # Item dates are stored as naive UTC
+    return moment.replace(tzinfo=timezone.utc).timestamp()
+
+
+def item_to_record(item):
+    record = {}
+    for field in ITEM_FIELDS:
+        value = getattr(item, field)
+        record[field] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+def read_index(archive_dir, start=None, end=None):
+    """
+    Find the blocks holding items from a time range
+
+    The index is memory-mapped and scanned in place, entries are read only
+    up to the last complete one, so an interrupted append is ignored.
+
+    Args:
+        archive_dir: Archive directory of a feed
+        start: Earliest item time (datetime), None for no bound
+        end: Latest item time (datetime), None for no bound
+
+    Returns:
+        list: (oldest, newest, segment, offset, length, count) tuples in append order
+    """
+    path = os.path.join(archive_dir, INDEX_FILE)
+    try:
+        index_file = open(path, 'rb')
+    except FileNotFoundError:
+        return []
+
+    start_ts = to_timestamp(start) if start else float('-inf')
+    end_ts = to_timestamp(end) if end else float('inf')
+    entries = []
+    with index_file:
+        size = os.fstat(index_file.fileno()).st_size
+        size -= size % INDEX_ENTRY.size
+        if not size:
+            return []
+        with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+            for offset in range(0, size, INDEX_ENTRY.size):
+                entry = INDEX_ENTRY.unpack_from(index, offset)
+                if entry[1] >= start_ts and entry[0] <= end_ts:
+                    entries.append(entry)
+    return entries
+
+
+def segment_path(archive_dir, segment):
+    return os.path.join(archive_dir, f'{segment:06d}.seg')
+
+
+def read_block(archive_dir, segment, offset, length):
+    """Decompress the item records of one block"""
+    with open(segment_path(archive_dir, segment), 'rb') as segment_file:
+        segment_file.seek(offset)
+        return json.loads(zlib.decompress(segment_file.read(length)))
+
+
+def append_block(archive_dir, records, times):
+    """
+    Append a compressed block of item records and its index entry
+
+    Both files are synced before returning, so the items can be deleted
+    from the database afterwards.
+    """
+    segment_max_bytes = int(current_app.config.get('ITEM_ARCHIVE_SEGMENT_MB', 64)) * 1024 * 1024
+    data = zlib.compress(json.dumps(records, separators=(',', ':')).encode('utf-8'))
+
+    with _write_lock:
+        os.makedirs(archive_dir, exist_ok=True)
+        entries = read_index(archive_dir)
+        segment = entries[-1][2] if entries else 0
+        if os.path.exists(segment_path(archive_dir, segment)) and \
+                os.path.getsize(segment_path(archive_dir, segment)) >= segment_max_bytes:
+            segment += 1
+
+        with open(segment_path(archive_dir, segment), 'ab') as segment_file:
+            offset = segment_file.tell()
+            segment_file.write(data)
+            segment_file.flush()
+            os.fsync(segment_file.fileno())
+
+        with open(os.path.join(archive_dir, INDEX_FILE), 'ab') as index_file:
+            # Drop the tail of an entry left by an interrupted append
+            index_file.truncate(index_file.tell() - index_file.tell() % INDEX_ENTRY.size)
+            index_file.write(INDEX_ENTRY.pack(
+                to_timestamp(min(times)), to_timestamp(max(times)), segment, offset, len(data), len(records)
+            ))
+            index_file.flush()
+            os.fsync(index_file.fileno())
+
+
+def select_items_to_archive(feed_source, now=None):
+    """
+    Pick the items of a feed that leave the FeedItem table
+
+    A feed keeps its newest ITEM_ARCHIVE_KEEP_ITEMS items, and at least as
+    many as its last fetch returned, so items still in the upstream feed are
+    not ingested again as new. Of the others, items older than
+    ITEM_ARCHIVE_KEEP_DAYS are archived.
+
+    Returns:
+        list: FeedItem IDs, oldest first
+    """
+    now = now or datetime.utcnow()
+    keep_items = int(current_app.config.get('ITEM_ARCHIVE_KEEP_ITEMS', 200))
+    if feed_source.fetch_state is not None:
+        keep_items = max(keep_items, feed_source.fetch_state.item_count or 0)
+    cutoff = now - timedelta(days=int(current_app.config.get('ITEM_ARCHIVE_KEEP_DAYS', 30)))
+
+    rows = db.session.query(FeedItem.id, FeedItem.published_at, FeedItem.fetched_at).filter(
+        FeedItem.feed_source_id == feed_source.id
+    ).all()
+    if len(rows) <= keep_items:
+        return []
+
+    rows.sort(key=lambda row: item_time(row[1], row[2]), reverse=True)
+    return [item_id for item_id, published_at, fetched_at in reversed(rows[keep_items:])
+            if item_time(published_at, fetched_at) < cutoff]
+
+
+def archive_feed_items(feed_source, now=None):
+    """
+    Move a feed's old items from the FeedItem table into its archive (committed)
+
+    Items are deleted from the database only after their block has been
+    written. Should the commit fail after that, the block stays and the
+    items are archived again on the next run; reads drop the duplicates.
+
+    Returns:
+        int: Number of items archived
+    """
+    item_ids = select_items_to_archive(feed_source, now)
+    archive_dir = get_archive_dir(feed_source.id)
+
+    for i in range(0, len(item_ids), BLOCK_ITEMS):
+        items = FeedItem.query.filter(FeedItem.id.in_(item_ids[i:i + BLOCK_ITEMS])).all()
+        if not items:
+            continue
+        append_block(
+            archive_dir,
+            [item_to_record(item) for item in items],
+            [item_time(item.published_at, item.fetched_at) for item in items]
+        )
+        FeedItem.query.filter(FeedItem.id.in_([item.id for item in items])).delete(synchronize_session=False)
+        db.session.commit()
+
+    return len(item_ids)
+
+
+def archive_old_items(app):
+    """Archive the old items of every feed (scheduled every ITEM_ARCHIVE_INTERVAL_MINUTES)"""
+    total = 0
+    with app.app_context():
+        if not app.config.get('ITEM_ARCHIVE_ENABLED'):
+            return 0
+        for (feed_id,) in db.session.query(FeedSource.id).all():
+            try:
+                total += archive_feed_items(db.session.get(FeedSource, feed_id))
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error archiving items of feed {feed_id}: {str(e)}")
+    if total:
+        logger.info(f"Archived {total} feed items")
+    return total
+
+
+def get_archived_items(feed_source_id, start=None, end=None, limit=None):
+    """
+    Read archived items of a feed, newest first
+
+    Only the blocks whose time range overlaps [start, end] are read.
+
+    Args:
+        feed_source_id: Feed ID
+        start: Earliest item time (datetime), None for no bound
+        end: Latest item time (datetime), None for no bound
+        limit: Most items returned, None for all
+
+    Returns:
+        list: Item dicts with FeedItem fields, dates as ISO 8601 strings
+    """
+    archive_dir = get_archive_dir(feed_source_id)
+    items = {}
+    for _, _, segment, offset, length, _ in read_index(archive_dir, start, end):
+        for record in read_block(archive_dir, segment, offset, length):
+            moment = item_time(
+                datetime.fromisoformat(record['published_at']) if record['published_at'] else None,
+                datetime.fromisoformat(record['fetched_at']) if record['fetched_at'] else None
+            )
+            if (start is None or moment >= start) and (end is None or moment <= end):
+                items[record['id']] = (moment, record)
+
+    ordered = [record for _, record in sorted(items.values(), key=lambda entry: entry[0], reverse=True)]
+    return ordered[:limit] if limit else ordered
+
+
+def get_archive_stats(feed_source_id):
+    """
+    Get the size of a feed's archive from its index
+
+    Returns:
+        dict: items, blocks, bytes (compressed), oldest and newest item time
+    """
+    entries = read_index(get_archive_dir(feed_source_id))
+    return {
+        'items': sum(entry[5] for entry in entries),
+        'blocks': len(entries),
+        'bytes': sum(entry[4] for entry in entries),
+        'oldest': datetime.utcfromtimestamp(min(entry[0] for entry in entries)).isoformat() if entries else None,
+        'newest': datetime.utcfromtimestamp(max(entry[1] for entry in entries)).isoformat() if entries else None,
+    }
+
+
+def delete_feed_archive(feed_source_id):
+    """Remove the archive of a deleted feed"""
+    with _write_lock:
+        shutil.rmtree(get_archive_dir(feed_source_id), ignore_errors=True)
@@ -0,0 +1,245 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+
+from models import db, FetchJob
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Jobs that still need a worker
+ACTIVE_STATUSES = ('queued', 'running')
+
+# Priorities, manual checks are claimed before scheduled ones
+PRIORITY_SCHEDULED = 0
+PRIORITY_MANUAL = 10
+
+
+def use_job_queue(app=None):
+    """Whether feed checks are handed to worker processes instead of run in-process"""
+    app = app or current_app
+    return app.config.get('CHECK_MODE', 'inline') == 'queue'
+
+
+def get_lease_duration():
+    """Get how long a claimed job stays leased without a heartbeat"""
+    return timedelta(seconds=int(current_app.config.get('JOB_LEASE_SECONDS', 300)))
+
+
+def enqueue_checks(feed_ids, source='scheduler', priority=PRIORITY_SCHEDULED):
+    """
+    Queue checks for feeds that do not have a queued or running job yet
+
+    Args:
+        feed_ids: IDs of the feeds to check
+        source: What asked for the checks (scheduler, manual, api)
+        priority: Higher priorities are claimed first
+
+    Returns:
+        list: IDs of the feeds that were queued, feeds with an active job are skipped
+    """
+    feed_ids = list(dict.fromkeys(feed_ids))
+    if not feed_ids:
+        return []
+
+    active = {
+        feed_id for (feed_id,) in db.session.query(FetchJob.feed_source_id).filter(
+            FetchJob.feed_source_id.in_(feed_ids),
+            FetchJob.status.in_(ACTIVE_STATUSES)
+        ).all()
+    }
+    # A manual check moves an already queued job to the front
+    if active and priority > PRIORITY_SCHEDULED:
+        FetchJob.query.filter(
+            FetchJob.feed_source_id.in_(active),
+            FetchJob.status == 'queued',
+            FetchJob.priority < priority
+        ).update({FetchJob.priority: priority}, synchronize_session=False)
+
+    queued = [feed_id for feed_id in feed_ids if feed_id not in active]
+    now = datetime.utcnow()
+    for feed_id in queued:
+        db.session.add(FetchJob(
+            feed_source_id=feed_id,
+            status='queued',
+            priority=priority,
+            source=source,
+            attempts=0,
+            enqueued_at=now
+        ))
+    db.session.commit()
+    return queued
+
+
+def claimable_filter(now, max_attempts):
+    """Jobs that are queued, or whose worker lost its lease"""
+    return or_(
+        FetchJob.status == 'queued',
+        and_(
+            FetchJob.status == 'running',
+            FetchJob.lease_expires_at < now,
+            FetchJob.attempts < max_attempts
+        )
+    )
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Lease up to `limit` jobs for a worker
+
+    On PostgreSQL the rows are locked with FOR UPDATE SKIP LOCKED, so
+    concurrent workers pass over each other's rows instead of waiting. On
+    SQLite, which serializes writers, a single UPDATE stamps the rows with a
+    fresh lease token and the claimed jobs are read back by that token.
+
+    Args:
+        worker_id: Identifier of the claiming worker
+        limit: Maximum number of jobs
+
+    Returns:
+        list: Claimed FetchJob objects, with lease_token set
+    """
+    if limit <= 0:
+        return []
+
+    now = datetime.utcnow()
+    lease_expires_at = now + get_lease_duration()
+    max_attempts = int(current_app.config.get('JOB_MAX_ATTEMPTS', 3))
+    token = uuid.uuid4().hex
+    claimable = claimable_filter(now, max_attempts)
+    order = (FetchJob.priority.desc(), FetchJob.id)
+
+    if db.engine.dialect.name == 'postgresql':
+        jobs = FetchJob.query.filter(claimable).order_by(*order).limit(limit).with_for_update(skip_locked=True).all()
+        for job in jobs:
+            job.status = 'running'
+            job.worker_id = worker_id
+            job.lease_token = token
+            job.lease_expires_at = lease_expires_at
+            job.attempts = (job.attempts or 0) + 1
+            job.started_at = now
+        db.session.commit()
+        return jobs
+
+    ids = select(FetchJob.id).where(claimable).order_by(*order).limit(limit).scalar_subquery()
+    db.session.execute(
+        update(FetchJob).where(FetchJob.id.in_(ids), claimable).values(
+            status='running',
+            worker_id=worker_id,
+            lease_token=token,
+            lease_expires_at=lease_expires_at,
+            attempts=FetchJob.attempts + 1,
+            started_at=now
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return FetchJob.query.filter_by(lease_token=token).order_by(*order).all()
+
+
+def renew_leases(worker_id, tokens):
+    """
+    Extend the leases of the jobs a worker is still running (heartbeat)
+
+    Args:
+        worker_id: Identifier of the worker
+        tokens: Lease tokens of its running jobs
+
+    Returns:
+        int: Number of jobs whose lease was extended
+    """
+    if not tokens:
+        return 0
+    count = FetchJob.query.filter(
+        FetchJob.worker_id == worker_id,
+        FetchJob.lease_token.in_(list(tokens)),
+        FetchJob.status == 'running'
+    ).update({FetchJob.lease_expires_at: datetime.utcnow() + get_lease_duration()}, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def complete_job(job_id, lease_token, outcome):
+    """
+    Record the outcome of a job, unless its lease was lost to another worker
+
+    Args:
+        job_id: ID of the FetchJob
+        lease_token: Token the job was claimed with
+        outcome: Outcome dict of run_feed_check
+
+    Returns:
+        bool: Whether the job was still leased by the caller
+    """
+    count = FetchJob.query.filter_by(id=job_id, lease_token=lease_token, status='running').update({
+        FetchJob.status: 'failed' if outcome['status'] == 'error' else 'done',
+        FetchJob.result_status: outcome['status'],
+        FetchJob.message: outcome['message'],
+        FetchJob.finished_at: datetime.utcnow(),
+        FetchJob.lease_expires_at: None
+    }, synchronize_session=False)
+    db.session.commit()
+    if not count:
+        logger.warning(f"Lease of job {job_id} expired before it finished, outcome discarded")
+    return bool(count)
+
+
+def fail_abandoned_jobs():
+    """
+    Give up on jobs whose lease expired JOB_MAX_ATTEMPTS times
+
+    Returns:
+        int: Number of jobs marked failed
+    """
+    now = datetime.utcnow()
+    max_attempts = int(current_app.config.get('JOB_MAX_ATTEMPTS', 3))
+    count = FetchJob.query.filter(
+        FetchJob.status == 'running',
+        FetchJob.lease_expires_at < now,
+        FetchJob.attempts >= max_attempts
+    ).update({
+        FetchJob.status: 'failed',
+        FetchJob.result_status: 'error',
+        FetchJob.message: f'Lease expired {max_attempts} times',
+        FetchJob.finished_at: now
+    }, synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def purge_finished_jobs():
+    """
+    Delete finished jobs older than JOB_RETENTION_HOURS
+
+    Returns:
+        int: Number of jobs deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=int(current_app.config.get('JOB_RETENTION_HOURS', 24)))
+    count = FetchJob.query.filter(
+        FetchJob.status.in_(('done', 'failed')),
+        FetchJob.finished_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return count
+
+
+def get_queue_stats():
+    """
+    Get job counts per status and the age of the oldest queued job
+
+    Returns:
+        dict: queued, running, done, failed counts and oldest_queued_seconds
+    """
+    counts = dict(db.session.query(FetchJob.status, db.func.count(FetchJob.id)).group_by(FetchJob.status).all())
+    oldest = db.session.query(db.func.min(FetchJob.enqueued_at)).filter(FetchJob.status == 'queued').scalar()
+    workers = db.session.query(db.func.count(db.distinct(FetchJob.worker_id))).filter(FetchJob.status == 'running').scalar()
+    return {
+        'queued': counts.get('queued', 0),
+        'running': counts.get('running', 0),
+        'done': counts.get('done', 0),
+        'failed': counts.get('failed', 0),
+        'busy_workers': workers or 0,
+        'oldest_queued_seconds': round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0,
+    }
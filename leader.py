@@ -0,0 +1,150 @@
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+
+from models import db, SchedulerLease
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class LeaderElection:
+    """
+    Leader election through a lease row in the database
+
+    Every process runs `heartbeat()` periodically. The process holding the
+    lease renews it, the others take it over only once it has expired, so
+    exactly one process is leader and a dead leader is replaced within one
+    lease duration plus one heartbeat. A leader that cannot renew (e.g. the
+    database is unreachable) steps down when its lease runs out locally,
+    before anyone else can take over.
+    """
+
+    def __init__(self, app, name='scheduler', holder=None, lease_seconds=None):
+        self.app = app
+        self.name = name
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = max(3, int(lease_seconds or app.config.get('LEADER_LEASE_SECONDS', 30)))
+        self._lock = threading.Lock()
+        self._valid_until = 0.0               # Monotonic time until which our lease holds
+        self._last_error = None
+
+    @property
+    def heartbeat_seconds(self):
+        """How often to renew, a third of the lease so two heartbeats may fail"""
+        return max(1, self.lease_seconds // 3)
+
+    @property
+    def is_leader(self):
+        """Whether this process holds an unexpired lease"""
+        return time.monotonic() < self._valid_until
+
+    def _claim(self, now):
+        """Take or renew the lease if it is ours or expired, returns whether we hold it"""
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+        count = SchedulerLease.query.filter(
+            SchedulerLease.name == self.name,
+            or_(
+                SchedulerLease.holder == self.holder,
+                SchedulerLease.holder.is_(None),
+                SchedulerLease.expires_at < now
+            )
+        ).update({
+            SchedulerLease.acquired_at: db.case(
+                (SchedulerLease.holder == self.holder, SchedulerLease.acquired_at), else_=now
+            ),
+            SchedulerLease.holder: self.holder,
+            SchedulerLease.heartbeat_at: now,
+            SchedulerLease.expires_at: expires_at
+        }, synchronize_session=False)
+        db.session.commit()
+        if count:
+            return True
+
+        if SchedulerLease.query.filter_by(name=self.name).first() is not None:
+            return False
+
+        # First process ever, create the lease row
+        try:
+            db.session.add(SchedulerLease(
+                name=self.name, holder=self.holder, acquired_at=now, heartbeat_at=now, expires_at=expires_at
+            ))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+
+    def heartbeat(self):
+        """
+        Acquire or renew the lease
+
+        Returns:
+            bool: Whether this process is the leader afterwards
+        """
+        with self._lock:
+            was_leader = self.is_leader
+            started = time.monotonic()
+            try:
+                with self.app.app_context():
+                    leader = self._claim(datetime.utcnow())
+                self._last_error = None
+            except Exception as e:
+                with self.app.app_context():
+                    db.session.rollback()
+                self._last_error = str(e)
+                logger.error(f"Leader heartbeat for {self.name} failed: {str(e)}")
+                # Keep leading until the lease we already hold runs out
+                return self.is_leader
+
+            # Measured from before the write, so we never outlive the stored lease
+            self._valid_until = started + self.lease_seconds if leader else 0.0
+            if leader and not was_leader:
+                logger.info(f"{self.holder} became {self.name} leader")
+            elif was_leader and not leader:
+                logger.warning(f"{self.holder} lost {self.name} leadership")
+            return leader
+
+    def release(self):
+        """Give up the lease so another process can take over right away"""
+        with self._lock:
+            if not self.is_leader:
+                return
+            self._valid_until = 0.0
+            try:
+                with self.app.app_context():
+                    SchedulerLease.query.filter_by(name=self.name, holder=self.holder).update({
+                        SchedulerLease.holder: None,
+                        SchedulerLease.expires_at: None
+                    }, synchronize_session=False)
+                    db.session.commit()
+                logger.info(f"{self.holder} released {self.name} leadership")
+            except Exception as e:
+                with self.app.app_context():
+                    db.session.rollback()
+                logger.error(f"Could not release {self.name} leadership: {str(e)}")
+
+    def status(self):
+        """
+        Get the election state as seen by this process
+
+        Returns:
+            dict: This process, whether it leads, and the current lease holder
+        """
+        lease = SchedulerLease.query.filter_by(name=self.name).first()
+        now = datetime.utcnow()
+        return {
+            'holder': self.holder,
+            'is_leader': self.is_leader,
+            'leader': lease.holder if lease and lease.expires_at and lease.expires_at > now else None,
+            'leader_since': lease.acquired_at.strftime('%Y-%m-%d %H:%M:%S') if lease and lease.acquired_at and lease.holder else None,
+            'last_heartbeat_seconds': round((now - lease.heartbeat_at).total_seconds(), 1) if lease and lease.heartbeat_at else None,
+            'lease_seconds': self.lease_seconds,
+            'error': self._last_error,
+        }
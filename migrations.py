@@ -0,0 +1,230 @@
+import logging
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+
+from models import (
+    db, FeedSource, FetchLog, FeedItem, Alert, FeedFetchState, FeedStatus, FetchLogRollup, CircuitBreaker, FetchJob,
+    SchedulerLease, SelectorCache, ArticleCache, SchemaMigration
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Registered migrations as (version, name, function), applied in version order
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """
+    Register a schema migration
+
+    A migration gets a connection inside the upgrade transaction. Migrations
+    must be idempotent: databases created with db.create_all() before the
+    migrations existed already have some of their changes.
+    """
+    def register(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+def has_column(conn, table, column):
+    return column in {c['name'] for c in sa.inspect(conn).get_columns(table)}
+
+
+def add_column(conn, table, column):
+    """Add a column (sa.Column) to a table unless it exists"""
+    if has_column(conn, table, column.name):
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(sa.text(f'ALTER TABLE {table} ADD COLUMN {column.name} {column_type}'))
+
+
+def create_index(conn, table, name, columns, unique=False):
+    """Create an index unless it exists"""
+    conn.execute(sa.text(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    ))
+
+
+@migration(1, 'Tables and columns added since the first release')
+def add_missing_tables(conn):
+    for model in (FeedFetchState, CircuitBreaker, FetchJob, SchedulerLease, SelectorCache, ArticleCache):
+        model.__table__.create(conn, checkfirst=True)
+
+    # Adaptive polling and unchanged body detection, for fetch states created before them
+    for column in ('body_hash', 'adaptive_interval', 'avg_item_gap', 'last_new_item_at'):
+        add_column(conn, 'feed_fetch_state', FeedFetchState.__table__.c[column])
+
+    # Incremental ingest results
+    for column in ('new_items', 'updated_items', 'unchanged_items'):
+        add_column(conn, 'fetch_log', sa.Column(column, sa.Integer))
+
+
+@migration(2, 'Indexes for feed logs, feed items and unread alerts')
+def add_hot_path_indexes(conn):
+    create_index(conn, 'fetch_log', 'ix_fetch_log_feed_source_fetched_at', ('feed_source_id', 'fetched_at'))
+    create_index(conn, 'feed_item', 'ix_feed_item_feed_source_published_at', ('feed_source_id', 'published_at'))
+    create_index(conn, 'alert', 'ix_alert_is_read_created_at', ('is_read', 'created_at'))
+
+
+@migration(3, 'Unique guid per feed')
+def add_unique_feed_item_guid(conn):
+    # Items stored before incremental ingest may repeat a guid, keep the newest copy
+    deleted = conn.execute(sa.text(
+        'DELETE FROM feed_item WHERE guid IS NOT NULL AND id NOT IN ('
+        'SELECT MAX(id) FROM feed_item WHERE guid IS NOT NULL GROUP BY feed_source_id, guid)'
+    )).rowcount
+    if deleted:
+        logger.info(f"Removed {deleted} duplicate feed items")
+    create_index(conn, 'feed_item', 'uq_feed_item_feed_source_guid', ('feed_source_id', 'guid'), unique=True)
+
+
+@migration(4, 'Latest status per feed')
+def add_feed_status(conn):
+    FeedStatus.__table__.create(conn, checkfirst=True)
+    # Copy the newest log of every feed, found through ix_fetch_log_feed_source_fetched_at
+    conn.execute(sa.text(
+        'INSERT INTO feed_status (feed_source_id, last_check_at, status, http_status, quality_score, '
+        'fetch_duration, item_count, updated_at) '
+        'SELECT feed_source_id, fetched_at, status, http_status, quality_score, fetch_duration, item_count, '
+        ':now FROM fetch_log WHERE id IN ('
+        'SELECT (SELECT id FROM fetch_log l WHERE l.feed_source_id = feed_source.id '
+        'ORDER BY l.fetched_at DESC, l.id DESC LIMIT 1) FROM feed_source) '
+        'AND feed_source_id NOT IN (SELECT feed_source_id FROM feed_status)'
+    ), {'now': datetime.utcnow()})
+
+
+@migration(5, 'Fetch log rollups')
+def add_fetch_log_rollups(conn):
+    # The rollup job fills the table from the existing logs on its first run
+    FetchLogRollup.__table__.create(conn, checkfirst=True)
+    create_index(conn, 'fetch_log', 'ix_fetch_log_fetched_at', ('fetched_at',))
+
+
+def get_applied_versions(conn):
+    if not sa.inspect(conn).has_table(SchemaMigration.__tablename__):
+        return set()
+    return {version for (version,) in conn.execute(sa.select(SchemaMigration.version))}
+
+
+def upgrade():
+    """
+    Bring the database schema up to date (committed)
+
+    A new database is created from the models and marked as up to date.
+    Otherwise the migrations not applied yet run in version order, in one
+    transaction. On PostgreSQL an advisory lock keeps processes starting
+    at the same time from migrating twice.
+
+    Returns:
+        list: (version, name) of the migrations that were applied
+    """
+    applied = []
+    with db.engine.begin() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.execute(sa.text('SELECT pg_advisory_xact_lock(hashtext(:name))'), {'name': 'rsshub-admin-migrations'})
+
+        if not sa.inspect(conn).has_table(FeedSource.__tablename__):
+            db.metadata.create_all(conn)
+            now = datetime.utcnow()
+            conn.execute(sa.insert(SchemaMigration), [
+                {'version': version, 'name': name, 'applied_at': now} for version, name, _ in MIGRATIONS
+            ])
+            logger.info(f"Created the database schema at version {MIGRATIONS[-1][0]}")
+            return applied
+
+        SchemaMigration.__table__.create(conn, checkfirst=True)
+        done = get_applied_versions(conn)
+        for version, name, func in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info(f"Applying migration {version}: {name}")
+            func(conn)
+            conn.execute(sa.insert(SchemaMigration).values(version=version, name=name, applied_at=datetime.utcnow()))
+            applied.append((version, name))
+
+    return applied
+
+
+def get_migration_status():
+    """
+    Get every known migration and whether it has been applied
+
+    Returns:
+        list: Dicts with version, name, applied and applied_at
+    """
+    with db.engine.connect() as conn:
+        applied = {}
+        if sa.inspect(conn).has_table(SchemaMigration.__tablename__):
+            applied = dict(conn.execute(sa.select(SchemaMigration.version, SchemaMigration.applied_at)).all())
+    return [
+        {'version': version, 'name': name, 'applied': version in applied, 'applied_at': applied.get(version)}
+        for version, name, _ in MIGRATIONS
+    ]
+
+
+def get_hot_queries():
+    """
+    The queries that must not scan their whole table, with the index each should use
+
+    Only columns that exist before any migration are selected, so the plans
+    can be checked on a database that still needs upgrading.
+
+    Returns:
+        list: (description, statement, index name)
+    """
+    since = datetime.utcnow() - timedelta(days=1)
+    return [
+        ('Feed health and feed detail logs',
+         sa.select(FetchLog.id, FetchLog.status).where(FetchLog.feed_source_id == 1).order_by(FetchLog.fetched_at.desc()).limit(10),
+         'ix_fetch_log_feed_source_fetched_at'),
+        ('Fetch log rollup of a day',
+         sa.select(FetchLog.id, FetchLog.status).where(FetchLog.fetched_at >= since, FetchLog.fetched_at < since + timedelta(days=1)),
+         'ix_fetch_log_fetched_at'),
+        ('Feed detail and RSS output items',
+         sa.select(FeedItem.id, FeedItem.title).where(FeedItem.feed_source_id == 1).order_by(FeedItem.published_at.desc()).limit(50),
+         'ix_feed_item_feed_source_published_at'),
+        ('Incremental ingest guid lookup',
+         sa.select(FeedItem.id, FeedItem.title).where(FeedItem.feed_source_id == 1, FeedItem.guid.in_(['a', 'b'])),
+         'uq_feed_item_feed_source_guid'),
+        ('Unread alerts on the dashboard',
+         sa.select(Alert.id, Alert.level).where(Alert.is_read == False).order_by(Alert.created_at.desc()).limit(5),  # noqa: E712
+         'ix_alert_is_read_created_at'),
+    ]
+
+
+def explain_hot_queries():
+    """
+    Run EXPLAIN on the hot queries and check that each uses its index
+
+    PostgreSQL prefers sequential scans on small tables, so sequential scans
+    are disabled for the check: the plan shows whether the index can be used.
+
+    Returns:
+        list: Dicts with query, index, uses_index and the plan lines
+    """
+    results = []
+    with db.engine.connect() as conn:
+        dialect = conn.dialect.name
+        transaction = conn.begin()
+        try:
+            if dialect == 'postgresql':
+                conn.execute(sa.text('SET LOCAL enable_seqscan = off'))
+            for description, statement, index in get_hot_queries():
+                sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+                if dialect == 'sqlite':
+                    plan = [row[-1] for row in conn.execute(sa.text('EXPLAIN QUERY PLAN ' + sql))]
+                else:
+                    plan = [row[0] for row in conn.execute(sa.text('EXPLAIN ' + sql))]
+                results.append({
+                    'query': description,
+                    'index': index,
+                    'uses_index': any(index in line for line in plan),
+                    'plan': plan,
+                })
+        finally:
+            transaction.rollback()
+    return results
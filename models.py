@@ -29,6 +29,11 @@ class FeedSource(db.Model):
     # Relationships
     fetch_logs = db.relationship('FetchLog', backref='feed_source', lazy=True, cascade="all, delete-orphan")
     feed_items = db.relationship('FeedItem', backref='feed_source', lazy=True, cascade="all, delete-orphan")
+    fetch_state = db.relationship('FeedFetchState', backref='feed_source', uselist=False, cascade="all, delete-orphan")
+    latest_status = db.relationship('FeedStatus', backref='feed_source', uselist=False, cascade="all, delete-orphan")
+    fetch_log_rollups = db.relationship('FetchLogRollup', backref='feed_source', lazy=True, cascade="all, delete-orphan")
+    circuit = db.relationship('CircuitBreaker', backref='feed_source', uselist=False, cascade="all, delete-orphan")
+    fetch_jobs = db.relationship('FetchJob', backref='feed_source', lazy=True, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f'<FeedSource {self.name}>'
@@ -36,15 +41,27 @@ class FeedSource(db.Model):
 
 class FetchLog(db.Model):
     """Log of feed fetch attempts"""
+    __table_args__ = (
+        # Feed detail reads a feed's logs by time
+        db.Index('ix_fetch_log_feed_source_fetched_at', 'feed_source_id', 'fetched_at'),
+        # Rollups read and retention deletes logs of all feeds by time
+        db.Index('ix_fetch_log_fetched_at', 'fetched_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=False)
     
     # Status info
-    status = db.Column(db.String(20), nullable=False)  # success, error, warning
+    status = db.Column(db.String(20), nullable=False)  # success, error, warning, not_modified
     http_status = db.Column(db.Integer, nullable=True)
     item_count = db.Column(db.Integer, default=0)
     error_message = db.Column(db.Text, nullable=True)
     
+    # Incremental ingest results
+    new_items = db.Column(db.Integer, nullable=True)
+    updated_items = db.Column(db.Integer, nullable=True)
+    unchanged_items = db.Column(db.Integer, nullable=True)
+    
     # Quality metrics
     avg_title_length = db.Column(db.Float, nullable=True)
     avg_content_length = db.Column(db.Float, nullable=True)
@@ -59,8 +76,152 @@ class FetchLog(db.Model):
         return f'<FetchLog {self.feed_source_id} {self.status}>'
 
 
+class FetchLogRollup(db.Model):
+    """FetchLog aggregates of a feed per hour or per day, kept after raw logs are pruned"""
+    __table_args__ = (
+        db.UniqueConstraint('feed_source_id', 'period', 'bucket_start'),
+        # Rebuilding a day replaces the buckets of every feed in it
+        db.Index('ix_fetch_log_rollup_period_bucket_start', 'period', 'bucket_start'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=False)
+    period = db.Column(db.String(4), nullable=False)  # hour, day
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    
+    check_count = db.Column(db.Integer, default=0)
+    success_count = db.Column(db.Integer, default=0)  # success and not_modified
+    
+    duration_avg = db.Column(db.Float, nullable=True)  # seconds
+    duration_p95 = db.Column(db.Float, nullable=True)  # seconds
+    quality_avg = db.Column(db.Float, nullable=True)  # 0-100, of checks with a score
+    quality_count = db.Column(db.Integer, default=0)  # Checks with a score
+    item_count_avg = db.Column(db.Float, nullable=True)
+    
+    @property
+    def success_rate(self):
+        return self.success_count / self.check_count if self.check_count else 0
+    
+    def __repr__(self):
+        return f'<FetchLogRollup {self.feed_source_id} {self.period} {self.bucket_start}>'
+
+
+class FeedFetchState(db.Model):
+    """HTTP cache validators and results of the last full fetch of a feed"""
+    id = db.Column(db.Integer, primary_key=True)
+    feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=False, unique=True)
+    
+    # Validators and body digest for the URL they were recorded for
+    url = db.Column(db.String(512), nullable=True)
+    etag = db.Column(db.String(255), nullable=True)
+    last_modified = db.Column(db.String(100), nullable=True)
+    body_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the last processed body
+    
+    # Results of the last full fetch, carried over to "not modified" logs
+    item_count = db.Column(db.Integer, default=0)
+    quality_score = db.Column(db.Float, nullable=True)
+    
+    # Adaptive polling, learned from the arrival of new items
+    adaptive_interval = db.Column(db.Float, nullable=True)  # Minutes
+    avg_item_gap = db.Column(db.Float, nullable=True)  # Minutes between new items (moving average)
+    last_new_item_at = db.Column(db.DateTime, nullable=True)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<FeedFetchState {self.feed_source_id}>'
+
+
+class FeedStatus(db.Model):
+    """Result of the latest check of a feed, updated with every FetchLog written"""
+    id = db.Column(db.Integer, primary_key=True)
+    feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=False, unique=True)
+    
+    # Copied from the latest FetchLog, so the dashboard and feed list need no log scan
+    last_check_at = db.Column(db.DateTime, nullable=True)
+    status = db.Column(db.String(20), nullable=True)  # success, error, warning, not_modified
+    http_status = db.Column(db.Integer, nullable=True)
+    quality_score = db.Column(db.Float, nullable=True)  # 0-100
+    fetch_duration = db.Column(db.Float, nullable=True)  # seconds
+    item_count = db.Column(db.Integer, nullable=True)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<FeedStatus {self.feed_source_id} {self.status}>'
+
+
+class CircuitBreaker(db.Model):
+    """Circuit breaker for a feed or an upstream host, stops checks of failing routes"""
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(300), nullable=False, unique=True)  # feed:<id> or host:<netloc>
+    scope = db.Column(db.String(10), nullable=False)  # feed, host
+    feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=True)
+    host = db.Column(db.String(255), nullable=True)
+    
+    state = db.Column(db.String(10), nullable=False, default='closed')  # closed, open, half_open
+    failure_count = db.Column(db.Integer, default=0)  # Consecutive failures
+    open_count = db.Column(db.Integer, default=0)  # Consecutive openings, drives the backoff
+    last_error = db.Column(db.Text, nullable=True)
+    
+    opened_at = db.Column(db.DateTime, nullable=True)
+    retry_at = db.Column(db.DateTime, nullable=True)  # When an open circuit lets a probe through
+    probe_started_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<CircuitBreaker {self.key} {self.state}>'
+
+
+class FetchJob(db.Model):
+    """Queued feed check, claimed by a worker process under a lease"""
+    id = db.Column(db.Integer, primary_key=True)
+    feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=False)
+    
+    status = db.Column(db.String(10), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    priority = db.Column(db.Integer, default=0)  # Higher first, manual checks jump the queue
+    source = db.Column(db.String(20), nullable=True)  # scheduler, manual, api
+    attempts = db.Column(db.Integer, default=0)
+    
+    # Lease of the worker running the job, expired leases are claimed again
+    worker_id = db.Column(db.String(100), nullable=True)
+    lease_token = db.Column(db.String(32), nullable=True, index=True)
+    lease_expires_at = db.Column(db.DateTime, nullable=True)
+    
+    # Outcome of the check
+    result_status = db.Column(db.String(20), nullable=True)
+    message = db.Column(db.Text, nullable=True)
+    
+    enqueued_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<FetchJob {self.id} {self.feed_source_id} {self.status}>'
+
+
+class SchedulerLease(db.Model):
+    """Lease held by the one process allowed to run a singleton job, e.g. the scheduler"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    holder = db.Column(db.String(100), nullable=True)  # host:pid of the leader
+    acquired_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<SchedulerLease {self.name} {self.holder}>'
+
+
 class FeedItem(db.Model):
     """Individual items from a feed"""
+    __table_args__ = (
+        # Feed detail and the RSS output list a feed's newest items
+        db.Index('ix_feed_item_feed_source_published_at', 'feed_source_id', 'published_at'),
+        # Incremental ingest matches items by guid, at most one item per guid and feed
+        db.Index('uq_feed_item_feed_source_guid', 'feed_source_id', 'guid', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=False)
     
@@ -91,6 +252,46 @@ class FeedItem(db.Model):
         return f'<FeedItem {self.title[:30]}>'
 
 
+class SelectorCache(db.Model):
+    """Content extracted from article pages with custom selectors"""
+    __table_args__ = (db.UniqueConstraint('url', 'selector_key'),)
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(512), nullable=False)
+    selector_key = db.Column(db.String(40), nullable=False)  # SHA-1 of the selector set
+    
+    # Extracted HTML, empty if the selectors matched nothing
+    content = db.Column(db.Text, nullable=True)
+    size = db.Column(db.Integer, default=0)  # Bytes
+    
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SelectorCache {self.url}>'
+
+
+class ArticleCache(db.Model):
+    """Articles extracted with newspaper3k, reused across checks and previews"""
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(512), nullable=False, unique=True)
+    
+    # Extraction results
+    title = db.Column(db.Text, nullable=True)
+    text = db.Column(db.Text, nullable=True)
+    html = db.Column(db.Text, nullable=True)
+    authors = db.Column(db.Text, nullable=True)  # JSON list
+    publish_date = db.Column(db.DateTime, nullable=True)
+    top_image = db.Column(db.String(512), nullable=True)
+    meta_description = db.Column(db.Text, nullable=True)
+    
+    # LRU bookkeeping
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ArticleCache {self.url}>'
+
+
 class SystemSettings(db.Model):
     """System-wide settings"""
     id = db.Column(db.Integer, primary_key=True)
@@ -104,6 +305,9 @@ class SystemSettings(db.Model):
 
 class Alert(db.Model):
     """System alerts"""
+    # The dashboard lists the newest unread alerts
+    __table_args__ = (db.Index('ix_alert_is_read_created_at', 'is_read', 'created_at'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     feed_source_id = db.Column(db.Integer, db.ForeignKey('feed_source.id'), nullable=True)
     
@@ -113,4 +317,14 @@ class Alert(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
-        return f'<Alert {self.level} {self.message[:30]}>'
\ No newline at end of file
+        return f'<Alert {self.level} {self.message[:30]}>'
+
+
+class SchemaMigration(db.Model):
+    """Schema migrations applied to the database, see migrations.py"""
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<SchemaMigration {self.version} {self.name}>'
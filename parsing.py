@@ -0,0 +1,549 @@
+import logging
+import multiprocessing
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from io import BytesIO
+
+import feedparser
+from feedparser import FeedParserDict
+from flask import current_app, has_app_context
+from lxml import etree
+
+from content_analysis import analyze_content
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# The fast parser reuses feedparser's date parsing, cp1252 cleanup and HTML
+# sanitizer so its entries match feedparser's. These are private and may move
+# in any release (feedparser is pinned for that), if they do every feed goes
+# through feedparser.parse instead.
+try:
+    from feedparser.datetimes import _parse_date
+    from feedparser.mixin import _FeedParserMixin, _cp1252
+    from feedparser.sanitizer import _sanitize_html
+    FAST_PARSER_AVAILABLE = True
+except ImportError as e:
+    logger.warning(f"Fast feed parser disabled, feedparser internals not found: {str(e)}")
+    FAST_PARSER_AVAILABLE = False
+
+# Everything in this module up to the pool helpers runs in parse workers:
+# it must not touch the database or the app, and must return picklable data.
+
+_pool = None
+_pool_size = None
+_pool_lock = threading.Lock()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+DC_CREATOR = '{http://purl.org/dc/elements/1.1/}creator'
+DC_DATE = '{http://purl.org/dc/elements/1.1/}date'
+MEDIA = '{http://search.yahoo.com/mrss/}'
+XML_BASE = '{http://www.w3.org/XML/1998/namespace}base'
+
+# Atom link types feedparser accepts as the entry link
+HTML_LINK_TYPES = ('text/html', 'application/xhtml+xml')
+
+
+class UnsupportedFeed(Exception):
+    """The fast parser cannot reproduce feedparser's output for this feed"""
+
+
+def normalize_datetime(dt):
+    """Make all datetimes timezone-naive for consistent comparison"""
+    if dt is None:
+        return datetime.utcnow()
+    if dt.tzinfo is not None:
+        # Convert to UTC and remove timezone info
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def get_entry_content(entry):
+    """
+    Pick the richest content field of a feedparser entry
+
+    Args:
+        entry: feedparser entry
+
+    Returns:
+        tuple: (content, extraction_method)
+    """
+    # Method 1: Try content field (best case)
+    if hasattr(entry, 'content'):
+        return entry.content[0].value, 'content_field'
+
+    # Method 2: Try content_encoded field
+    if hasattr(entry, 'content_encoded'):
+        return entry.content_encoded, 'content_encoded'
+
+    # Method 3: Try description field
+    if hasattr(entry, 'description'):
+        return entry.description, 'description'
+
+    # Method 4: Use summary as fallback
+    description = getattr(entry, 'summary', '')
+    if description:
+        return description, 'summary'
+
+    return '', 'none'
+
+
+def needs_selector_content(content, link):
+    """Whether an entry's own content is too short and custom selectors should be tried"""
+    return bool(link) and (not content or len(content) < 200)
+
+
+def get_entry_images(entry):
+    """
+    Find image candidates in a feedparser entry's media fields
+
+    Args:
+        entry: feedparser entry
+
+    Returns:
+        tuple: (image from media_content or enclosures, image from media_thumbnail)
+    """
+    preferred_image = None
+
+    # Method 1: Check media_content
+    if hasattr(entry, 'media_content') and entry.media_content:
+        for media in entry.media_content:
+            if 'url' in media and (
+                'image' in media.get('type', '') or
+                media.get('url', '').lower().endswith(('.jpg', '.jpeg', '.png', '.gif'))
+            ):
+                preferred_image = media.get('url')
+                break
+
+    # Method 2: Check enclosures
+    if not preferred_image and hasattr(entry, 'enclosures') and entry.enclosures:
+        for enclosure in entry.enclosures:
+            if 'type' in enclosure and 'image' in enclosure.get('type', ''):
+                preferred_image = enclosure.get('href', None) or enclosure.get('url', None)
+                if preferred_image:
+                    break
+
+    # Method 3 is the first <img> in the content, see analyze_content
+
+    # Method 4: Try to get from media_thumbnail
+    fallback_image = None
+    if hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
+        for thumbnail in entry.media_thumbnail:
+            if 'url' in thumbnail:
+                fallback_image = thumbnail['url']
+                break
+
+    return preferred_image, fallback_image
+
+
+def get_entry_published(entry):
+    """Get the publication date of a feedparser entry, or None"""
+    published_at = None
+    if hasattr(entry, 'published_parsed') and entry.published_parsed:
+        try:
+            published_at = datetime(*entry.published_parsed[:6])
+        except:
+            # Try alternative date fields
+            if hasattr(entry, 'updated_parsed') and entry.updated_parsed:
+                try:
+                    published_at = datetime(*entry.updated_parsed[:6])
+                except:
+                    pass
+    return published_at
+
+
+def _clean_text(element, encoding):
+    """Text of a leaf element, cleaned up the way feedparser does"""
+    if len(element):
+        # Unescaped markup inside a text element, leave it to feedparser
+        raise UnsupportedFeed(f"markup inside <{etree.QName(element).localname}>")
+
+    value = (element.text or '').strip()
+    if encoding == 'utf-8':
+        # Undo UTF-8 that was mistakenly re-encoded as ISO-8859-1
+        try:
+            value = value.encode('iso-8859-1').decode('utf-8')
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return value.translate(_cp1252)
+
+
+def _clean_html(element, encoding):
+    """HTML of an element, sanitized like feedparser does"""
+    value = _clean_text(element, encoding)
+    return _sanitize_html(value, encoding, 'text/html') if value else value
+
+
+def _atom_text(element, encoding):
+    """Value of an Atom text construct (title, summary, content)"""
+    content_type = element.get('type', 'text')
+    if content_type in ('text', 'text/plain'):
+        return _clean_text(element, encoding)
+    if content_type in ('html', 'text/html') and element.tag != ATOM + 'title':
+        return _clean_html(element, encoding)
+    raise UnsupportedFeed(f"Atom {content_type} content")
+
+
+def _media_entries(element):
+    """media:content and media:thumbnail of an item, including media:group"""
+    media_content = [dict(media.attrib) for media in element.iter(MEDIA + 'content')]
+    media_thumbnail = [dict(media.attrib) for media in element.iter(MEDIA + 'thumbnail')]
+    return media_content, media_thumbnail
+
+
+def _rss_entry(item, encoding):
+    """Build a feedparser-compatible entry from an RSS 2.0 <item>"""
+    entry = FeedParserDict()
+    links = []
+    guid_is_link = False
+
+    for child in item:
+        tag = child.tag
+        if tag == 'title':
+            title = _clean_text(child, encoding)
+            if _FeedParserMixin.looks_like_html(title):
+                title = _sanitize_html(title, encoding, 'text/html')
+            entry['title'] = title
+        elif tag == 'link':
+            link = _clean_text(child, encoding).replace('&amp;', '&')
+            entry['link'] = re.sub('&([A-Za-z0-9_]+);', r'&\g<1>', link)
+        elif tag == 'guid':
+            entry['id'] = _clean_text(child, encoding)
+            guid_is_link = child.get('isPermaLink', 'true') != 'false'
+        elif tag == 'description':
+            entry['summary'] = _clean_html(child, encoding)
+        elif tag == CONTENT_ENCODED:
+            entry['content'] = [FeedParserDict(type='text/html', value=_clean_html(child, encoding))]
+        elif tag in ('author', DC_CREATOR):
+            entry['author'] = _clean_text(child, encoding)
+        elif tag == 'pubDate':
+            entry['published'] = _clean_text(child, encoding)
+            entry['published_parsed'] = _parse_date(entry['published'])
+        elif tag == DC_DATE:
+            entry['updated'] = _clean_text(child, encoding)
+            entry['updated_parsed'] = _parse_date(entry['updated'])
+        elif tag == 'enclosure':
+            enclosure = FeedParserDict(rel='enclosure')
+            for key, value in child.attrib.items():
+                enclosure['href' if key == 'url' else key] = value
+            links.append(enclosure)
+
+    if guid_is_link and entry.get('id') and 'link' not in entry:
+        entry['link'] = entry['id']
+    if 'content' in entry and 'summary' not in entry:
+        entry['summary'] = entry['content'][0]['value']
+
+    # feedparser derives entry.enclosures from the links
+    entry['links'] = links
+    entry['media_content'], entry['media_thumbnail'] = _media_entries(item)
+    return entry
+
+
+def _atom_entry(element, encoding):
+    """Build a feedparser-compatible entry from an Atom <entry>"""
+    entry = FeedParserDict()
+    links = []
+
+    for child in element:
+        tag = child.tag
+        if tag == ATOM + 'title':
+            entry['title'] = _atom_text(child, encoding)
+        elif tag == ATOM + 'link':
+            link = FeedParserDict(child.attrib)
+            link.setdefault('rel', 'alternate')
+            link.setdefault('type', 'text/html')
+            links.append(link)
+            if link['rel'] == 'alternate' and link['type'] in HTML_LINK_TYPES:
+                entry['link'] = link.get('href', '')
+        elif tag == ATOM + 'id':
+            entry['id'] = _clean_text(child, encoding)
+        elif tag == ATOM + 'summary':
+            entry['summary'] = _atom_text(child, encoding)
+        elif tag == ATOM + 'content':
+            value = _atom_text(child, encoding)
+            content_type = 'text/plain' if child.get('type', 'text') in ('text', 'text/plain') else 'text/html'
+            entry['content'] = [FeedParserDict(type=content_type, value=value)]
+        elif tag == ATOM + 'author':
+            name = child.findtext(ATOM + 'name', '').strip()
+            email = child.findtext(ATOM + 'email', '').strip()
+            if name and email:
+                entry['author'] = f"{name} ({email})"
+            elif name or email:
+                entry['author'] = name or email
+        elif tag == ATOM + 'published':
+            entry['published'] = _clean_text(child, encoding)
+            entry['published_parsed'] = _parse_date(entry['published'])
+        elif tag == ATOM + 'updated':
+            entry['updated'] = _clean_text(child, encoding)
+            entry['updated_parsed'] = _parse_date(entry['updated'])
+
+    if 'content' in entry and 'summary' not in entry:
+        entry['summary'] = entry['content'][0]['value']
+
+    entry['links'] = links
+    entry['media_content'], entry['media_thumbnail'] = _media_entries(element)
+    return entry
+
+
+def iter_fast_entries(body, max_entries=None):
+    """
+    Incrementally parse a well-formed RSS 2.0 or Atom 1.0 feed with lxml
+
+    Entries are built as they are parsed and their elements freed right
+    after, so memory stays flat, and parsing stops once max_entries have
+    been read. Entries are feedparser-compatible dicts.
+
+    Raises:
+        UnsupportedFeed: If the feed needs feedparser (other formats, xml:base, XHTML content)
+        lxml.etree.XMLSyntaxError: If the feed is malformed
+    """
+    if not FAST_PARSER_AVAILABLE:
+        raise UnsupportedFeed("feedparser internals not available")
+
+    context = etree.iterparse(
+        BytesIO(body), events=('start', 'end'),
+        resolve_entities=False, no_network=True, remove_comments=True, remove_pis=True
+    )
+
+    entry_tag = None
+    build_entry = None
+    encoding = None
+    count = 0
+
+    for event, element in context:
+        if event == 'start':
+            if entry_tag is None:
+                if element.tag == 'rss':
+                    entry_tag, build_entry = 'item', _rss_entry
+                elif element.tag == ATOM + 'feed':
+                    entry_tag, build_entry = ATOM + 'entry', _atom_entry
+                else:
+                    raise UnsupportedFeed(f"root element {element.tag}")
+                encoding = (element.getroottree().docinfo.encoding or 'utf-8').lower()
+            if XML_BASE in element.attrib:
+                raise UnsupportedFeed("xml:base")
+            continue
+
+        if element.tag != entry_tag:
+            continue
+
+        yield build_entry(element, encoding)
+        count += 1
+        if max_entries is not None and count >= max_entries:
+            return
+
+        # Free the entry and everything before it
+        element.clear()
+        parent = element.getparent()
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+def parse_feed_entries(body, max_entries=None):
+    """
+    Parse feed entries, fast path first and feedparser for everything else
+
+    Returns:
+        list: feedparser-compatible entries, at most max_entries
+    """
+    try:
+        return list(iter_fast_entries(body, max_entries))
+    except (etree.XMLSyntaxError, UnsupportedFeed) as e:
+        logger.debug(f"Falling back to feedparser: {str(e)}")
+
+    return feedparser.parse(body).entries[:max_entries]
+
+
+class FeedItemCounter:
+    """
+    Count closing item tags in a feed as it downloads, for read_body(stop=...)
+
+    Once max_items items have been received the rest of the feed is never
+    parsed, so the download can stop there and memory stays flat however
+    big the feed is. A miscount only means the fast parser falls back to
+    feedparser on the shortened body.
+    """
+
+    MARKERS = (b'</item>', b'</entry>')
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.count = 0
+        self._tail = b''
+
+    def __call__(self, chunk):
+        if not self.max_items:
+            return False
+        # Keep the end of the previous chunk so tags split across chunks are found
+        data = self._tail + chunk
+        self.count += sum(data.count(marker) for marker in self.MARKERS)
+        self._tail = data[-8:]
+        # Tags fully inside the kept tail were already counted
+        self.count -= sum(self._tail.count(marker) for marker in self.MARKERS)
+        return self.count >= self.max_items
+
+
+def parse_feed(body, analyze=True, max_entries=None):
+    """
+    Parse a raw feed body into plain entry records
+
+    Args:
+        body: Response bytes of the feed
+        analyze: Whether to analyze the content of every entry
+        max_entries: Stop parsing after this many entries
+
+    Returns:
+        list: Entry dicts (title, link, guid, description, content,
+              extraction_method, author, published_at, published,
+              preferred_image, fallback_image and analysis)
+    """
+    records = []
+    for entry in parse_feed_entries(body, max_entries):
+        # Extract data with fallbacks
+        title = getattr(entry, 'title', 'No Title')
+        link = getattr(entry, 'link', '')
+
+        # Multi-tiered content extraction with fallbacks
+        content, extraction_method = get_entry_content(entry)
+
+        # Get author with fallbacks
+        author = None
+        if hasattr(entry, 'author'):
+            author = entry.author
+        elif hasattr(entry, 'author_detail') and hasattr(entry.author_detail, 'name'):
+            author = entry.author_detail.name
+
+        preferred_image, fallback_image = get_entry_images(entry)
+
+        records.append({
+            'title': title,
+            'link': link,
+            'guid': getattr(entry, 'id', link),
+            'description': getattr(entry, 'summary', ''),
+            'content': content,
+            'extraction_method': extraction_method,
+            'author': author,
+            'published_at': get_entry_published(entry),
+            'published': getattr(entry, 'published', None),
+            'preferred_image': preferred_image,
+            'fallback_image': fallback_image,
+            'analysis': analyze_content(content, title, preferred_image, fallback_image) if analyze else None,
+        })
+
+    return records
+
+
+def analyze_entries(records):
+    """Analyze the content of entry records, for content replaced after parse_feed"""
+    return [
+        analyze_content(record['content'], record['title'], record['preferred_image'], record['fallback_image'])
+        for record in records
+    ]
+
+
+def parse_article(url, html):
+    """
+    Extract an article from downloaded HTML with newspaper3k
+
+    Returns:
+        dict: Article record (url, title, text, html, authors, publish_date,
+              top_image, meta_description)
+    """
+    # Imported on first use, most processes never extract an article
+    from newspaper import Article
+
+    article = Article(url, language='en', fetch_images=False)
+    article.download(input_html=html)
+    article.parse()
+
+    return {
+        'url': url,
+        'title': article.title,
+        'text': article.text or '',
+        'html': article.article_html or '',
+        'authors': list(article.authors or []),
+        'publish_date': normalize_datetime(article.publish_date) if article.publish_date else None,
+        'top_image': article.top_image or None,
+        'meta_description': article.meta_description or None,
+    }
+
+
+def get_parse_pool():
+    """
+    Get the process pool for parsing, sized by PARSE_POOL_SIZE
+
+    Workers are spawned rather than forked so they never inherit the app's
+    threads, locks or database connections.
+
+    Returns:
+        ProcessPoolExecutor: Shared pool, or None to parse in-process
+    """
+    global _pool, _pool_size
+
+    size = int(current_app.config.get('PARSE_POOL_SIZE', 0) or 0) if has_app_context() else 0
+    if size <= 0:
+        return None
+    if _pool is not None and _pool_size == size:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_size != size:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context('spawn'))
+            _pool_size = size
+            logger.info(f"Started parse pool with {size} processes")
+
+    return _pool
+
+
+def shutdown_parse_pool(wait=False):
+    """Stop the parse pool, the next parse starts a new one"""
+    global _pool, _pool_size
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+        _pool, _pool_size = None, None
+
+
+def submit_parse(func, *args):
+    """
+    Start a parse function in the pool
+
+    Returns:
+        Future: Pool future, or an already completed future if parsing in-process
+    """
+    pool = get_parse_pool()
+    if pool is not None:
+        try:
+            return pool.submit(func, *args)
+        except (BrokenProcessPool, RuntimeError) as e:
+            logger.warning(f"Parse pool unavailable, parsing in-process: {str(e)}")
+            shutdown_parse_pool()
+
+    future = Future()
+    try:
+        future.set_result(func(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def parse_result(future, func, *args):
+    """Wait for a parse future, re-running in-process if a worker died"""
+    try:
+        return future.result()
+    except BrokenProcessPool as e:
+        logger.warning(f"Parse worker died, parsing in-process: {str(e)}")
+        shutdown_parse_pool()
+        return func(*args)
+
+
+def run_parse(func, *args):
+    """Run a parse function in the pool (or in-process) and return its result"""
+    return parse_result(submit_parse(func, *args), func, *args)
@@ -0,0 +1,356 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Returned by a stage function when the item needs no further stages
+DONE = 'done'
+
+# Upper bounds (seconds) of the stage latency histogram
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_STOP = object()
+
+
+def run_stages(stages, item):
+    """
+    Run an item through stages one after another in the calling thread
+
+    Follows the same routing as Pipeline, for callers that need the result
+    right away (e.g. a manual check from the web UI).
+
+    Args:
+        stages: List of (name, function) pairs in pipeline order
+        item: Work item handed to every stage function
+
+    Returns:
+        The item after its last stage
+    """
+    funcs = dict(stages)
+    names = [name for name, _ in stages]
+    name = names[0]
+    while name != DONE:
+        target = funcs[name](item)
+        if target is None:
+            index = names.index(name) + 1
+            target = names[index] if index < len(names) else DONE
+        name = target
+    return item
+
+
+class _Job:
+    """An item travelling through a pipeline, with the future of its caller"""
+
+    __slots__ = ('item', 'future', 'queued_at')
+
+    def __init__(self, item, future):
+        self.item = item
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class Stage:
+    """
+    One pipeline stage: a bounded input queue drained by its own threads
+
+    Args:
+        name: Stage name, the target other stages route to
+        func: Called with the work item, returns the name of the next stage,
+            DONE, or None for the stage that follows in pipeline order
+        workers: Number of threads running the stage
+        queue_size: Items that may wait for the stage before upstream blocks
+        batch_size: If set, `func` takes a list of up to this many items, those
+            already waiting in the queue (it never waits for more to arrive),
+            and returns a list with the next stage of each, or the exception
+            that failed it
+    """
+
+    def __init__(self, name, func, workers=1, queue_size=16, batch_size=None):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.batch_size = max(1, int(batch_size)) if batch_size is not None else None
+
+        self.lock = threading.Lock()
+        self.busy = 0
+        self.processed = 0
+        self.errors = 0
+        self.peak_depth = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.latency_histogram = [0] * len(LATENCY_BUCKETS)
+        self.wait_total = 0.0                 # Time items spent in the input queue
+        self.blocked_total = 0.0              # Time workers spent blocked on a full downstream queue
+        self.batches = 0
+
+    def record(self, waited, latency, failed):
+        with self.lock:
+            self.processed += 1
+            if failed:
+                self.errors += 1
+            self.wait_total += waited
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    self.latency_histogram[i] += 1
+                    break
+
+    def stats(self):
+        """Get the queue depth and latency metrics of the stage"""
+        with self.lock:
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(LATENCY_BUCKETS, self.latency_histogram):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            histogram['+Inf'] = self.processed
+            return {
+                'stage': self.name,
+                'workers': self.workers,
+                'busy': self.busy,
+                'queue_depth': self.queue.qsize(),
+                'queue_size': self.queue.maxsize,
+                'queue_depth_peak': self.peak_depth,
+                'processed': self.processed,
+                'errors': self.errors,
+                'latency_seconds_avg': round(self.latency_total / self.processed, 3) if self.processed else 0.0,
+                'latency_seconds_max': round(self.latency_max, 3),
+                'latency_histogram': histogram,
+                'wait_seconds_avg': round(self.wait_total / self.processed, 3) if self.processed else 0.0,
+                'blocked_seconds_total': round(self.blocked_total, 3),
+                'batch_size': self.batch_size,
+                'batch_size_avg': round(self.processed / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+class Pipeline:
+    """
+    Stages connected by bounded queues, each with its own worker threads
+
+    An item enters the first stage through `submit()` and moves on to the
+    stage its function names. Queues between stages are bounded, so a slow
+    stage first fills its own queue, then blocks the stages feeding it, and
+    finally `submit()` itself: backpressure instead of unbounded buffering.
+    Until then the faster stages keep going, e.g. network fetches continue
+    while the database stage catches up.
+
+    Args:
+        name: Thread name prefix
+        stages: List of Stage objects in pipeline order
+        context: Optional factory of a context manager entered around every
+            stage call (e.g. app.app_context for a DB session per call)
+    """
+
+    def __init__(self, name, stages, context=None):
+        self.name = name
+        self.stages = list(stages)
+        self._by_name = {stage.name: stage for stage in self.stages}
+        self._context = context
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._threads = []
+        self._alive = {}
+        self._started = False
+        self._stopped = False
+
+    @property
+    def capacity(self):
+        """Items the pipeline holds at most: every worker busy and every queue full"""
+        return sum(stage.workers + stage.queue.maxsize for stage in self.stages)
+
+    def start(self):
+        """Start the stage threads (called on the first submit)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            for stage in self.stages:
+                self._alive[stage.name] = stage.workers
+                for i in range(stage.workers):
+                    thread = threading.Thread(
+                        target=self._work, args=(stage,), name=f"{self.name}-{stage.name}-{i}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+        logger.info(
+            f"Started {self.name} pipeline: "
+            + ', '.join(f"{stage.name} x{stage.workers}" for stage in self.stages)
+        )
+
+    def submit(self, item, timeout=None):
+        """
+        Hand an item to the first stage
+
+        Blocks while the first stage's queue is full.
+
+        Args:
+            item: Work item
+            timeout: Seconds to wait for queue space, None waits forever
+
+        Returns:
+            Future: Resolves to the item after its last stage, or to the
+                exception raised by a stage
+
+        Raises:
+            queue.Full: If there was no room within `timeout`
+            RuntimeError: If the pipeline was shut down
+        """
+        if self._stopped:
+            raise RuntimeError(f"{self.name} pipeline is shut down")
+        if not self._started:
+            self.start()
+
+        job = _Job(item, Future())
+        with self._lock:
+            self._in_flight += 1
+        job.future.add_done_callback(self._on_done)
+        try:
+            self._put(self.stages[0], job, timeout=timeout)
+        except queue.Full:
+            job.future.cancel()
+            raise
+        return job.future
+
+    def _on_done(self, future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def _put(self, stage, job, timeout=None):
+        job.queued_at = time.monotonic()
+        stage.queue.put(job, timeout=timeout)
+        depth = stage.queue.qsize()
+        if depth > stage.peak_depth:
+            with stage.lock:
+                stage.peak_depth = max(stage.peak_depth, depth)
+
+    def _next_stage(self, stage, target):
+        if target is None:
+            index = self.stages.index(stage) + 1
+            return self.stages[index] if index < len(self.stages) else None
+        if target == DONE:
+            return None
+        return self._by_name[target]
+
+    def _take(self, stage):
+        """Take the next job, and up to batch_size - 1 more already waiting for a batch stage"""
+        jobs = [stage.queue.get()]
+        while jobs[-1] is not _STOP and len(jobs) < (stage.batch_size or 1):
+            try:
+                jobs.append(stage.queue.get_nowait())
+            except queue.Empty:
+                break
+        return jobs
+
+    def _call(self, stage, items):
+        if stage.batch_size is None:
+            return [stage.func(items[0])]
+        return stage.func(items)
+
+    def _work(self, stage):
+        while True:
+            jobs = self._take(stage)
+            stopping = jobs[-1] is _STOP
+            if stopping:
+                jobs.pop()
+            if jobs:
+                self._run(stage, jobs)
+            if stopping:
+                self._worker_stopped(stage)
+                break
+
+    def _run(self, stage, jobs):
+        started = time.monotonic()
+        with stage.lock:
+            stage.busy += 1
+            stage.batches += 1
+        try:
+            items = [job.item for job in jobs]
+            if self._context is not None:
+                with self._context():
+                    targets = self._call(stage, items)
+            else:
+                targets = self._call(stage, items)
+        except Exception as e:
+            logger.error(f"{self.name} pipeline stage {stage.name} failed: {str(e)}", exc_info=True)
+            targets = [e] * len(jobs)
+        finally:
+            with stage.lock:
+                stage.busy -= 1
+        latency = time.monotonic() - started
+
+        for job, target in zip(jobs, targets):
+            failed = isinstance(target, Exception)
+            stage.record(started - job.queued_at, latency, failed)
+            if failed:
+                job.future.set_exception(target)
+                continue
+
+            next_stage = self._next_stage(stage, target)
+            if next_stage is None:
+                job.future.set_result(job.item)
+                continue
+
+            # Blocks while the next stage is backed up, holding this stage back in turn
+            blocked = time.monotonic()
+            self._put(next_stage, job)
+            waited_for_space = time.monotonic() - blocked
+            if waited_for_space > 0.001:
+                with stage.lock:
+                    stage.blocked_total += waited_for_space
+
+    def _worker_stopped(self, stage):
+        """Stop the next stage once the last worker of a stage has exited"""
+        with self._lock:
+            self._alive[stage.name] -= 1
+            last = self._alive[stage.name] == 0
+        next_stage = self._next_stage(stage, None)
+        if last and next_stage is not None:
+            for _ in range(next_stage.workers):
+                next_stage.queue.put(_STOP)
+
+    def stats(self):
+        """
+        Get the metrics of every stage
+
+        Returns:
+            dict: Items in flight, capacity, and per-stage stats (see Stage.stats) in pipeline order
+        """
+        with self._lock:
+            in_flight = self._in_flight
+        return {
+            'in_flight': in_flight,
+            'capacity': self.capacity,
+            'stages': [stage.stats() for stage in self.stages],
+        }
+
+    def shutdown(self, wait=False):
+        """
+        Stop the pipeline, items already submitted still run through every stage
+
+        Stages are stopped in order, each once the stage before it has drained.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            started = self._started
+            threads = list(self._threads)
+        if not started:
+            return
+
+        def stop():
+            for _ in range(self.stages[0].workers):
+                self.stages[0].queue.put(_STOP)
+
+        if wait:
+            stop()
+            for thread in threads:
+                thread.join()
+        else:
+            threading.Thread(target=stop, name=f"{self.name}-shutdown", daemon=True).start()
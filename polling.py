@@ -0,0 +1,102 @@
+import logging
+from datetime import datetime
+
+from flask import current_app
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Weight of the newest observed gap in the moving average
+GAP_SMOOTHING = 0.3
+
+# Interval growth factor for each check that finds nothing new
+BACKOFF_FACTOR = 1.5
+
+
+def get_polling_bounds():
+    """Get the (min, max) adaptive interval in minutes from the app config"""
+    min_interval = float(current_app.config.get('ADAPTIVE_MIN_INTERVAL', 5))
+    max_interval = float(current_app.config.get('ADAPTIVE_MAX_INTERVAL', 1440))
+    return min_interval, max(min_interval, max_interval)
+
+
+def get_effective_interval(check_frequency, adaptive_interval=None):
+    """
+    Get the interval a feed is actually polled at
+
+    Args:
+        check_frequency: Configured FeedSource.check_frequency (minutes)
+        adaptive_interval: Learned interval from FeedFetchState (minutes)
+
+    Returns:
+        float: Interval in minutes
+    """
+    if current_app.config.get('ADAPTIVE_POLLING') and adaptive_interval:
+        return adaptive_interval
+    return check_frequency or current_app.config.get('CHECK_INTERVAL', 30)
+
+
+def _arrival_gaps(arrivals, previous=None):
+    """Minutes between consecutive arrival times, starting from `previous`"""
+    gaps = []
+    for arrival in sorted(arrivals):
+        if previous is not None:
+            gaps.append(max(0.0, (arrival - previous).total_seconds() / 60))
+        previous = arrival
+    return gaps
+
+
+def observe_check(fetch_state, status, new_item_dates, base_interval, now=None):
+    """
+    Update the adaptive interval of a feed after a check
+
+    New items (by guid) shrink the interval towards half the average gap
+    between arrivals, so a feed is polled about twice per expected item. A
+    burst of several new items at least halves the interval. Checks without
+    new items grow it by BACKOFF_FACTOR. Failed checks leave it unchanged.
+    The result is clamped to ADAPTIVE_MIN_INTERVAL / ADAPTIVE_MAX_INTERVAL.
+
+    Args:
+        fetch_state: FeedFetchState to update in place
+        status: Status of the check (success, warning, not_modified, error)
+        new_item_dates: Publish dates of the items that were not seen before
+        base_interval: Interval to start from (minutes), usually check_frequency
+        now: Current naive UTC datetime
+
+    Returns:
+        float: The new adaptive interval in minutes
+    """
+    now = now or datetime.utcnow()
+    min_interval, max_interval = get_polling_bounds()
+    interval = fetch_state.adaptive_interval or float(base_interval)
+
+    if status == 'error':
+        return interval
+
+    # Publish dates in the future or missing are treated as arriving now
+    arrivals = [min(published_at or now, now) for published_at in new_item_dates]
+
+    if arrivals:
+        gaps = _arrival_gaps(arrivals, fetch_state.last_new_item_at)
+        if gaps:
+            observed_gap = sum(gaps) / len(gaps)
+            if fetch_state.avg_item_gap is None:
+                fetch_state.avg_item_gap = observed_gap
+            else:
+                fetch_state.avg_item_gap = (
+                    GAP_SMOOTHING * observed_gap + (1 - GAP_SMOOTHING) * fetch_state.avg_item_gap
+                )
+
+        latest = max(arrivals)
+        if fetch_state.last_new_item_at is None or latest > fetch_state.last_new_item_at:
+            fetch_state.last_new_item_at = latest
+
+        if fetch_state.avg_item_gap is not None:
+            interval = fetch_state.avg_item_gap / 2
+        if len(arrivals) > 1 and fetch_state.adaptive_interval:
+            interval = min(interval, fetch_state.adaptive_interval / 2)
+    else:
+        interval *= BACKOFF_FACTOR
+
+    fetch_state.adaptive_interval = min(max(interval, min_interval), max_interval)
+    return fetch_state.adaptive_interval
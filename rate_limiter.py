@@ -0,0 +1,263 @@
+import logging
+import threading
+import time
+from urllib.parse import urlparse
+
+from flask import current_app, has_app_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Defaults used when no app config is available (e.g. outside an app context)
+DEFAULT_SETTINGS = {
+    'RATE_LIMIT_ENABLED': True,
+    'RATE_LIMIT_RSSHUB_RATE': 2.0,    # Requests per second to the RSSHub instance
+    'RATE_LIMIT_RSSHUB_BURST': 5,
+    'RATE_LIMIT_HOST_RATE': 1.0,      # Requests per second to every other host
+    'RATE_LIMIT_HOST_BURST': 3,
+    'RATE_LIMIT_OVERRIDES': '',       # "host = rate[/burst]" per line
+}
+
+# Upper bounds (seconds) of the wait time histogram
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_setting(key):
+    """Read a rate limit setting from the app config, falling back to the defaults"""
+    if has_app_context():
+        value = current_app.config.get(key)
+        if value is not None:
+            return value
+    return DEFAULT_SETTINGS[key]
+
+
+def parse_overrides(text):
+    """
+    Parse per-host rate limits
+
+    Args:
+        text: One "host = rate[/burst]" per line, e.g. "example.com = 0.5/2"
+
+    Returns:
+        dict: host -> (rate, burst or None)
+
+    Raises:
+        ValueError: If a line is malformed
+    """
+    overrides = {}
+    for line in (text or '').splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        host, sep, limit = line.partition('=')
+        if not sep or not host.strip():
+            raise ValueError(f"Expected 'host = rate[/burst]', got '{line}'")
+        rate, _, burst = limit.partition('/')
+        rate = float(rate)
+        burst = int(burst) if burst.strip() else None
+        if rate < 0 or (burst is not None and burst < 1):
+            raise ValueError(f"Invalid rate limit for {host.strip()}: '{limit.strip()}'")
+        overrides[host.strip().lower()] = (rate, burst)
+    return overrides
+
+
+def get_host_limit(host):
+    """
+    Get the token bucket settings for a host
+
+    Args:
+        host: Host name (netloc)
+
+    Returns:
+        tuple: (requests per second, burst size), a rate of 0 means unlimited
+    """
+    rsshub_url = current_app.config.get('RSSHUB_BASE_URL') if has_app_context() else None
+    rsshub_host = urlparse(rsshub_url or '').netloc.lower()
+    if rsshub_host and host == rsshub_host:
+        rate = float(get_setting('RATE_LIMIT_RSSHUB_RATE'))
+        burst = int(get_setting('RATE_LIMIT_RSSHUB_BURST'))
+    else:
+        rate = float(get_setting('RATE_LIMIT_HOST_RATE'))
+        burst = int(get_setting('RATE_LIMIT_HOST_BURST'))
+
+    try:
+        overrides = parse_overrides(get_setting('RATE_LIMIT_OVERRIDES'))
+    except ValueError as e:
+        logger.warning(f"Ignoring invalid RATE_LIMIT_OVERRIDES: {str(e)}")
+        overrides = {}
+    if host in overrides:
+        rate, override_burst = overrides[host]
+        burst = override_burst or burst
+
+    return rate, max(1, burst)
+
+
+class TokenBucket:
+    """
+    Token bucket for the requests to one host
+
+    Tokens are added at `rate` per second up to `burst`. Every request takes
+    a token; when none is left the request reserves the next one and waits
+    for it, so waiting threads are served in arrival order.
+    """
+
+    def __init__(self, host, rate, burst):
+        self.host = host
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+        # Wait time metrics
+        self.requests = 0
+        self.waited = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_histogram = [0] * len(WAIT_BUCKETS)
+
+    def configure(self, rate, burst):
+        """Apply changed settings, keeping the tokens already earned"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            self.burst = burst
+            self.tokens = min(self.tokens, float(burst))
+
+    def _refill(self, now):
+        if self.rate > 0:
+            self.tokens = min(float(self.burst), self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def reserve(self):
+        """
+        Take a token, going into debt if the bucket is empty
+
+        Returns:
+            float: Seconds to wait before the request may be sent
+        """
+        with self.lock:
+            if self.rate <= 0:
+                delay = 0.0
+            else:
+                self._refill(time.monotonic())
+                self.tokens -= 1
+                delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self._observe(delay)
+        return delay
+
+    def defer(self, seconds):
+        """Hold every request to the host back for `seconds`, e.g. after a 429"""
+        if self.rate <= 0 or seconds <= 0:
+            return
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+    def _observe(self, delay):
+        self.requests += 1
+        if delay > 0:
+            self.waited += 1
+            self.wait_total += delay
+            self.wait_max = max(self.wait_max, delay)
+        for i, bound in enumerate(WAIT_BUCKETS):
+            if delay <= bound:
+                self.wait_histogram[i] += 1
+                break
+
+    def stats(self):
+        """Get the bucket settings and wait time metrics"""
+        with self.lock:
+            self._refill(time.monotonic())
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(WAIT_BUCKETS, self.wait_histogram):
+                cumulative += count
+                histogram[str(bound)] = cumulative
+            histogram['+Inf'] = self.requests
+            return {
+                'host': self.host,
+                'rate': self.rate,
+                'burst': self.burst,
+                'tokens': round(self.tokens, 2),
+                'requests': self.requests,
+                'waited': self.waited,
+                'wait_seconds_total': round(self.wait_total, 3),
+                'wait_seconds_max': round(self.wait_max, 3),
+                'wait_seconds_avg': round(self.wait_total / self.requests, 3) if self.requests else 0.0,
+                'wait_histogram': histogram,
+            }
+
+
+def get_bucket(host):
+    """Get the bucket of a host, creating or reconfiguring it from the current settings"""
+    rate, burst = get_host_limit(host)
+
+    bucket = _buckets.get(host)
+    if bucket is None:
+        with _buckets_lock:
+            bucket = _buckets.get(host)
+            if bucket is None:
+                bucket = _buckets[host] = TokenBucket(host, rate, burst)
+                return bucket
+
+    if (bucket.rate, bucket.burst) != (rate, burst):
+        bucket.configure(rate, burst)
+    return bucket
+
+
+def acquire(url):
+    """
+    Wait until a request to the host of `url` is allowed
+
+    Limits are per process: every web or scheduler process has its own buckets.
+
+    Args:
+        url: URL about to be requested
+
+    Returns:
+        float: Seconds waited
+    """
+    if not get_setting('RATE_LIMIT_ENABLED'):
+        return 0.0
+
+    host = urlparse(url).netloc.lower()
+    if not host:
+        return 0.0
+
+    delay = get_bucket(host).reserve()
+    if delay > 0:
+        logger.debug(f"Rate limit for {host}: waiting {delay:.2f}s")
+        time.sleep(delay)
+    return delay
+
+
+def defer(url, seconds):
+    """Hold back the next requests to the host of `url` (e.g. on Retry-After)"""
+    if not get_setting('RATE_LIMIT_ENABLED'):
+        return
+    host = urlparse(url).netloc.lower()
+    if host:
+        get_bucket(host).defer(seconds)
+
+
+def get_rate_limit_stats():
+    """
+    Get the wait time metrics of every host requested so far
+
+    Returns:
+        list: Bucket stats (see TokenBucket.stats), slowest hosts first
+    """
+    with _buckets_lock:
+        buckets = list(_buckets.values())
+    stats = [bucket.stats() for bucket in buckets]
+    return sorted(stats, key=lambda s: s['wait_seconds_total'], reverse=True)
+
+
+def reset_rate_limits():
+    """Forget every bucket and its metrics"""
+    with _buckets_lock:
+        _buckets.clear()
@@ -0,0 +1,204 @@
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from models import db, FetchLog, FetchLogRollup
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bucket sizes, both are built from raw logs
+PERIODS = ('hour', 'day')
+
+# Raw logs deleted per transaction, so pruning never holds a long write lock
+PRUNE_BATCH_SIZE = 5000
+
+SUCCESS_STATUSES = ('success', 'not_modified')
+
+
+def get_bucket_start(moment, period):
+    """Start of the hour or day bucket a time falls in"""
+    if period == 'hour':
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers, None if it is empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(rows):
+    """
+    Aggregate raw log rows into rollup fields
+
+    Args:
+        rows: (status, fetch_duration, quality_score, item_count) tuples
+
+    Returns:
+        dict: FetchLogRollup fields
+    """
+    durations = [duration for _, duration, _, _ in rows if duration is not None]
+    scores = [score for _, _, score, _ in rows if score is not None]
+    return {
+        'check_count': len(rows),
+        'success_count': sum(1 for status, _, _, _ in rows if status in SUCCESS_STATUSES),
+        'duration_avg': sum(durations) / len(durations) if durations else None,
+        'duration_p95': percentile(durations, 0.95),
+        'quality_avg': sum(scores) / len(scores) if scores else None,
+        'quality_count': len(scores),
+        'item_count_avg': sum(item_count or 0 for _, _, _, item_count in rows) / len(rows),
+    }
+
+
+def rollup_day(day_start):
+    """
+    Rebuild the hourly and daily rollups of every feed for one day (not committed)
+
+    Args:
+        day_start: Midnight (UTC) of the day
+
+    Returns:
+        int: Number of buckets written
+    """
+    day_end = day_start + timedelta(days=1)
+    rows = db.session.query(
+        FetchLog.feed_source_id,
+        FetchLog.fetched_at,
+        FetchLog.status,
+        FetchLog.fetch_duration,
+        FetchLog.quality_score,
+        FetchLog.item_count
+    ).filter(
+        FetchLog.fetched_at >= day_start,
+        FetchLog.fetched_at < day_end
+    ).all()
+
+    buckets = defaultdict(list)
+    for feed_source_id, fetched_at, *values in rows:
+        for period in PERIODS:
+            buckets[(feed_source_id, period, get_bucket_start(fetched_at, period))].append(tuple(values))
+
+    FetchLogRollup.query.filter(
+        FetchLogRollup.bucket_start >= day_start,
+        FetchLogRollup.bucket_start < day_end
+    ).delete(synchronize_session=False)
+    db.session.bulk_insert_mappings(FetchLogRollup, [
+        dict(feed_source_id=feed_source_id, period=period, bucket_start=bucket_start, **summarize(values))
+        for (feed_source_id, period, bucket_start), values in buckets.items()
+    ])
+    return len(buckets)
+
+
+def get_rolled_up_until():
+    """Start of the newest daily bucket, the day the next rollup starts from (None before the first)"""
+    return db.session.query(db.func.max(FetchLogRollup.bucket_start)).filter(
+        FetchLogRollup.period == 'day'
+    ).scalar()
+
+
+def rollup_fetch_logs(now=None):
+    """
+    Bring the rollups up to date (committed)
+
+    Starts at the newest rolled-up day, which may have received logs since,
+    and rebuilds every day up to today, one transaction per day. The first
+    run rolls up the whole log history.
+
+    Returns:
+        int: Number of days rebuilt
+    """
+    now = now or datetime.utcnow()
+    start = get_rolled_up_until()
+    if start is None:
+        start = db.session.query(db.func.min(FetchLog.fetched_at)).scalar()
+        if start is None:
+            return 0
+    day = get_bucket_start(start, 'day')
+    today = get_bucket_start(now, 'day')
+
+    days = 0
+    while day <= today:
+        rollup_day(day)
+        db.session.commit()
+        day += timedelta(days=1)
+        days += 1
+    return days
+
+
+def prune_fetch_logs(now=None):
+    """
+    Delete raw logs older than FETCH_LOG_RETENTION_DAYS and hourly rollups
+    older than HOURLY_ROLLUP_RETENTION_DAYS (committed)
+
+    Raw logs are only deleted once their day has been rolled up. A retention
+    of 0 keeps everything.
+
+    Returns:
+        tuple: (raw logs deleted, hourly rollups deleted)
+    """
+    now = now or datetime.utcnow()
+    deleted_logs = deleted_rollups = 0
+
+    retention_days = int(current_app.config.get('FETCH_LOG_RETENTION_DAYS', 14))
+    rolled_up_until = get_rolled_up_until()
+    if retention_days > 0 and rolled_up_until is not None:
+        cutoff = min(now - timedelta(days=retention_days), rolled_up_until)
+        while True:
+            ids = [log_id for (log_id,) in db.session.query(FetchLog.id).filter(
+                FetchLog.fetched_at < cutoff
+            ).limit(PRUNE_BATCH_SIZE).all()]
+            if not ids:
+                break
+            FetchLog.query.filter(FetchLog.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            deleted_logs += len(ids)
+
+    hourly_retention_days = int(current_app.config.get('HOURLY_ROLLUP_RETENTION_DAYS', 90))
+    if hourly_retention_days > 0:
+        deleted_rollups = FetchLogRollup.query.filter(
+            FetchLogRollup.period == 'hour',
+            FetchLogRollup.bucket_start < now - timedelta(days=hourly_retention_days)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    return deleted_logs, deleted_rollups
+
+
+def run_rollups(app):
+    """Roll up new logs, then apply retention (scheduled every ROLLUP_INTERVAL_MINUTES)"""
+    with app.app_context():
+        try:
+            days = rollup_fetch_logs()
+            deleted_logs, deleted_rollups = prune_fetch_logs()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error rolling up fetch logs: {str(e)}")
+            return None
+    if deleted_logs or deleted_rollups:
+        logger.info(f"Rolled up {days} days of fetch logs, pruned {deleted_logs} logs and {deleted_rollups} hourly rollups")
+    return days, deleted_logs, deleted_rollups
+
+
+def get_rollups(feed_source_id, period='day', since=None):
+    """
+    Get a feed's rollups in time order
+
+    Args:
+        feed_source_id: Feed ID
+        period: 'hour' or 'day'
+        since: Earliest bucket start, or None for all
+
+    Returns:
+        list: FetchLogRollup objects
+    """
+    query = FetchLogRollup.query.filter_by(feed_source_id=feed_source_id, period=period)
+    if since is not None:
+        query = query.filter(FetchLogRollup.bucket_start >= get_bucket_start(since, period))
+    return query.order_by(FetchLogRollup.bucket_start).all()
@@ -0,0 +1,153 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from flask import current_app
+
+from utils import validate_rsshub_route
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Most results kept in the cache, the oldest are dropped first
+CACHE_MAX_ENTRIES = 5000
+
+_cache = {}                                   # (base URL, route) -> (expires_at, valid, message, checked_at)
+_cache_lock = threading.Lock()
+
+
+def normalize_route(route):
+    """Strip whitespace and the leading slash, so equal routes share a cache entry"""
+    return (route or '').strip().lstrip('/')
+
+
+def _cache_key(route):
+    return (current_app.config.get('RSSHUB_BASE_URL'), route)
+
+
+def get_cached_result(route):
+    """
+    Get a validation result from the last ROUTE_VALIDATION_CACHE_SECONDS
+
+    Returns:
+        dict: Result (see validate_route) or None if the route was not validated recently
+    """
+    key = _cache_key(route)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        expires_at, valid, message, checked_at = entry
+        if expires_at <= time.monotonic():
+            del _cache[key]
+            return None
+    return {
+        'route': route,
+        'valid': valid,
+        'message': message,
+        'cached': True,
+        'checked_seconds_ago': round(time.time() - checked_at, 1),
+        'duration': 0.0,
+    }
+
+
+def store_result(route, valid, message):
+    """Cache a validation result for ROUTE_VALIDATION_CACHE_SECONDS"""
+    ttl = int(current_app.config.get('ROUTE_VALIDATION_CACHE_SECONDS', 300))
+    if ttl <= 0:
+        return
+    key = _cache_key(route)
+    with _cache_lock:
+        _cache.pop(key, None)
+        _cache[key] = (time.monotonic() + ttl, valid, message, time.time())
+        # Dicts keep insertion order, so the first entries are the oldest
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            del _cache[next(iter(_cache))]
+
+
+def validate_route(route, use_cache=True):
+    """
+    Validate a route with validate_rsshub_route, through the result cache
+
+    Args:
+        route: RSSHub route (or custom/... route)
+        use_cache: Whether a recent result may be returned instead of a new request
+
+    Returns:
+        dict: route, valid, message, cached, checked_seconds_ago and duration
+    """
+    route = normalize_route(route)
+    if use_cache:
+        cached = get_cached_result(route)
+        if cached is not None:
+            return cached
+
+    start = time.time()
+    try:
+        valid, message = validate_rsshub_route(route)
+    except Exception as e:
+        logger.error(f"Error validating route {route}: {str(e)}")
+        valid, message = False, f"Validation error: {str(e)}"
+    store_result(route, valid, message)
+    return {
+        'route': route,
+        'valid': valid,
+        'message': message,
+        'cached': False,
+        'checked_seconds_ago': 0.0,
+        'duration': round(time.time() - start, 3),
+    }
+
+
+def validate_routes(app, routes, max_workers=None, use_cache=True):
+    """
+    Validate many routes concurrently, yielding each result as soon as it is known
+
+    Cached results come first, the other routes are probed by at most
+    `max_workers` threads at once and yielded in the order they complete.
+    Requests still go through the rate limiter, so a long list does not
+    flood the RSSHub instance.
+
+    Args:
+        app: Flask app
+        routes: Routes to validate, duplicates are validated once
+        max_workers: Concurrent probes (defaults to ROUTE_VALIDATION_WORKERS)
+        use_cache: Whether recent results may be reused
+
+    Yields:
+        dict: One result per distinct route, see validate_route
+    """
+    routes = list(dict.fromkeys(normalize_route(route) for route in routes if normalize_route(route)))
+
+    pending = []
+    with app.app_context():
+        max_workers = max(1, int(max_workers or app.config.get('ROUTE_VALIDATION_WORKERS', 8)))
+        for route in routes:
+            cached = get_cached_result(route) if use_cache else None
+            if cached is not None:
+                yield cached
+            else:
+                pending.append(route)
+
+    if not pending:
+        return
+
+    def probe(route):
+        with app.app_context():
+            return validate_route(route, use_cache=False)
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(pending)), thread_name_prefix='route-validate')
+    try:
+        futures = [executor.submit(probe, route) for route in pending]
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        # The client may disconnect mid-stream, routes not started yet are dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def clear_validation_cache():
+    """Forget every cached result"""
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,319 @@
+import heapq
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timezone
+
+from circuit_breaker import get_circuit_blocks, PROBE_TIMEOUT
+from job_queue import enqueue_checks, use_job_queue
+from models import db, FeedSource, FeedFetchState, FeedStatus
+from polling import get_effective_interval
+from utils import get_feed_host, get_check_pipeline, submit_feed_check
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Golden ratio conjugate, spreads feed phases evenly over their interval
+PHASE_STEP = 0.6180339887
+
+
+class FeedScheduler:
+    """
+    Per-feed scheduler backed by a priority queue of next-due times
+
+    Every active feed is checked on its own `check_frequency` (falling back to
+    CHECK_INTERVAL), or on its learned interval when adaptive polling is on. `tick()` is called periodically (by APScheduler) and
+    hands due feeds to the check pipeline while it has room, respecting the
+    per-host limit on fetches and never starting a feed that is still
+    running. The next due time is set when a check finishes. Feeds whose feed or host circuit is open are
+    pushed back to the circuit's retry time without any network I/O, and a
+    tripped host gets a single probe at a time.
+
+    With CHECK_MODE=queue the scheduler does no fetching: due feeds are added
+    to the DB job queue for `flask run-worker` processes and rescheduled right
+    away. Feeds that still have a queued or running job are not queued again.
+    """
+
+    def __init__(self, app, max_workers=None, per_host_limit=None):
+        self.app = app
+        self.use_queue = use_job_queue(app)
+        # Inline checks go through the app's check pipeline, as many at once as it holds
+        self._pipeline = None if self.use_queue else get_check_pipeline(app)
+        self.max_workers = max(1, int(max_workers or (self._pipeline.capacity if self._pipeline else app.config.get('CHECK_WORKERS', 8))))
+        self.per_host_limit = max(1, int(per_host_limit or app.config.get('CHECK_PER_HOST_LIMIT', 4)))
+
+        self._heap = []                       # (due_at, feed_id), may hold stale entries
+        self._entries = {}                    # feed_id -> {'due_at', 'interval', 'host', 'last_run', 'blocked'}
+        self._running = {}                    # feed_id -> started_at
+        self._active_per_host = defaultdict(int)
+        self._feed_blocks = {}                # feed_id -> timestamp until which its circuit holds it back
+        self._host_blocks = {}                # host -> timestamp, in the past when a probe may run
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._last_tick = None
+
+    def get_interval(self, feed_source, adaptive_interval=None):
+        """Get the check interval for a feed in seconds"""
+        minutes = get_effective_interval(feed_source.check_frequency, adaptive_interval)
+        return max(60, int(round(float(minutes) * 60)))
+
+    def _initial_due(self, feed_id, interval, last_check, now):
+        """
+        Pick the first due time for a feed that just entered the queue
+
+        Feeds checked recently keep their natural cadence. Overdue and new
+        feeds get a stable phase within their interval so a restart does not
+        fire every feed at once.
+        """
+        if last_check is not None:
+            due_at = last_check + interval
+            if due_at > now:
+                return due_at
+        phase = (feed_id * PHASE_STEP) % 1.0
+        return now + phase * interval
+
+    def _blocked_until(self, feed_id, host):
+        """Timestamp until which the feed's or host's circuit holds a feed back (0 if none)"""
+        return max(self._feed_blocks.get(feed_id, 0), self._host_blocks.get(host, 0))
+
+    def _push(self, feed_id, due_at):
+        self._entries[feed_id]['due_at'] = due_at
+        heapq.heappush(self._heap, (due_at, feed_id))
+
+    def sync(self):
+        """Reconcile the queue with the active feeds in the database"""
+        sources = FeedSource.query.filter_by(is_active=True).all()
+        rsshub_base_url = self.app.config.get('RSSHUB_BASE_URL')
+        now = time.time()
+        
+        adaptive_intervals = {}
+        if self.app.config.get('ADAPTIVE_POLLING'):
+            adaptive_intervals = dict(db.session.query(
+                FeedFetchState.feed_source_id,
+                FeedFetchState.adaptive_interval
+            ).all())
+
+        feed_blocks, host_blocks = get_circuit_blocks()
+        
+        with self._lock:
+            new_ids = [source.id for source in sources if source.id not in self._entries]
+
+        last_checks = {}
+        if new_ids:
+            rows = db.session.query(
+                FeedStatus.feed_source_id,
+                FeedStatus.last_check_at
+            ).filter(
+                FeedStatus.feed_source_id.in_(new_ids)
+            ).all()
+            # fetched_at is stored as naive UTC
+            last_checks = {
+                feed_id: fetched_at.replace(tzinfo=timezone.utc).timestamp()
+                for feed_id, fetched_at in rows if fetched_at
+            }
+
+        with self._lock:
+            active_ids = set()
+            for source in sources:
+                active_ids.add(source.id)
+                interval = self.get_interval(source, adaptive_intervals.get(source.id))
+                host = get_feed_host(source, rsshub_base_url)
+                entry = self._entries.get(source.id)
+
+                if entry is None:
+                    self._entries[source.id] = {'due_at': None, 'interval': interval, 'host': host, 'last_run': None, 'blocked': False}
+                    due_at = self._initial_due(source.id, interval, last_checks.get(source.id), now)
+                    self._push(source.id, due_at)
+                else:
+                    entry['host'] = host
+                    if entry['interval'] != interval:
+                        entry['interval'] = interval
+                        # Running feeds pick up the new interval when they finish
+                        if source.id not in self._running:
+                            if entry['last_run'] is not None:
+                                # Re-base the next check on the new interval
+                                self._push(source.id, max(entry['last_run'] + interval, now))
+                            elif entry['due_at'] > now + interval:
+                                # Pull the check forward if the new interval is shorter
+                                self._push(source.id, now + interval)
+
+            # Forget feeds that were deleted or deactivated, stale heap entries are skipped
+            for feed_id in list(self._entries):
+                if feed_id not in active_ids:
+                    del self._entries[feed_id]
+            
+            # Circuit times are stored as naive UTC
+            self._feed_blocks = {
+                feed_id: until.replace(tzinfo=timezone.utc).timestamp() for feed_id, until in feed_blocks.items()
+            }
+            self._host_blocks = {
+                host: until.replace(tzinfo=timezone.utc).timestamp() for host, until in host_blocks.items()
+            }
+            
+            # Feeds held back by a circuit follow it when it closes, probes or re-opens
+            for feed_id, entry in self._entries.items():
+                if entry['blocked'] and feed_id not in self._running:
+                    blocked_until = self._blocked_until(feed_id, entry['host'])
+                    if blocked_until != entry['due_at']:
+                        entry['blocked'] = blocked_until > now
+                        self._push(feed_id, max(blocked_until, now))
+
+    def tick(self):
+        """Start checks for every due feed that has worker and host capacity"""
+        with self.app.app_context():
+            try:
+                self.sync()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error syncing feed schedule: {str(e)}")
+
+        now = time.time()
+        deferred = []
+        enqueued = []
+        started = []
+
+        with self._lock:
+            self._last_tick = now
+
+            while not self._stopped and self._heap and self._heap[0][0] <= now and len(self._running) < self.max_workers:
+                due_at, feed_id = heapq.heappop(self._heap)
+                entry = self._entries.get(feed_id)
+
+                # Skip stale heap entries and feeds that are still running
+                if entry is None or entry['due_at'] != due_at or feed_id in self._running:
+                    continue
+
+                host = entry['host']
+                
+                # Open circuits push the feed back to their retry time
+                blocked_until = self._blocked_until(feed_id, host)
+                if blocked_until > now:
+                    entry['blocked'] = True
+                    self._push(feed_id, blocked_until)
+                    continue
+                
+                if self.use_queue:
+                    if host in self._host_blocks:
+                        self._host_blocks[host] = now + PROBE_TIMEOUT.total_seconds()
+                    entry['blocked'] = False
+                    entry['last_run'] = now
+                    self._push(feed_id, now + entry['interval'])
+                    enqueued.append(feed_id)
+                    continue
+                
+                if self._active_per_host[host] >= self.per_host_limit:
+                    deferred.append((due_at, feed_id))
+                    continue
+                
+                # A tripped host is probed by one feed, the others wait for its result
+                if host in self._host_blocks:
+                    self._host_blocks[host] = now + PROBE_TIMEOUT.total_seconds()
+                entry['blocked'] = False
+
+                self._running[feed_id] = now
+                self._active_per_host[host] += 1
+                started.append((feed_id, host))
+
+            # Host-limited feeds keep their place in the queue for the next tick
+            for item in deferred:
+                heapq.heappush(self._heap, item)
+
+        if enqueued:
+            self._enqueue(enqueued)
+        
+        # Submitted outside the lock, a backed-up pipeline blocks the tick until it has room
+        for feed_id, host in started:
+            if self._stopped:
+                self._on_done(feed_id, host, now, fetched=False)
+                continue
+            try:
+                future = submit_feed_check(
+                    self.app, feed_id, on_fetched=lambda check, host=host: self._on_fetched(host)
+                )
+            except Exception as e:
+                # Release the feed and its host slot, or the feed is never checked again
+                logger.error(f"Error starting check of feed {feed_id}: {str(e)}")
+                self._on_done(feed_id, host, now, fetched=False)
+                continue
+            future.add_done_callback(
+                lambda f, feed_id=feed_id, started=now: self._on_done(feed_id, None, started)
+            )
+
+    def _enqueue(self, feed_ids):
+        """Hand due feeds to the job queue, retrying on the next tick if the DB is unavailable"""
+        with self.app.app_context():
+            try:
+                queued = enqueue_checks(feed_ids, source='scheduler')
+                logger.info(f"Queued {len(queued)} feed checks ({len(feed_ids) - len(queued)} already queued)")
+                return
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Error queueing feed checks: {str(e)}")
+
+        with self._lock:
+            now = time.time()
+            for feed_id in feed_ids:
+                if feed_id in self._entries:
+                    self._push(feed_id, now)
+
+    def _on_fetched(self, host):
+        """Free the host's slot once a check is past the fetch stage"""
+        with self._lock:
+            self._active_per_host[host] -= 1
+
+    def _on_done(self, feed_id, host, started, fetched=True):
+        """Reschedule a feed once its check has finished"""
+        with self._lock:
+            self._running.pop(feed_id, None)
+            if not fetched:
+                self._active_per_host[host] -= 1
+
+            entry = self._entries.get(feed_id)
+            if entry is not None:
+                entry['last_run'] = started
+                self._push(feed_id, max(started + entry['interval'], time.time()))
+
+    def status(self):
+        """
+        Get a snapshot of the queue
+
+        Returns:
+            dict: Queue depth, due and running counts, lag and next due time
+        """
+        now = time.time()
+        pipeline = self._pipeline.stats() if self._pipeline is not None else None
+        with self._lock:
+            due_times = [
+                entry['due_at'] for feed_id, entry in self._entries.items()
+                if feed_id not in self._running
+            ]
+            overdue = [due_at for due_at in due_times if due_at <= now]
+
+            return {
+                'queue_depth': len(self._entries),
+                'due': len(overdue),
+                'running': len(self._running),
+                'mode': 'queue' if self.use_queue else 'inline',
+                'max_workers': self.max_workers,
+                'per_host_limit': self.per_host_limit,
+                'lag_seconds': round(now - min(overdue), 1) if overdue else 0,
+                'next_due': min(due_times) if due_times else None,
+                'last_tick': self._last_tick,
+                'pipeline': pipeline,
+            }
+
+    def shutdown(self, wait=False):
+        """
+        Stop handing out work, running checks finish in the background
+
+        The check pipeline belongs to the app and keeps running for other
+        callers (e.g. check_all_feeds), with `wait` this waits until it
+        has finished this scheduler's checks.
+        """
+        self._stopped = True
+        while wait:
+            with self._lock:
+                if not self._running:
+                    break
+            time.sleep(0.1)
@@ -0,0 +1,74 @@
+import logging
+
+from sqlalchemy import event
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def get_sqlite_pragmas(config):
+    """
+    PRAGMAs applied to every SQLite connection, from the SQLITE_* settings
+
+    - journal_mode=WAL: readers no longer block the writer or each other
+    - synchronous=NORMAL: in WAL mode still safe against application
+      crashes, only a power loss can lose the last commits
+    - busy_timeout: a writer waits for the lock instead of failing at once
+      with "database is locked"
+    - mmap_size / cache_size: read pages through a memory map and keep more
+      of the database cached per connection
+
+    Returns:
+        list: (name, value) pairs in the order they are applied
+    """
+    return [
+        ('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))),
+        ('mmap_size', int(config.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))),
+        # A negative cache_size is in KiB rather than pages
+        ('cache_size', -int(config.get('SQLITE_CACHE_SIZE_KB', 64 * 1024))),
+    ]
+
+
+def configure_sqlite(app, engine):
+    """
+    Apply the SQLite production profile to every new connection of an engine
+
+    Does nothing for other databases or when SQLITE_TUNING is off.
+
+    Args:
+        app: Flask app
+        engine: SQLAlchemy engine of the app
+    """
+    if engine.dialect.name != 'sqlite' or not app.config.get('SQLITE_TUNING', True):
+        return
+
+    pragmas = get_sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    logger.debug(f"SQLite connections use {', '.join(f'{name}={value}' for name, value in pragmas)}")
+
+
+def get_sqlite_settings(engine):
+    """
+    Read back the PRAGMAs a connection of the engine actually uses
+
+    Returns:
+        dict: PRAGMA name -> value, empty for other databases
+    """
+    if engine.dialect.name != 'sqlite':
+        return {}
+    settings = {}
+    with engine.connect() as conn:
+        for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size'):
+            settings[name] = conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+    return settings
@@ -0,0 +1,75 @@
+import logging
+import uuid
+
+from models import db, SystemSettings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# SystemSettings row changed on every save, processes reload their settings when it does
+VERSION_KEY = 'SETTINGS_VERSION'
+
+
+def parse_setting(key, value):
+    """Convert a stored SystemSettings value to its config type"""
+    if key in ('CHECK_INTERVAL', 'ADAPTIVE_MIN_INTERVAL', 'ADAPTIVE_MAX_INTERVAL',
+               'RATE_LIMIT_RSSHUB_BURST', 'RATE_LIMIT_HOST_BURST'):
+        return int(value)
+    if key in ('RATE_LIMIT_RSSHUB_RATE', 'RATE_LIMIT_HOST_RATE'):
+        return float(value)
+    if key in ('ADAPTIVE_POLLING', 'RATE_LIMIT_ENABLED'):
+        return value in ('True', 'true', '1')
+    return value
+
+
+def load_settings(app):
+    """Load settings from the database into the app config"""
+    with app.app_context():
+        version = None
+        for setting in SystemSettings.query.all():
+            if setting.key == VERSION_KEY:
+                version = setting.value
+            else:
+                app.config[setting.key] = parse_setting(setting.key, setting.value)
+        app.extensions['settings_version'] = version
+
+
+def bump_settings_version(app):
+    """
+    Add a new settings version to the session
+
+    Call it with the settings changes, before committing them. Other
+    processes reload their settings once they see the new version.
+    """
+    version = uuid.uuid4().hex
+    setting = SystemSettings.query.filter_by(key=VERSION_KEY).first()
+    if setting:
+        setting.value = version
+    else:
+        db.session.add(SystemSettings(key=VERSION_KEY, value=version))
+    app.extensions['settings_version'] = version
+
+
+def refresh_settings(app):
+    """
+    Reload the settings if they were saved since this process loaded them
+
+    Settings are saved through a single process (the one that handled the
+    settings form), every other process calls this periodically.
+
+    Returns:
+        bool: Whether the settings were reloaded
+    """
+    with app.app_context():
+        try:
+            setting = SystemSettings.query.filter_by(key=VERSION_KEY).first()
+            version = setting.value if setting else None
+            if version == app.extensions.get('settings_version'):
+                return False
+            load_settings(app)
+            logger.info("Settings changed, reloaded them from the database")
+            return True
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Error refreshing settings: {str(e)}")
+            return False
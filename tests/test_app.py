@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+import app as app_module
+from migrations import upgrade
+from models import db, SystemSettings
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Test client of an app built by create_app, without a scheduler"""
+    monkeypatch.setattr(app_module, 'init_scheduler', lambda app: None)
+    app = app_module.create_app({
+        'TESTING': True,
+        'WTF_CSRF_ENABLED': False,
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + str(tmp_path / 'app.db'),
+    })
+    with app.app_context():
+        upgrade()
+    yield app.test_client()
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.mark.parametrize('path', ['/', '/feeds', '/source-builder', '/feed/add', '/alerts', '/settings'])
+def test_navigation_marks_the_current_page(client, path):
+    page = client.get(path).get_data(as_text=True)
+
+    assert re.findall(r'nav-link active" href="([^"]+)"', page) == [path]
+
+
+def test_saving_settings_bumps_the_settings_version(client):
+    response = client.post('/settings', data={
+        'rsshub_base_url': 'http://rsshub.example', 'check_interval': 45,
+        'adaptive_min_interval': 5, 'adaptive_max_interval': 1440,
+        'rate_limit_rsshub_rate': 2, 'rate_limit_rsshub_burst': 5,
+        'rate_limit_host_rate': 0.5, 'rate_limit_host_burst': 3,
+    })
+
+    assert response.status_code == 302
+    app = client.application
+    with app.app_context():
+        stored = {setting.key: setting.value for setting in SystemSettings.query.all()}
+    assert stored['CHECK_INTERVAL'] == '45'
+    assert stored['SETTINGS_VERSION'] == app.extensions['settings_version']
+    assert app.config['RATE_LIMIT_HOST_RATE'] == 0.5
@@ -0,0 +1,66 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from content_analysis import analyze_content
+
+LONG_TEXT = 'word ' * 60
+
+
+@pytest.mark.parametrize('content', [
+    '<p>Hello <b>world</b>, <a href="/x">link</a> &amp; more</p>',
+    '<div><p>One</p>\n<p>Two<br>Three</p></div> tail',
+    'plain text without markup',
+    '<ul><li>a</li><li>b <i>c</i></li></ul><!-- comment -->after',
+    '<p>café — \U0001F600</p>',
+])
+def test_text_matches_beautifulsoup(content):
+    # The analysis used to be done with BeautifulSoup, stored word counts must not shift
+    expected = BeautifulSoup(content, 'html.parser').get_text()
+
+    analysis = analyze_content(content)
+
+    assert analysis['text'] == expected
+    assert analysis['text_length'] == len(expected)
+
+
+def test_scripts_and_styles_are_not_text():
+    analysis = analyze_content('<p>Visible</p><script>var hidden = 1;</script><style>p { color: red }</style>')
+
+    assert analysis['text'] == 'Visible'
+    assert analysis['word_count'] == 1
+
+
+def test_image_order():
+    content = '<p>x</p><img src="inline.jpg"><img src="second.jpg">'
+
+    assert analyze_content(content)['first_image'] == 'inline.jpg'
+    assert analyze_content(content)['image_url'] == 'inline.jpg'
+    assert analyze_content(content, preferred_image='media.jpg')['image_url'] == 'media.jpg'
+    assert analyze_content('<p>x</p>', fallback_image='thumb.jpg')['image_url'] == 'thumb.jpg'
+    assert analyze_content('<img alt="no src"><img src="later.jpg">')['image_url'] is None
+
+
+def test_quality_issues():
+    assert analyze_content('<p>short</p>', title='Short')['quality_issues'] == [
+        'short_title', 'short_content', 'no_image'
+    ]
+    analysis = analyze_content(f'<p>{LONG_TEXT}</p><img src="a.jpg">', title='A long enough title')
+    assert analysis['quality_issues'] == []
+    assert analysis['has_full_content'] is True
+    assert analysis['word_count'] == 60
+
+
+@pytest.mark.parametrize('content', [None, '', '   '])
+def test_empty_content(content):
+    analysis = analyze_content(content, title='A long enough title')
+
+    assert analysis['text'] == ''
+    assert analysis['word_count'] == 0
+    assert analysis['has_full_content'] is False
+    assert 'short_content' in analysis['quality_issues']
+
+
+def test_document_with_xml_declaration():
+    analysis = analyze_content('<?xml version="1.0" encoding="utf-8"?><html><body><p>Body text</p></body></html>')
+
+    assert analysis['text'] == 'Body text'
@@ -0,0 +1,140 @@
+from datetime import datetime
+
+import pytest
+
+from models import db, FeedSource, FeedItem, FeedStatus, FetchLog
+from utils import add_fetch_log, fetch_and_parse_feed, hash_body, is_body_unchanged, save_feed_items
+
+RSS = '''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>First item</title><link>http://example.com/1</link><guid>1</guid>
+<description>Hello</description><pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate></item>
+<item><title>{title}</title><link>http://example.com/2</link><guid>2</guid>
+<description>World</description><pubDate>Tue, 02 Jan 2024 10:00:00 GMT</pubDate></item>
+</channel></rss>'''
+
+
+@pytest.fixture
+def feed(app):
+    feed = FeedSource(name='Feed', rsshub_route='test/feed')
+    db.session.add(feed)
+    db.session.commit()
+    return feed
+
+
+def make_item(guid, **fields):
+    item = {
+        'title': f'Item {guid}',
+        'link': f'http://example.com/{guid}',
+        'guid': guid,
+        'description': f'About {guid}',
+        'content': f'<p>Body of {guid}</p>',
+        'author': 'Author',
+        'image_url': None,
+        'published_at': datetime(2024, 1, 1, 12, 0),
+    }
+    item.update(fields)
+    return item
+
+
+def save(feed, items):
+    result = save_feed_items(feed, items)
+    db.session.commit()
+    return result
+
+
+def test_new_items_are_inserted(feed):
+    counts, new_items = save(feed, [make_item('a'), make_item('b')])
+
+    assert counts == {'new': 2, 'updated': 0, 'unchanged': 0}
+    assert [item['guid'] for item in new_items] == ['a', 'b']
+    assert FeedItem.query.filter_by(feed_source_id=feed.id).count() == 2
+
+
+def test_unchanged_items_keep_their_row(feed):
+    save(feed, [make_item('a')])
+    stored = FeedItem.query.filter_by(guid='a').one()
+    row_id, fetched_at = stored.id, stored.fetched_at
+
+    counts, new_items = save(feed, [make_item('a')])
+
+    assert counts == {'new': 0, 'updated': 0, 'unchanged': 1}
+    assert new_items == []
+    stored = FeedItem.query.filter_by(guid='a').one()
+    assert (stored.id, stored.fetched_at) == (row_id, fetched_at)
+
+
+def test_changed_items_are_updated_in_place(feed):
+    save(feed, [make_item('a'), make_item('b')])
+    row_id = FeedItem.query.filter_by(guid='a').one().id
+
+    counts, new_items = save(feed, [make_item('a', description='Edited'), make_item('b'), make_item('c')])
+
+    assert counts == {'new': 1, 'updated': 1, 'unchanged': 1}
+    assert [item['guid'] for item in new_items] == ['c']
+    stored = FeedItem.query.filter_by(guid='a').one()
+    assert stored.id == row_id
+    assert stored.description == 'Edited'
+
+
+def test_items_without_guid_are_keyed_by_link(feed):
+    counts, _ = save(feed, [make_item(None, link='http://example.com/x'), make_item(None, link='http://example.com/x')])
+
+    assert counts['new'] == 1
+    assert FeedItem.query.one().guid == 'http://example.com/x'
+
+
+def test_replace_mode_rewrites_every_item(app, feed):
+    app.config['INCREMENTAL_INGEST'] = False
+    save(feed, [make_item('a'), make_item('old')])
+
+    counts, new_items = save(feed, [make_item('a'), make_item('b')])
+
+    assert counts == {'new': 1, 'updated': 0, 'unchanged': 1}
+    assert [item['guid'] for item in new_items] == ['b']
+    assert sorted(item.guid for item in FeedItem.query.all()) == ['a', 'b']
+
+
+def test_body_hash_matches_only_the_same_url():
+    assert not is_body_unchanged(None, 'http://a', hash_body(b'x'))
+
+    class State:
+        url = 'http://a'
+        body_hash = hash_body(b'x')
+
+    state = State()
+    assert is_body_unchanged(state, 'http://a', hash_body(b'x'))
+    assert is_body_unchanged(state, 'http://a', hash_body('x'))
+    assert not is_body_unchanged(state, 'http://a', hash_body(b'y'))
+    assert not is_body_unchanged(state, 'http://b', hash_body(b'x'))
+
+
+def test_unchanged_body_skips_parsing(app, feed, feed_server):
+    app.config['RSSHUB_BASE_URL'] = feed_server.url
+    feed_server.pages['/test/feed'] = RSS.format(title='Second item').encode('utf-8')
+
+    assert fetch_and_parse_feed(feed)[0] == 'success'
+    status, _, entries, item_count = fetch_and_parse_feed(feed)
+    assert (status, entries, item_count) == ('not_modified', None, 2)
+
+    feed_server.pages['/test/feed'] = RSS.format(title='Second item, edited').encode('utf-8')
+    assert fetch_and_parse_feed(feed)[0] == 'success'
+
+    logs = FetchLog.query.filter_by(feed_source_id=feed.id).order_by(FetchLog.id).all()
+    assert [log.status for log in logs] == ['success', 'not_modified', 'success']
+    assert (logs[2].new_items, logs[2].updated_items, logs[2].unchanged_items) == (0, 1, 1)
+
+
+def test_fetch_logs_keep_the_latest_status(feed):
+    add_fetch_log(feed, status='error', http_status=500, item_count=0)
+    db.session.commit()
+    first = FeedStatus.query.one()
+    assert (first.status, first.http_status) == ('error', 500)
+
+    log = add_fetch_log(feed, status='success', http_status=200, item_count=2, quality_score=80.0)
+    db.session.commit()
+
+    latest = FeedStatus.query.one()
+    assert (latest.status, latest.http_status, latest.item_count, latest.quality_score) == ('success', 200, 2, 80.0)
+    assert latest.last_check_at == log.fetched_at
+    assert FetchLog.query.count() == 2
@@ -0,0 +1,119 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+import item_archive
+from item_archive import (
+    INDEX_FILE, append_block, archive_feed_items, delete_feed_archive, get_archive_dir, get_archive_stats,
+    get_archived_items, item_to_record, read_index
+)
+from models import db, FeedSource, FeedItem
+
+START = datetime(2024, 1, 1, 12, 0)
+NOW = datetime(2024, 6, 1)
+
+
+@pytest.fixture
+def feed(app, tmp_path):
+    app.config.update(ITEM_ARCHIVE_DIR=str(tmp_path / 'archive'), ITEM_ARCHIVE_KEEP_ITEMS=2, ITEM_ARCHIVE_KEEP_DAYS=30)
+    feed = FeedSource(name='Feed', rsshub_route='test/feed')
+    db.session.add(feed)
+    db.session.flush()
+    for i in range(10):
+        db.session.add(FeedItem(
+            feed_source_id=feed.id, title=f'Item {i}', link=f'http://example.com/{i}', guid=str(i),
+            description=f'About {i}', content=f'<p>Body of {i} ü</p>', author='Author',
+            published_at=START + timedelta(days=i), fetched_at=START + timedelta(days=i, hours=1),
+            has_full_content=bool(i % 2), word_count=i, quality_issues='["short"]' if i % 3 else None,
+        ))
+    db.session.commit()
+    return feed
+
+
+def old_records(feed):
+    """Records of the items archive_feed_items() takes: all but the two newest, newest first"""
+    items = FeedItem.query.filter_by(feed_source_id=feed.id).order_by(FeedItem.published_at.desc()).all()
+    return [item_to_record(item) for item in items[2:]]
+
+
+def test_archived_items_round_trip(feed, monkeypatch):
+    monkeypatch.setattr(item_archive, 'BLOCK_ITEMS', 3)
+    expected = old_records(feed)
+
+    assert archive_feed_items(feed, now=NOW) == 8
+
+    assert [item.guid for item in FeedItem.query.order_by(FeedItem.id)] == ['8', '9']
+    assert get_archived_items(feed.id) == expected
+    assert len(read_index(get_archive_dir(feed.id))) == 3
+    assert get_archived_items(feed.id, limit=2) == expected[:2]
+
+
+def test_recent_items_stay_in_the_database(feed):
+    assert archive_feed_items(feed, now=START + timedelta(days=35)) == 5
+
+    assert [record['guid'] for record in get_archived_items(feed.id)] == ['4', '3', '2', '1', '0']
+
+
+def test_time_range_reads_only_overlapping_blocks(feed, monkeypatch):
+    monkeypatch.setattr(item_archive, 'BLOCK_ITEMS', 2)
+    archive_feed_items(feed, now=NOW)
+    start, end = START + timedelta(days=2), START + timedelta(days=3)
+
+    assert len(read_index(get_archive_dir(feed.id), start, end)) == 1
+    assert [record['guid'] for record in get_archived_items(feed.id, start, end)] == ['3', '2']
+    assert get_archived_items(feed.id, start=NOW) == []
+
+
+def test_segments_rotate_at_their_size_limit(app, feed, monkeypatch):
+    monkeypatch.setattr(item_archive, 'BLOCK_ITEMS', 3)
+    app.config['ITEM_ARCHIVE_SEGMENT_MB'] = 0
+    expected = old_records(feed)
+
+    archive_feed_items(feed, now=NOW)
+
+    archive_dir = get_archive_dir(feed.id)
+    assert [entry[2] for entry in read_index(archive_dir)] == [0, 1, 2]
+    assert sorted(os.listdir(archive_dir)) == ['000000.seg', '000001.seg', '000002.seg', INDEX_FILE]
+    assert get_archived_items(feed.id) == expected
+
+
+def test_torn_index_tail_is_ignored_and_replaced(feed):
+    archive_dir = get_archive_dir(feed.id)
+    records = old_records(feed)
+    append_block(archive_dir, records[:4], [START + timedelta(days=i) for i in range(4)])
+    with open(os.path.join(archive_dir, INDEX_FILE), 'ab') as index_file:
+        index_file.write(b'\x01\x02\x03')
+
+    assert len(read_index(archive_dir)) == 1
+
+    append_block(archive_dir, records[4:], [START + timedelta(days=i) for i in range(4, 8)])
+
+    assert len(read_index(archive_dir)) == 2
+    assert get_archived_items(feed.id) == records
+
+
+def test_blocks_archived_twice_are_read_once(feed):
+    archive_dir = get_archive_dir(feed.id)
+    records = old_records(feed)
+    times = [START] * len(records)
+    append_block(archive_dir, records, times)
+    append_block(archive_dir, records, times)
+
+    assert len(get_archived_items(feed.id)) == len(records)
+
+
+def test_stats_and_delete(feed):
+    assert get_archive_stats(feed.id) == {'items': 0, 'blocks': 0, 'bytes': 0, 'oldest': None, 'newest': None}
+    archive_feed_items(feed, now=NOW)
+
+    stats = get_archive_stats(feed.id)
+    assert (stats['items'], stats['blocks']) == (8, 1)
+    assert 0 < stats['bytes'] < sum(os.path.getsize(os.path.join(get_archive_dir(feed.id), name))
+                                    for name in os.listdir(get_archive_dir(feed.id)))
+    assert (stats['oldest'], stats['newest']) == (START.isoformat(), (START + timedelta(days=7)).isoformat())
+
+    delete_feed_archive(feed.id)
+
+    assert not os.path.exists(get_archive_dir(feed.id))
+    assert get_archived_items(feed.id) == []
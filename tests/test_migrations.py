@@ -0,0 +1,66 @@
+import sqlalchemy as sa
+
+from migrations import MIGRATIONS, explain_hot_queries, get_migration_status, upgrade
+from models import db, FeedSource, FeedItem, FeedStatus
+
+# Columns added after the first release, dropped to recreate an old database
+ADDED_COLUMNS = {
+    'feed_fetch_state': ('body_hash', 'adaptive_interval', 'avg_item_gap', 'last_new_item_at'),
+    'fetch_log': ('new_items', 'updated_items', 'unchanged_items'),
+}
+
+INDEXES = (
+    'ix_fetch_log_feed_source_fetched_at', 'ix_feed_item_feed_source_published_at',
+    'ix_alert_is_read_created_at', 'uq_feed_item_feed_source_guid',
+)
+
+
+def make_old_database():
+    """Turn the test database into one created with db.create_all() before the migrations"""
+    with db.engine.begin() as conn:
+        conn.execute(sa.text('DROP TABLE schema_migration'))
+        conn.execute(sa.text('DROP TABLE feed_status'))
+        for index in INDEXES:
+            conn.execute(sa.text(f'DROP INDEX {index}'))
+        for table, columns in ADDED_COLUMNS.items():
+            for column in columns:
+                conn.execute(sa.text(f'ALTER TABLE {table} DROP COLUMN {column}'))
+
+
+def get_columns(table):
+    return {column['name'] for column in sa.inspect(db.engine).get_columns(table)}
+
+
+def test_new_database_uses_an_index_for_every_hot_query(app):
+    results = explain_hot_queries()
+
+    assert results
+    assert [result['query'] for result in results if not result['uses_index']] == []
+    assert all(migration['applied'] for migration in get_migration_status())
+
+
+def test_upgrade_of_an_old_database(app):
+    make_old_database()
+    feed = FeedSource(name='Feed', rsshub_route='test/feed')
+    db.session.add(feed)
+    db.session.flush()
+    for title in ('old copy', 'new copy'):
+        db.session.add(FeedItem(feed_source_id=feed.id, guid='a', title=title, link='http://example.com/a'))
+    for fetched_at, status in (('2024-01-01 10:00:00', 'error'), ('2024-01-01 11:00:00', 'success')):
+        db.session.execute(sa.text(
+            'INSERT INTO fetch_log (feed_source_id, status, item_count, fetched_at) VALUES (:feed, :status, 3, :at)'
+        ), {'feed': feed.id, 'status': status, 'at': fetched_at})
+    db.session.commit()
+    feed_id = feed.id
+    db.session.remove()
+
+    assert upgrade() == [(version, name) for version, name, _ in MIGRATIONS]
+
+    for table, columns in ADDED_COLUMNS.items():
+        assert set(columns) <= get_columns(table)
+    assert [item.title for item in FeedItem.query.all()] == ['new copy']
+    assert [(row.feed_source_id, row.status, row.item_count) for row in FeedStatus.query.all()] == [
+        (feed_id, 'success', 3)
+    ]
+    assert all(result['uses_index'] for result in explain_hot_queries())
+    assert upgrade() == []
@@ -0,0 +1,197 @@
+import feedparser
+import pytest
+from lxml import etree
+
+import parsing
+from parsing import (
+    FeedItemCounter, UnsupportedFeed, get_entry_content, get_entry_images, get_entry_published,
+    get_parse_pool, iter_fast_entries, parse_article, parse_feed, run_parse, shutdown_parse_pool
+)
+
+RSS = '''<?xml version="1.0"?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+     xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:media="http://search.yahoo.com/mrss/">
+<channel><title>T</title>
+<item><title>  A &amp; B  </title><link>http://x/1?a=1&amp;b=2</link><guid isPermaLink="false">g1</guid>
+<description><![CDATA[<p>Hi <script>bad()</script><a href="/rel" onclick="x">l</a> café</p>]]></description>
+<content:encoded><![CDATA[<div style="color:red">Full <img src="a.jpg"><iframe src="http://y"></iframe></div>]]></content:encoded>
+<dc:creator>Jane</dc:creator><pubDate>Mon, 01 Jan 2024 10:00:00 GMT</pubDate>
+<media:group><media:content url="http://i/1.jpg" medium="image"/></media:group>
+<media:thumbnail url="http://i/t.jpg"/><category>a</category></item>
+<item><title>No link</title><guid>http://x/2</guid><description>plain text &lt;b&gt;bold&lt;/b&gt; &amp;amp; more</description>
+<author>j@x.com (John)</author><dc:date>2024-01-02T10:00:00Z</dc:date>
+<enclosure url="http://i/e.png" type="image/png" length="1"/></item>
+<item><title>Only content</title><link>http://x/3</link><content:encoded>&lt;p&gt;c&lt;/p&gt;</content:encoded>
+<pubDate>garbage date</pubDate></item>
+<item><link>http://x/4</link></item>
+<item><title>Title with &lt;b&gt;html&lt;/b&gt;</title><link>http://x/5</link><description>  </description>
+<media:content url="http://v/1.mp4" type="video/mp4"/><enclosure url="http://a/1.mp3" type="audio/mpeg"/></item>
+</channel></rss>'''
+
+RSSHUB = (
+    '<?xml version="1.0" encoding="UTF-8"?><rss xmlns:atom="http://www.w3.org/2005/Atom" version="2.0">'
+    '<channel><title><![CDATA[Trending]]></title><link>https://github.com/trending</link>'
+    '<atom:link href="http://rsshub/x" rel="self" type="application/rss+xml"/>'
+    + ''.join(
+        f'<item><title><![CDATA[owner/repo{i} — a “tool”]]></title>'
+        f'<description><![CDATA[<p>Desc {i} with <img src="https://img/{i}" referrerpolicy="no-referrer">'
+        f'<br>Stars: {i}</p>]]></description><pubDate>Tue, 0{i % 9 + 1} Jan 2024 0{i % 9}:00:00 GMT</pubDate>'
+        f'<guid isPermaLink="false">https://github.com/o/r{i}</guid><link>https://github.com/o/r{i}</link>'
+        f'<author><![CDATA[owner{i}]]></author></item>'
+        for i in range(30)
+    )
+    + '</channel></rss>'
+)
+
+ATOM = '''<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:media="http://search.yahoo.com/mrss/"><title>x</title>
+<entry><title>A plain title</title><link href="http://x/a"/><link rel="enclosure" type="image/jpeg" href="http://i/e.jpg"/>
+<id>urn:1</id><updated>2024-01-01T00:00:00Z</updated><published>2023-12-31T00:00:00Z</published>
+<author><name>Ann</name><email>a@x</email></author><summary type="text">plain &lt;b&gt;s&lt;/b&gt;</summary>
+<content type="html">&lt;p&gt;c &lt;script&gt;x&lt;/script&gt;&lt;/p&gt;</content><media:thumbnail url="http://i/th.jpg"/></entry>
+<entry><title>T2 &amp; co</title><link rel="alternate" type="text/html" href="http://x/b"/><link rel="self" href="http://x/self"/>
+<id>urn:2</id><updated>2024-01-02T00:00:00Z</updated><summary>s2</summary></entry>
+<entry><title type="text">T3</title><link rel="alternate" href="http://x/c"/><id>urn:3</id>
+<updated>2024-01-03T00:00:00+02:00</updated>
+<content type="html">&lt;p&gt;Only content &lt;img src="http://i/3.png"&gt;&lt;/p&gt;</content></entry>
+</feed>'''
+
+CP1252 = (
+    '<?xml version="1.0" encoding="windows-1252"?><rss version="2.0"><channel><title>c</title>'
+    '<item><title>café ’quote’</title><link>http://x/w</link><description>naïve</description></item>'
+    '</channel></rss>'
+).encode('windows-1252')
+
+RDF = (
+    '<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns="http://purl.org/rss/1.0/">'
+    '<item><title>r</title><link>http://x/r</link></item></rdf:RDF>'
+)
+
+XML_BASE = (
+    '<feed xmlns="http://www.w3.org/2005/Atom" xml:base="http://x/base/"><entry><title>b</title>'
+    '<link href="rel"/><id>urn:b</id><content type="html">&lt;a href="p"&gt;l&lt;/a&gt;</content></entry></feed>'
+)
+
+MALFORMED = '<rss version="2.0"><channel><item><title>a & b</title><link>http://x/m</link></item></channel></rss>'
+
+FEEDS = {
+    'rss': RSS.encode('utf-8'),
+    'rsshub': RSSHUB.encode('utf-8'),
+    'atom': ATOM.encode('utf-8'),
+    'cp1252': CP1252,
+    'rdf': RDF.encode('utf-8'),
+    'xml_base': XML_BASE.encode('utf-8'),
+    'malformed': MALFORMED.encode('utf-8'),
+}
+
+
+def feedparser_records(body):
+    """What parse_feed must return, built straight from feedparser's entries"""
+    records = []
+    for entry in feedparser.parse(body).entries:
+        content, extraction_method = get_entry_content(entry)
+        preferred_image, fallback_image = get_entry_images(entry)
+        records.append({
+            'title': getattr(entry, 'title', 'No Title'),
+            'link': getattr(entry, 'link', ''),
+            'guid': getattr(entry, 'id', getattr(entry, 'link', '')),
+            'description': getattr(entry, 'summary', ''),
+            'content': content,
+            'extraction_method': extraction_method,
+            'author': getattr(entry, 'author', None),
+            'published_at': get_entry_published(entry),
+            'published': getattr(entry, 'published', None),
+            'preferred_image': preferred_image,
+            'fallback_image': fallback_image,
+        })
+    return records
+
+
+def without_analysis(records):
+    return [{key: value for key, value in record.items() if key != 'analysis'} for record in records]
+
+
+@pytest.fixture
+def parse_pool(app):
+    app.config['PARSE_POOL_SIZE'] = 1
+    yield get_parse_pool()
+    shutdown_parse_pool(wait=True)
+
+
+@pytest.mark.parametrize('name', FEEDS)
+def test_parse_feed_matches_feedparser(name):
+    records = parse_feed(FEEDS[name], analyze=False)
+
+    assert records
+    assert without_analysis(records) == feedparser_records(FEEDS[name])
+
+
+def test_max_entries():
+    assert [record['guid'] for record in parse_feed(FEEDS['rsshub'], analyze=False, max_entries=3)] == [
+        'https://github.com/o/r0', 'https://github.com/o/r1', 'https://github.com/o/r2'
+    ]
+
+
+@pytest.mark.parametrize('name', ['rss', 'rsshub', 'atom', 'cp1252'])
+def test_fast_parser_handles_common_feeds(name):
+    assert len(list(iter_fast_entries(FEEDS[name]))) == len(feedparser.parse(FEEDS[name]).entries)
+
+
+@pytest.mark.parametrize('name, error', [
+    ('rdf', UnsupportedFeed), ('xml_base', UnsupportedFeed), ('malformed', etree.XMLSyntaxError)
+])
+def test_fast_parser_refuses_what_it_cannot_reproduce(name, error):
+    with pytest.raises(error):
+        list(iter_fast_entries(FEEDS[name]))
+
+
+def test_without_feedparser_internals_every_feed_uses_feedparser(monkeypatch):
+    monkeypatch.setattr(parsing, 'FAST_PARSER_AVAILABLE', False)
+
+    with pytest.raises(UnsupportedFeed):
+        list(iter_fast_entries(FEEDS['rss']))
+    assert without_analysis(parse_feed(FEEDS['rss'], analyze=False)) == feedparser_records(FEEDS['rss'])
+
+
+def test_truncated_download_keeps_the_received_items():
+    body = FEEDS['rsshub']
+    counter = FeedItemCounter(3)
+    received = b''
+    for start in range(0, len(body), 7):
+        received += body[start:start + 7]
+        if counter(body[start:start + 7]):
+            break
+
+    assert counter.count == 3
+    assert [record['guid'] for record in parse_feed(received, analyze=False, max_entries=3)] == [
+        'https://github.com/o/r0', 'https://github.com/o/r1', 'https://github.com/o/r2'
+    ]
+
+
+def test_item_counter_without_limit_never_stops():
+    counter = FeedItemCounter(0)
+
+    assert not counter(FEEDS['rsshub'])
+
+
+def test_parse_pool_matches_in_process(parse_pool):
+    assert parse_pool is not None
+
+    for body in FEEDS.values():
+        assert run_parse(parse_feed, body) == parse_feed(body)
+
+
+def test_parse_pool_articles_match_in_process(parse_pool):
+    html = (
+        '<html><head><title>An article</title><meta name="description" content="About it"></head><body>'
+        '<article><h1>An article</h1>' + '<p>Some sentence of the article body.</p>' * 20 + '</article></body></html>'
+    )
+
+    assert run_parse(parse_article, 'http://x/article', html) == parse_article('http://x/article', html)
+
+
+def test_without_pool_parsing_runs_in_process(app):
+    app.config['PARSE_POOL_SIZE'] = 0
+
+    assert get_parse_pool() is None
+    assert run_parse(parse_feed, FEEDS['atom']) == parse_feed(FEEDS['atom'])
@@ -0,0 +1,202 @@
+import queue
+import threading
+
+import pytest
+
+from models import db, FeedSource, FeedItem
+from pipeline import DONE, Pipeline, Stage, run_stages
+from utils import check_all_feeds, get_check_pipeline
+
+RSS = '''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Test</title>
+<item><title>Item of {route}</title><link>http://example.com/{route}</link><guid>{route}</guid></item>
+</channel></rss>'''
+
+
+def make_stage(name, **kwargs):
+    """Stage that records its name on the item and routes as item['routes'] says"""
+    def func(item):
+        item['path'].append(name)
+        return item['routes'].get(name)
+    return Stage(name, func, **kwargs)
+
+
+def make_item(**routes):
+    return {'path': [], 'routes': routes}
+
+
+@pytest.fixture
+def stage_pipeline():
+    pipeline = Pipeline('test', [make_stage('a'), make_stage('b'), make_stage('c')])
+    yield pipeline
+    pipeline.shutdown(wait=True)
+
+
+@pytest.mark.parametrize('routes, path', [
+    ({}, ['a', 'b', 'c']),
+    ({'a': 'c'}, ['a', 'c']),
+    ({'b': DONE}, ['a', 'b']),
+    ({'a': 'c', 'c': 'b', 'b': DONE}, ['a', 'c', 'b']),
+])
+def test_items_follow_their_routes(stage_pipeline, routes, path):
+    item = stage_pipeline.submit(make_item(**routes)).result(timeout=5)
+
+    assert item['path'] == path
+
+
+@pytest.mark.parametrize('routes, path', [({}, ['a', 'b', 'c']), ({'a': 'c'}, ['a', 'c']), ({'b': DONE}, ['a', 'b'])])
+def test_run_stages_routes_like_the_pipeline(routes, path):
+    stages = [(name, make_stage(name).func) for name in ('a', 'b', 'c')]
+
+    assert run_stages(stages, make_item(**routes))['path'] == path
+
+
+def test_stage_errors_fail_only_their_item():
+    def fail(item):
+        if item['fail']:
+            raise ValueError('broken')
+        item['path'].append('check')
+
+    pipeline = Pipeline('test', [Stage('check', fail), make_stage('after')])
+    try:
+        failed = pipeline.submit({'fail': True, 'path': [], 'routes': {}})
+        passed = pipeline.submit({'fail': False, 'path': [], 'routes': {}})
+
+        with pytest.raises(ValueError):
+            failed.result(timeout=5)
+        assert passed.result(timeout=5)['path'] == ['check', 'after']
+        assert pipeline.stats()['stages'][0]['errors'] == 1
+    finally:
+        pipeline.shutdown(wait=True)
+
+
+def test_full_queues_push_back_on_submit():
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow(item):
+        started.set()
+        release.wait(5)
+
+    pipeline = Pipeline('test', [Stage('slow', slow, workers=1, queue_size=1)])
+    try:
+        first = pipeline.submit(1)
+        started.wait(5)
+        second = pipeline.submit(2)
+
+        # One item running, one waiting: the pipeline is full
+        assert pipeline.capacity == 2
+        with pytest.raises(queue.Full):
+            pipeline.submit(3, timeout=0.05)
+        assert pipeline.stats()['in_flight'] == 2
+
+        release.set()
+        assert (first.result(timeout=5), second.result(timeout=5)) == (1, 2)
+    finally:
+        release.set()
+        pipeline.shutdown(wait=True)
+
+
+def test_slow_stages_block_the_stages_feeding_them():
+    release = threading.Event()
+    pipeline = Pipeline('test', [
+        Stage('fast', lambda item: None, workers=1, queue_size=1),
+        Stage('slow', lambda item: release.wait(5) and None, workers=1, queue_size=1),
+    ])
+    try:
+        futures = [pipeline.submit(i) for i in range(pipeline.capacity)]
+        with pytest.raises(queue.Full):
+            pipeline.submit('extra', timeout=0.05)
+
+        release.set()
+        assert [future.result(timeout=5) for future in futures] == list(range(pipeline.capacity))
+        assert pipeline.stats()['stages'][0]['blocked_seconds_total'] > 0
+    finally:
+        release.set()
+        pipeline.shutdown(wait=True)
+
+
+def test_batch_stages_take_the_items_waiting_for_them():
+    started = threading.Event()
+    release = threading.Event()
+    batches = []
+
+    def persist(items):
+        batches.append(list(items))
+        started.set()
+        release.wait(5)
+        return [ValueError(item) if item == 'bad' else None for item in items]
+
+    stage = Stage('persist', persist, workers=1, queue_size=10, batch_size=4)
+    pipeline = Pipeline('test', [stage])
+    try:
+        futures = [pipeline.submit('a')]
+        started.wait(5)
+        # The worker is busy with 'a', the others wait in the queue
+        futures += [pipeline.submit(item) for item in ['b', 'bad', 'c', 'd', 'e']]
+        release.set()
+
+        with pytest.raises(ValueError):
+            futures[2].result(timeout=5)
+        assert [futures[i].result(timeout=5) for i in (0, 1, 3, 4, 5)] == ['a', 'b', 'c', 'd', 'e']
+        assert batches == [['a'], ['b', 'bad', 'c', 'd'], ['e']]
+
+        stats = stage.stats()
+        assert (stats['processed'], stats['errors'], stats['batch_size_avg']) == (6, 1, 2.0)
+    finally:
+        release.set()
+        pipeline.shutdown(wait=True)
+
+
+def test_failing_batch_fails_every_item_in_it():
+    def persist(items):
+        raise RuntimeError('database is locked')
+
+    pipeline = Pipeline('test', [Stage('persist', persist, batch_size=8)])
+    try:
+        futures = [pipeline.submit(i) for i in range(3)]
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+    finally:
+        pipeline.shutdown(wait=True)
+
+
+def test_shutdown_drains_submitted_items(stage_pipeline):
+    futures = [stage_pipeline.submit(make_item()) for _ in range(10)]
+
+    stage_pipeline.shutdown(wait=True)
+
+    assert all(future.result(timeout=0)['path'] == ['a', 'b', 'c'] for future in futures)
+    with pytest.raises(RuntimeError):
+        stage_pipeline.submit(make_item())
+
+
+def test_check_all_feeds_runs_every_feed_through_the_pipeline(app, feed_server):
+    app.config.update(RSSHUB_BASE_URL=feed_server.url, CHECK_PER_HOST_LIMIT=2)
+    for i in range(5):
+        feed_server.pages[f'/feed/{i}'] = RSS.format(route=i).encode('utf-8')
+        db.session.add(FeedSource(name=f'Feed {i}', rsshub_route=f'feed/{i}'))
+    db.session.add(FeedSource(name='Missing', rsshub_route='feed/missing'))
+    db.session.commit()
+
+    try:
+        outcomes = check_all_feeds(app)
+    finally:
+        get_check_pipeline(app).shutdown(wait=True)
+
+    statuses = sorted(outcome['status'] for outcome in outcomes)
+    assert statuses == ['error'] + ['success'] * 5
+    assert FeedItem.query.count() == 5
+
+
+def test_check_all_feeds_survives_a_shut_down_pipeline(app):
+    for i in range(3):
+        db.session.add(FeedSource(name=f'Feed {i}', rsshub_route=f'feed/{i}'))
+    db.session.commit()
+    get_check_pipeline(app).shutdown()
+
+    outcomes = check_all_feeds(app, per_host_limit=1)
+
+    assert [outcome['status'] for outcome in outcomes] == ['error'] * 3
+    assert all('shut down' in outcome['message'] for outcome in outcomes)
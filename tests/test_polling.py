@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from polling import BACKOFF_FACTOR, get_effective_interval, observe_check
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+
+def make_state(**fields):
+    state = {'adaptive_interval': None, 'avg_item_gap': None, 'last_new_item_at': None}
+    state.update(fields)
+    return SimpleNamespace(**state)
+
+
+@pytest.fixture(autouse=True)
+def bounds(app):
+    app.config.update(ADAPTIVE_MIN_INTERVAL=5, ADAPTIVE_MAX_INTERVAL=1440)
+
+
+def test_new_items_poll_at_half_the_gap():
+    state = make_state(last_new_item_at=NOW - timedelta(minutes=120))
+
+    interval = observe_check(state, 'success', [NOW - timedelta(minutes=60)], 30, now=NOW)
+
+    assert state.avg_item_gap == 60
+    assert state.last_new_item_at == NOW - timedelta(minutes=60)
+    assert interval == state.adaptive_interval == 30
+
+
+def test_gap_is_a_moving_average():
+    state = make_state(adaptive_interval=30, avg_item_gap=60, last_new_item_at=NOW - timedelta(minutes=160))
+
+    observe_check(state, 'success', [NOW - timedelta(minutes=60)], 30, now=NOW)
+
+    assert state.avg_item_gap == pytest.approx(0.3 * 100 + 0.7 * 60)
+
+
+def test_burst_at_least_halves_the_interval():
+    state = make_state(adaptive_interval=100, avg_item_gap=400, last_new_item_at=NOW - timedelta(hours=10))
+    arrivals = [NOW - timedelta(minutes=minutes) for minutes in (3, 2, 1)]
+
+    assert observe_check(state, 'success', arrivals, 30, now=NOW) <= 50
+
+
+def test_quiet_checks_back_off():
+    state = make_state(adaptive_interval=20)
+
+    assert observe_check(state, 'not_modified', [], 30, now=NOW) == 20 * BACKOFF_FACTOR
+    assert observe_check(state, 'success', [], 30, now=NOW) == 20 * BACKOFF_FACTOR ** 2
+
+
+def test_first_quiet_check_starts_from_the_base_interval():
+    state = make_state()
+
+    assert observe_check(state, 'success', [], 30, now=NOW) == 30 * BACKOFF_FACTOR
+
+
+def test_errors_leave_the_state_alone():
+    state = make_state(adaptive_interval=20, avg_item_gap=40)
+
+    assert observe_check(state, 'error', [NOW], 30, now=NOW) == 20
+    assert state.adaptive_interval == 20
+    assert state.last_new_item_at is None
+
+
+def test_interval_is_clamped(app):
+    state = make_state(adaptive_interval=1000)
+    assert observe_check(state, 'success', [], 30, now=NOW) == 1440
+
+    state = make_state(last_new_item_at=NOW - timedelta(minutes=2))
+    assert observe_check(state, 'success', [NOW], 30, now=NOW) == 5
+
+
+def test_future_and_missing_dates_count_as_now():
+    state = make_state(last_new_item_at=NOW - timedelta(minutes=40))
+
+    observe_check(state, 'success', [None, NOW + timedelta(days=1)], 30, now=NOW)
+
+    assert state.last_new_item_at == NOW
+    assert state.avg_item_gap == 20
+
+
+def test_effective_interval(app):
+    app.config.update(ADAPTIVE_POLLING=False, CHECK_INTERVAL=30)
+    assert get_effective_interval(None, 12.5) == 30
+    assert get_effective_interval(60, 12.5) == 60
+
+    app.config['ADAPTIVE_POLLING'] = True
+    assert get_effective_interval(60, 12.5) == 12.5
+    assert get_effective_interval(60, None) == 60
@@ -0,0 +1,51 @@
+from flask import Flask
+
+from models import db, SystemSettings
+from system_settings import bump_settings_version, load_settings, parse_setting, refresh_settings
+
+
+def make_other_process(app):
+    """A second app on the same database, like another web or scheduler process"""
+    other = Flask('other')
+    other.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI']
+    db.init_app(other)
+    return other
+
+
+def test_parse_setting():
+    assert parse_setting('CHECK_INTERVAL', '45') == 45
+    assert parse_setting('RATE_LIMIT_HOST_RATE', '0.5') == 0.5
+    assert parse_setting('ADAPTIVE_POLLING', 'True') is True
+    assert parse_setting('RATE_LIMIT_ENABLED', 'False') is False
+    assert parse_setting('RSSHUB_BASE_URL', 'http://rsshub') == 'http://rsshub'
+
+
+def test_load_settings_skips_the_version(app):
+    db.session.add(SystemSettings(key='CHECK_INTERVAL', value='45'))
+    bump_settings_version(app)
+    db.session.commit()
+
+    load_settings(app)
+
+    assert app.config['CHECK_INTERVAL'] == 45
+    assert 'SETTINGS_VERSION' not in app.config
+
+
+def test_saved_settings_reach_other_processes(app):
+    other = make_other_process(app)
+    load_settings(other)
+    assert not refresh_settings(other)
+
+    db.session.add(SystemSettings(key='CHECK_INTERVAL', value='45'))
+    db.session.add(SystemSettings(key='RATE_LIMIT_HOST_RATE', value='0.5'))
+    bump_settings_version(app)
+    db.session.commit()
+
+    assert not refresh_settings(app)
+    assert refresh_settings(other)
+    assert other.config['CHECK_INTERVAL'] == 45
+    assert other.config['RATE_LIMIT_HOST_RATE'] == 0.5
+    assert not refresh_settings(other)
+
+    with other.app_context():
+        db.engine.dispose()
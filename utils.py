@@ -1,502 +1,957 @@
 import feedparser
 import requests
-from bs4 import BeautifulSoup
 import json
 import re
 import time
-from datetime import datetime, timezone
+from datetime import datetime, timedelta
 from urllib.parse import urlparse, urljoin
 from flask import current_app
-from models import db, FeedSource, FetchLog, FeedItem, Alert
-import newspaper
-from newspaper import Article, build
+from models import db, FeedSource, FetchLog, FeedItem, FeedFetchState, FeedStatus, Alert
+from http_client import http_get, read_body, decode_body
+from polling import observe_check
+from circuit_breaker import (
+    begin_attempt, record_success, record_failure, is_host_failure, get_blocking_circuit, PROBE_TIMEOUT
+)
+from parsing import (
+    normalize_datetime, needs_selector_content, parse_feed, analyze_entries, parse_article,
+    submit_parse, parse_result, run_parse, FeedItemCounter
+)
+from extraction_cache import (
+    get_cached_selector_content, store_selector_content, get_cached_articles, store_articles
+)
+from pipeline import Pipeline, Stage, DONE, run_stages
+from rollups import get_rollups
 import hashlib
 import logging
+import threading
 import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from collections import defaultdict, deque
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def normalize_datetime(dt):
-    """Make all datetimes timezone-naive for consistent comparison"""
-    if dt is None:
-        return datetime.utcnow()
-    if dt.tzinfo is not None:
-        # Convert to UTC and remove timezone info
-        return dt.astimezone(timezone.utc).replace(tzinfo=None)
-    return dt
+_pipeline_lock = threading.Lock()
 
-def fetch_and_parse_feed(feed_source, save_items=True):
+# Held while check outcomes are written, so the checks of this process reach
+# the database through one writer at a time instead of contending for its lock
+_write_lock = threading.RLock()
+
+# newspaper3k and BeautifulSoup are imported in the functions that use them.
+# They add seconds of CPU and tens of MB per process, and only custom routes
+# and selector suggestions need them.
+
+def get_fetch_state(feed_source):
+    """Get the FeedFetchState of a feed, adding a new one to the session if missing"""
+    if feed_source.fetch_state is None:
+        feed_source.fetch_state = FeedFetchState(feed_source_id=feed_source.id)
+        db.session.add(feed_source.fetch_state)
+    return feed_source.fetch_state
+
+def add_fetch_log(feed_source, **fields):
     """
-    Fetch and parse an RSS feed from a FeedSource with enhanced fallback handling
+    Log a check and make it the feed's latest status (not committed)
+    
+    The dashboard and feed list read FeedStatus instead of the newest
+    FetchLog of every feed, so every FetchLog must be written through here.
     
     Args:
         feed_source: FeedSource object
-        save_items: Whether to save parsed items to database
+        **fields: FetchLog fields
     
     Returns:
-        tuple: (status, message, feed_data, items_count)
+        FetchLog: The new log entry
     """
-    start_time = time.time()
+    fetch_log = FetchLog(feed_source_id=feed_source.id, fetched_at=datetime.utcnow(), **fields)
+    db.session.add(fetch_log)
     
-    # Check if this is a custom route
-    if feed_source.rsshub_route.startswith('custom/'):
-        # This is a custom route, use newspaper3k for smart extraction
-        url = feed_source.original_url
-        if not url:
-            return 'error', 'Original URL is required for custom routes', None, 0
+    if feed_source.latest_status is None:
+        feed_source.latest_status = FeedStatus(feed_source_id=feed_source.id)
+        db.session.add(feed_source.latest_status)
+    latest_status = feed_source.latest_status
+    latest_status.last_check_at = fetch_log.fetched_at
+    latest_status.status = fetch_log.status
+    latest_status.http_status = fetch_log.http_status
+    latest_status.quality_score = fetch_log.quality_score
+    latest_status.fetch_duration = fetch_log.fetch_duration
+    latest_status.item_count = fetch_log.item_count
+    return fetch_log
+
+def hash_body(body):
+    """Digest of a response body, used to detect unchanged feeds without validators"""
+    if isinstance(body, str):
+        body = body.encode('utf-8', 'replace')
+    return hashlib.sha256(body).hexdigest()
+
+def is_body_unchanged(fetch_state, url, body_hash):
+    """Check whether a body matches the last fully processed body for the same URL"""
+    return bool(
+        fetch_state and fetch_state.body_hash
+        and fetch_state.url == url and fetch_state.body_hash == body_hash
+    )
+
+def log_not_modified(feed_source, fetch_state, http_status, start_time, message):
+    """Record a cheap 'not_modified' check that skipped parsing and item writes (not committed)"""
+    add_fetch_log(
+        feed_source,
+        status='not_modified',
+        http_status=http_status,
+        item_count=fetch_state.item_count,
+        quality_score=fetch_state.quality_score,
+        fetch_duration=time.time() - start_time
+    )
+    record_polling_observation(feed_source, 'not_modified', [])
+    record_check_success(feed_source)
+    return 'not_modified', message, None, fetch_state.item_count
+
+# FeedItem fields compared to decide whether a stored item changed
+ITEM_HASH_FIELDS = ('title', 'link', 'description', 'content', 'author', 'image_url')
+
+def item_content_hash(item):
+    """Hash the comparable fields of an item dict or FeedItem"""
+    digest = hashlib.sha1()
+    for field in ITEM_HASH_FIELDS:
+        value = item.get(field) if isinstance(item, dict) else getattr(item, field)
+        digest.update((value or '').encode('utf-8', 'replace'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+def save_feed_items(feed_source, items):
+    """
+    Store parsed items for a feed (not committed)
+    
+    In incremental mode (INCREMENTAL_INGEST, the default) items are matched
+    by (feed_source_id, guid): unseen items are inserted, items whose content
+    hash changed are updated and the rest are left alone, keeping their
+    fetched_at. Otherwise all stored items are replaced.
+    
+    Args:
+        feed_source: FeedSource object
+        items: List of dicts with FeedItem fields, published_at may be None
+    
+    Returns:
+        tuple: (counts dict with new/updated/unchanged, list of new item dicts)
+    """
+    counts = {'new': 0, 'updated': 0, 'unchanged': 0}
+    new_items = []
+    
+    # Items without a guid are keyed by link, duplicates within a fetch are dropped
+    unique_items = {}
+    for item in items:
+        item['guid'] = item.get('guid') or item.get('link')
+        unique_items.setdefault(item['guid'], item)
+    
+    incremental = current_app.config.get('INCREMENTAL_INGEST', True)
+    stored = {}
+    if unique_items:
+        query = FeedItem.query.filter_by(feed_source_id=feed_source.id)
+        if incremental:
+            stored = {row.guid: row for row in query.filter(FeedItem.guid.in_(list(unique_items))).all()}
+        else:
+            stored = {guid: None for (guid,) in query.with_entities(FeedItem.guid).all()}
+            query.delete(synchronize_session=False)
+    
+    for guid, item in unique_items.items():
+        existing = stored.get(guid)
         
-        try:
-            # Clean up the URL if needed
-            if not url.startswith('http'):
-                url = 'https://' + url
-            
-            logger.info(f"Processing custom route for: {url}")
-            
-            # Build a newspaper source with advanced configuration
-            news_source = build(url, memoize_articles=False)
-            
-            # Set source to fetch article details (otherwise only gets partial info)
-            news_source.config.fetch_images = False  # Skip image downloading for speed
-            news_source.config.request_timeout = 20  # Timeout in seconds
-            news_source.config.number_threads = 4   # Use 4 threads for parallel downloading
-            
-            # Download and parse the source
-            news_source.download()
-            news_source.parse()
-            
-            # Download the homepage to try to detect article links
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=20)
-            homepage_html = response.text
-            
-            # Get articles from newspaper extraction
-            feed_items = []
-            
-            # First try to get articles from newspaper's built-in article extraction
-            articles = news_source.articles[:15]  # Limit to 15 articles for performance
-            
-            # If newspaper didn't extract enough articles, try manually finding links
-            if len(articles) < 3:
-                logger.info(f"Few articles detected by newspaper, trying manual link extraction")
-                
-                # Parse the homepage with BeautifulSoup
-                soup = BeautifulSoup(homepage_html, 'html.parser')
-                
-                # Find potential article links
-                article_links = find_article_links(soup, url)
-                
-                # Create Article objects for these links
-                for link in article_links[:15]:  # Limit to 15
-                    try:
-                        article = Article(url=link, language='en')  # Default to English
-                        articles.append(article)
-                    except Exception as e:
-                        logger.error(f"Error creating Article for {link}: {str(e)}")
-            
-            logger.info(f"Found {len(articles)} articles to process")
-            
-            # Multi-threaded download for performance
-            newspaper.news_pool.set(articles, threads_per_source=4)
-            newspaper.news_pool.join()
-            
-            # Process each article
-            for article in articles:
-                try:
-                    # Parse article if not already parsed
-                    if not article.is_parsed:
-                        article.parse()
-                    
-                    # Get article text
-                    if not article.text or len(article.text.strip()) < 150:
-                        logger.info(f"Skipping article with insufficient text: {article.url}")
-                        continue
-                    
-                    # Get or generate article HTML
-                    html_content = article.article_html
-                    if not html_content and article.text:
-                        # Convert plain text to HTML paragraphs if article_html not available
-                        paragraphs = article.text.split('\n\n')
-                        html_content = ''.join([f"<p>{p}</p>" for p in paragraphs if p.strip()])
-                    
-                    # Create a unique identifier for this article
-                    article_guid = hashlib.md5(article.url.encode()).hexdigest()
-                    
-                    # Create feed item
-                    item = {
-                        'title': article.title,
-                        'link': article.url,
-                        'guid': article_guid,
-                        'description': article.text[:280] + '...' if len(article.text) > 280 else article.text,
-                        'content': html_content,
-                        'image_url': article.top_image,
-                        'published_at': normalize_datetime(article.publish_date),
-                        'author': ', '.join(article.authors) if article.authors else None,
-                        'has_full_content': True,
-                        'word_count': len(article.text.split()) if article.text else 0,
-                    }
-                    
-                    # Add extraction metadata
-                    item['extraction_metadata'] = json.dumps({
-                        "extraction_method": "newspaper3k",
-                        "content_length": len(html_content) if html_content else 0,
-                        "keywords": article.keywords if hasattr(article, 'keywords') else []
-                    })
-                    
-                    feed_items.append(item)
-                except Exception as e:
-                    error_details = traceback.format_exc()
-                    logger.error(f"Error processing article {article.url}: {str(e)}\n{error_details}")
-                    continue
-            
-            # Filter out items without title or content
-            feed_items = [item for item in feed_items if item['title'] and item['content']]
-            
-            # Sort by publication date (newest first)
-            feed_items.sort(key=lambda x: normalize_datetime(x['published_at']), reverse=True)
-            
-            # If no items could be extracted, return an error
-            if not feed_items:
-                return 'error', 'No articles could be extracted from the website', None, 0
-            
-            if save_items:
-                # Clear existing items for this source
-                FeedItem.query.filter_by(feed_source_id=feed_source.id).delete()
-                
-                # Add new items to the database
-                for item in feed_items:
-                    feed_item = FeedItem(
-                        feed_source_id=feed_source.id,
-                        title=item['title'],
-                        link=item['link'],
-                        guid=item['guid'],
-                        description=item.get('description', ''),
-                        content=item['content'],
-                        author=item.get('author'),
-                        image_url=item.get('image_url'),
-                        published_at=normalize_datetime(item.get('published_at')),
-                        has_full_content=item.get('has_full_content', False),
-                        word_count=item.get('word_count', 0),
-                        extraction_metadata=item.get('extraction_metadata')
-                    )
-                    db.session.add(feed_item)
-                
-                db.session.commit()
-            
-            # Calculate quality metrics
-            avg_content_length = sum(len(item['content']) for item in feed_items) / len(feed_items) if feed_items else 0
-            image_count = sum(1 for item in feed_items if item.get('image_url')) or 0
-            
-            # Calculate quality score
-            quality_score = calculate_quality_score(
-                item_count=len(feed_items),
-                avg_content_length=avg_content_length,
-                image_ratio=image_count / len(feed_items) if feed_items else 0
-            )
-            
-            # Create fetch log
-            fetch_duration = time.time() - start_time
-            fetch_log = FetchLog(
-                feed_source_id=feed_source.id,
-                status='success',
-                item_count=len(feed_items),
-                avg_content_length=avg_content_length,
-                images_count=image_count,
-                quality_score=quality_score,
-                fetch_duration=fetch_duration
-            )
-            db.session.add(fetch_log)
-            db.session.commit()
-            
-            return 'success', f'Successfully extracted {len(feed_items)} articles from the website', None, len(feed_items)
+        if existing is not None:
+            if item_content_hash(existing) == item_content_hash(item):
+                counts['unchanged'] += 1
+                continue
             
-        except Exception as e:
-            error_details = traceback.format_exc()
-            error_msg = f"{str(e)}: {error_details}"
-            logger.error(f"Error processing custom route: {error_msg}")
-            
-            # Create error log
-            fetch_log = FetchLog(
-                feed_source_id=feed_source.id,
-                status='error',
-                error_message=str(e),
-                fetch_duration=time.time() - start_time
-            )
-            db.session.add(fetch_log)
-            
-            # Create alert
+            for field in ITEM_HASH_FIELDS + ('has_full_content', 'word_count', 'quality_issues', 'extraction_metadata'):
+                setattr(existing, field, item.get(field))
+            if item.get('published_at'):
+                existing.published_at = normalize_datetime(item['published_at'])
+            counts['updated'] += 1
+            continue
+        
+        db.session.add(FeedItem(
+            feed_source_id=feed_source.id,
+            title=item['title'],
+            link=item['link'],
+            guid=guid,
+            description=item.get('description', ''),
+            content=item.get('content'),
+            author=item.get('author'),
+            image_url=item.get('image_url'),
+            published_at=normalize_datetime(item.get('published_at')),
+            has_full_content=item.get('has_full_content', False),
+            word_count=item.get('word_count', 0),
+            quality_issues=item.get('quality_issues'),
+            extraction_metadata=item.get('extraction_metadata')
+        ))
+        
+        # In replace mode an item only counts as new if its guid was not stored before
+        if guid in stored:
+            counts['unchanged'] += 1
+        else:
+            counts['new'] += 1
+            new_items.append(item)
+    
+    return counts, new_items
+
+def record_polling_observation(feed_source, status, new_item_dates):
+    """Feed the result of a check into adaptive polling, if enabled (not committed)"""
+    if not current_app.config.get('ADAPTIVE_POLLING'):
+        return
+    observe_check(get_fetch_state(feed_source), status, new_item_dates, feed_source.check_frequency)
+
+def start_circuit_probe(feed_source):
+    """
+    Mark a check of a feed with a tripped circuit as its probe (committed right away)
+    
+    Returns:
+        bool: True if this check is a probe, it should then fail fast without retries
+    """
+    if not begin_attempt(feed_source, get_feed_host(feed_source)):
+        return False
+    db.session.commit()
+    return True
+
+def record_check_success(feed_source):
+    """Close the circuits of a feed after a successful check (not committed)"""
+    for circuit in record_success(feed_source, get_feed_host(feed_source)):
+        create_alert(
+            feed_source.id,
+            'info',
+            f"Circuit closed for {circuit.scope} {circuit.host if circuit.scope == 'host' else feed_source.name}, checks resumed"
+        )
+
+def record_check_failure(feed_source, error_message, host_failure=False):
+    """Count a failed check in the circuit breaker, alerting when a circuit opens (not committed)"""
+    for circuit in record_failure(feed_source, get_feed_host(feed_source), error_message, host_failure):
+        # Only the first opening alerts, failed probes just back off further
+        if circuit.open_count == 1:
+            target = f"host {circuit.host}" if circuit.scope == 'host' else feed_source.name
             create_alert(
-                feed_source.id, 
-                'error', 
-                f"Failed to process custom route: {feed_source.name} - {str(e)}"
+                feed_source.id,
+                'error',
+                f"Circuit opened for {target} after {circuit.failure_count} consecutive failures, "
+                f"checks paused until {circuit.retry_at:%Y-%m-%d %H:%M} UTC - {error_message}"
             )
-            
-            db.session.commit()
-            return 'error', str(e), None, 0
-    
-    # Standard RSSHub route processing (unchanged)
-    rsshub_base_url = current_app.config.get('RSSHUB_BASE_URL')
-    if not rsshub_base_url:
-        return 'error', 'RSSHub base URL not configured', None, 0
+
+class FeedCheck:
+    """
+    State of one feed check as it moves through the check stages
     
-    # Remove leading slash if present
-    route = feed_source.rsshub_route.lstrip('/')
-    full_url = urljoin(rsshub_base_url, route)
+    Stages only pass plain data to each other, never ORM objects, so every
+    stage can run in its own thread with its own DB session. A stage that
+    settles the outcome early (feed unchanged, fetch failed) routes the check
+    straight to the persist stage, or to DONE if nothing is written.
+    """
     
-    try:
-        # Fetch the feed - with timeout and retry logic
-        max_retries = 2
-        retry_count = 0
-        response = None
+    def __init__(self, feed_id, save_items=True, skip_open_circuit=False, on_fetched=None):
+        self.feed_id = feed_id
+        self.save_items = save_items
+        self.skip_open_circuit = skip_open_circuit
+        self.on_fetched = on_fetched          # Called when the fetch stage is done with the upstream host
+        self.start_time = time.time()
+        self.name = None
+        self.custom = False
+        self.url = None
+        self.custom_selectors = None
         
-        while retry_count <= max_retries:
-            try:
-                response = requests.get(full_url, timeout=30)
-                response.raise_for_status()
-                break
-            except requests.exceptions.RequestException as e:
-                retry_count += 1
-                if retry_count > max_retries:
-                    raise
-                current_app.logger.warning(f"Retry {retry_count} for {feed_source.name}: {str(e)}")
-                time.sleep(1)  # Short delay before retry
-        
-        # Parse the feed
-        feed_data = feedparser.parse(response.content)
-        
-        # Check if feed is valid
-        if not feed_data.entries:
-            message = "Feed parsed but contains no items"
-            status = "warning"
-        else:
-            message = f"Successfully fetched {len(feed_data.entries)} items"
-            status = "success"
+        # Response of the fetch stage
+        self.http_status = None
+        self.response_ok = False
+        self.etag = None
+        self.last_modified = None
+        self.body = None
+        self.body_hash = None
+        self.truncated = False
+        self.not_modified = None              # Message when the feed is unchanged since the last check
+        self.update_validators = False
         
-        # Calculate quality metrics
-        title_lengths = []
-        content_lengths = []
-        image_count = 0
+        # Results of the parse and enrich stages
+        self.entries = None
+        self.article_urls = None
+        self.items = None
+        self.metrics = {'avg_title_length': 0, 'avg_content_length': 0, 'image_count': 0}
         
-        # Custom selectors handling
-        custom_selectors = None
-        if feed_source.custom_selectors:
-            try:
-                custom_selectors = json.loads(feed_source.custom_selectors)
-            except json.JSONDecodeError:
-                current_app.logger.warning(f"Invalid custom_selectors JSON for {feed_source.name}")
-        
-        # Process feed items
-        if save_items and feed_data.entries:
-            # Clear existing items for this source
-            FeedItem.query.filter_by(feed_source_id=feed_source.id).delete()
-            
-            # Add new items
-            for entry in feed_data.entries:
-                # Extract data with fallbacks
-                title = getattr(entry, 'title', 'No Title')
-                link = getattr(entry, 'link', '')
-                guid = getattr(entry, 'id', link)
-                description = getattr(entry, 'summary', '')
-                
-                # Multi-tiered content extraction with fallbacks
-                content = ''
-                extraction_method = 'none'
-                
-                # Method 1: Try content field (best case)
-                if hasattr(entry, 'content'):
-                    content = entry.content[0].value
-                    extraction_method = 'content_field'
-                
-                # Method 2: Try content_encoded field
-                elif hasattr(entry, 'content_encoded'):
-                    content = entry.content_encoded
-                    extraction_method = 'content_encoded'
-                
-                # Method 3: Try description field
-                elif hasattr(entry, 'description'):
-                    content = entry.description
-                    extraction_method = 'description'
-                
-                # Method 4: Use summary as fallback
-                elif description:
-                    content = description
-                    extraction_method = 'summary'
-                
-                # Method 5: Apply custom selectors if available
-                if custom_selectors and link and (not content or len(content) < 200):
-                    try:
-                        content_from_selectors = fetch_content_with_selectors(link, custom_selectors)
-                        if content_from_selectors:
-                            content = content_from_selectors
-                            extraction_method = 'custom_selectors'
-                    except Exception as e:
-                        current_app.logger.error(f"Error with custom selectors for {link}: {str(e)}")
-                
-                # Get author with fallbacks
-                author = None
-                if hasattr(entry, 'author'):
-                    author = entry.author
-                elif hasattr(entry, 'author_detail') and hasattr(entry.author_detail, 'name'):
-                    author = entry.author_detail.name
-                
-                # Get publication date
-                published_at = None
-                if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                    try:
-                        published_at = datetime(*entry.published_parsed[:6])
-                    except:
-                        # Try alternative date fields
-                        if hasattr(entry, 'updated_parsed') and entry.updated_parsed:
-                            try:
-                                published_at = datetime(*entry.updated_parsed[:6])
-                            except:
-                                pass
-                
-                # Find image with multiple fallback methods
-                image_url = None
-                
-                # Method 1: Check media_content
-                if hasattr(entry, 'media_content') and entry.media_content:
-                    for media in entry.media_content:
-                        if 'url' in media and (
-                            'image' in media.get('type', '') or 
-                            media.get('url', '').lower().endswith(('.jpg', '.jpeg', '.png', '.gif'))
-                        ):
-                            image_url = media.get('url')
-                            break
-                
-                # Method 2: Check enclosures
-                if not image_url and hasattr(entry, 'enclosures') and entry.enclosures:
-                    for enclosure in entry.enclosures:
-                        if 'type' in enclosure and 'image' in enclosure.get('type', ''):
-                            image_url = enclosure.get('href', None) or enclosure.get('url', None)
-                            if image_url:
-                                break
-                
-                # Method 3: Extract from content HTML
-                if not image_url and content:
-                    soup = BeautifulSoup(content, 'lxml')
-                    img_tag = soup.find('img')
-                    if img_tag and img_tag.get('src'):
-                        image_url = img_tag.get('src')
-                
-                # Method 4: Try to get from media_thumbnail
-                if not image_url and hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
-                    for thumbnail in entry.media_thumbnail:
-                        if 'url' in thumbnail:
-                            image_url = thumbnail['url']
-                            break
-                
-                # Count images for metrics
-                if image_url:
-                    image_count += 1
-                
-                # Calculate quality metrics
-                title_lengths.append(len(title))
-                
-                # Count real text content (exclude HTML)
-                text_content = ''
-                if content:
-                    text_content = BeautifulSoup(content, 'lxml').get_text()
-                content_lengths.append(len(text_content))
-                
-                # Check for full content
-                has_full_content = len(text_content) > 200
-                
-                # Count words
-                word_count = len(re.findall(r'\w+', text_content)) if text_content else 0
-                
-                # Check for quality issues
-                quality_issues = []
-                if not title or len(title) < 10:
-                    quality_issues.append("short_title")
-                if not content or len(text_content) < 100:
-                    quality_issues.append("short_content")
-                if not image_url:
-                    quality_issues.append("no_image")
-                
-                # Create new feed item with extraction method tracking
-                item = FeedItem(
-                    feed_source_id=feed_source.id,
-                    title=title,
-                    link=link,
-                    guid=guid,
-                    description=description,
-                    content=content,
-                    author=author,
-                    image_url=image_url,
-                    published_at=normalize_datetime(published_at),
-                    has_full_content=has_full_content,
-                    word_count=word_count,
-                    quality_issues=json.dumps(quality_issues) if quality_issues else None,
-                    extraction_metadata=json.dumps({
-                        "extraction_method": extraction_method,
-                        "content_length": len(text_content) if text_content else 0
-                    })
-                )
-                db.session.add(item)
-            
-            # Commit all items at once
-            db.session.commit()
+        # Failure recorded by the persist stage
+        self.error = None
+        self.failure_message = None
+        self.error_http_status = None
+        self.host_failure = False
+        self.log_error = True
+        
+        # Outcome
+        self.status = None
+        self.message = ''
+        self.result_entries = None
+        self.item_count = 0
+    
+    def set_response(self, response):
+        self.http_status = response.status_code
+        self.response_ok = response.ok
+        self.etag = response.headers.get('ETag')
+        self.last_modified = response.headers.get('Last-Modified')
+    
+    def fail(self, error, failure_message, host_failure=False, http_status=None, log_error=True):
+        """Record a failed check, the persist stage logs it and counts it in the circuit breaker"""
+        self.error = error
+        self.failure_message = failure_message
+        self.host_failure = host_failure
+        self.error_http_status = http_status
+        self.log_error = log_error
+    
+    def finish(self, status, message, entries=None, item_count=0):
+        self.status = status
+        self.message = message
+        self.result_entries = entries
+        self.item_count = item_count
+    
+    def result(self):
+        """
+        Returns:
+            tuple: (status, message, parsed entry records or None, items_count)
+        """
+        return self.status, self.message, self.result_entries, self.item_count
+    
+    def outcome(self):
+        """Outcome dict as returned by run_feed_check"""
+        return {
+            'feed_id': self.feed_id,
+            'name': self.name,
+            'status': self.status or 'error',
+            'message': self.message,
+            'item_count': self.item_count,
+            'duration': time.time() - self.start_time,
+        }
+
+def fail_custom_route(check, error):
+    """Record an exception while processing a custom route"""
+    logger.error(f"Error processing custom route: {str(error)}: {traceback.format_exc()}")
+    check.fail(str(error), f"Failed to process custom route: {str(error)}", host_failure=is_host_failure(error))
+
+def fetch_stage(check):
+    """
+    Fetch stage: download the feed, or the homepage of a custom route (network I/O)
+    
+    Returns:
+        str: Next stage
+    """
+    try:
+        return fetch_feed(check)
+    finally:
+        if check.on_fetched is not None:
+            check.on_fetched(check)
+
+def fetch_feed(check):
+    """Load the feed and download it, unless an open circuit holds it back"""
+    # Time spent waiting for a fetch worker does not count as check duration
+    check.start_time = time.time()
+    
+    feed_source = db.session.get(FeedSource, check.feed_id)
+    if feed_source is None:
+        check.finish('error', 'Feed no longer exists')
+        return DONE
+    
+    check.name = feed_source.name
+    check.custom = feed_source.rsshub_route.startswith('custom/')
+    
+    # Tripped circuits hold the feed back without any network I/O
+    if check.skip_open_circuit:
+        circuit = get_blocking_circuit(feed_source, get_feed_host(feed_source))
+        if circuit is not None:
+            until = circuit.retry_at if circuit.state == 'open' else circuit.probe_started_at + PROBE_TIMEOUT
+            check.finish('skipped', f"Circuit {circuit.key} is {circuit.state} until {until:%Y-%m-%d %H:%M:%S} UTC")
+            return DONE
+    
+    if check.custom:
+        return fetch_website(check, feed_source)
+    return fetch_rsshub_feed(check, feed_source)
+
+def fetch_website(check, feed_source):
+    """Download the homepage of a custom route, an unchanged homepage skips the whole crawl"""
+    # This is a custom route, use newspaper3k for smart extraction
+    url = feed_source.original_url
+    if not url:
+        check.finish('error', 'Original URL is required for custom routes')
+        return DONE
+    
+    try:
+        # Clean up the URL if needed
+        if not url.startswith('http'):
+            url = 'https://' + url
+        check.url = url
         
-        # Calculate average metrics
-        avg_title_length = sum(title_lengths) / len(title_lengths) if title_lengths else 0
-        avg_content_length = sum(content_lengths) / len(content_lengths) if content_lengths else 0
+        logger.info(f"Processing custom route for: {url}")
         
-        # Calculate quality score (0-100)
-        quality_score = calculate_quality_score(
-            item_count=len(feed_data.entries),
-            avg_content_length=avg_content_length,
-            image_ratio=image_count / len(feed_data.entries) if feed_data.entries else 0
+        # A probe of a tripped circuit fails fast instead of retrying
+        probe = check.save_items and start_circuit_probe(feed_source)
+        
+        response = http_get(
+            url, headers={'User-Agent': 'Mozilla/5.0'}, read_timeout=20, stream=True,
+            max_retries=0 if probe else None
         )
+        body, _ = read_body(response, current_app.config.get('FEED_MAX_BYTES'))
+        check.set_response(response)
+        check.body = decode_body(response, body)
+        check.body_hash = hash_body(body)
         
-        # Create fetch log
-        fetch_duration = time.time() - start_time
-        fetch_log = FetchLog(
-            feed_source_id=feed_source.id,
-            status=status,
-            http_status=response.status_code,
-            item_count=len(feed_data.entries),
-            avg_title_length=avg_title_length,
-            avg_content_length=avg_content_length,
-            images_count=image_count,
-            quality_score=quality_score,
-            fetch_duration=fetch_duration
+        if check.save_items and response.ok and is_body_unchanged(feed_source.fetch_state, url, check.body_hash):
+            check.not_modified = 'Website homepage unchanged since last check'
+            return 'persist'
+    except Exception as e:
+        fail_custom_route(check, e)
+        return 'persist'
+    
+    return 'parse'
+
+def fetch_rsshub_feed(check, feed_source):
+    """Download a feed from RSSHub, conditionally if it was fetched before"""
+    rsshub_base_url = current_app.config.get('RSSHUB_BASE_URL')
+    if not rsshub_base_url:
+        check.finish('error', 'RSSHub base URL not configured')
+        return DONE
+    
+    # Remove leading slash if present
+    route = feed_source.rsshub_route.lstrip('/')
+    check.url = urljoin(rsshub_base_url, route)
+    
+    # Custom selectors are applied by the enrich stage
+    if feed_source.custom_selectors:
+        try:
+            check.custom_selectors = json.loads(feed_source.custom_selectors)
+        except json.JSONDecodeError:
+            current_app.logger.warning(f"Invalid custom_selectors JSON for {feed_source.name}")
+    
+    # Send the validators from the last fetch so RSSHub can answer 304
+    fetch_state = feed_source.fetch_state
+    headers = {}
+    if check.save_items and fetch_state and fetch_state.url == check.url:
+        if fetch_state.etag:
+            headers['If-None-Match'] = fetch_state.etag
+        if fetch_state.last_modified:
+            headers['If-Modified-Since'] = fetch_state.last_modified
+    
+    try:
+        # Fetch the feed - transient failures are retried with backoff. The body
+        # is streamed and capped, and the download stops once FEED_MAX_ITEMS
+        # items have arrived, so an oversized feed cannot exhaust memory.
+        max_items = current_app.config.get('FEED_MAX_ITEMS')
+        probe = check.save_items and start_circuit_probe(feed_source)
+        response = http_get(check.url, headers=headers, stream=True, max_retries=0 if probe else None)
+        body, check.truncated = read_body(
+            response, current_app.config.get('FEED_MAX_BYTES'), stop=FeedItemCounter(max_items)
         )
-        db.session.add(fetch_log)
-        db.session.commit()
+        response.raise_for_status()
+        check.set_response(response)
+    except requests.exceptions.RequestException as e:
+        check.fail(
+            str(e), f"Failed to fetch feed: {str(e)}", host_failure=is_host_failure(e),
+            http_status=getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None
+        )
+        return 'persist'
+    
+    # Nothing changed since the last fetch, skip parsing and item writes
+    if response.status_code == 304:
+        check.not_modified = 'Feed not modified since last check'
+        return 'persist'
+    
+    # Same bytes as last time, for routes that send no validators
+    check.body_hash = hash_body(body)
+    if check.save_items and is_body_unchanged(fetch_state, check.url, check.body_hash):
+        check.not_modified = 'Feed content unchanged since last check'
+        check.update_validators = True
+        return 'persist'
+    
+    check.body = body
+    return 'parse'
+
+def parse_stage(check):
+    """
+    Parse stage: parse the feed, or find the article links of a custom route (CPU)
+    
+    Returns:
+        str: Next stage
+    """
+    if check.custom:
+        try:
+            # Discover article links from the homepage we already downloaded
+            check.article_urls = discover_article_urls(check.url, check.body)
+            logger.info(f"Found {len(check.article_urls)} articles to process")
+        except Exception as e:
+            fail_custom_route(check, e)
+            return 'persist'
+        finally:
+            check.body = None
+        return 'enrich'
+    
+    # Parse and analyze the feed in the parse pool, entries come back as plain records
+    max_items = current_app.config.get('FEED_MAX_ITEMS')
+    check.entries = run_parse(parse_feed, check.body, check.save_items, max_items)
+    check.body = None
+    
+    # Check if feed is valid
+    if not check.entries:
+        check.status = 'warning'
+        check.message = "Feed parsed but contains no items"
+    else:
+        check.status = 'success'
+        check.message = f"Successfully fetched {len(check.entries)} items"
+    if check.truncated:
+        check.message += f" (feed larger than {current_app.config.get('FEED_MAX_BYTES')} bytes, truncated)"
+    elif max_items and len(check.entries) >= max_items:
+        check.message += f" (limited to the first {max_items} items)"
+    
+    return 'enrich' if check.save_items and check.entries else 'persist'
+
+def enrich_stage(check):
+    """
+    Enrich stage: fill in content from the article pages (network I/O)
+    
+    Custom routes download and extract their articles, feeds with custom
+    selectors replace short entries with the content found on the page.
+    
+    Returns:
+        str: Next stage
+    """
+    if check.custom:
+        try:
+            # Only articles not seen before are downloaded and parsed
+            articles = extract_articles(check.article_urls)
+            db.session.commit()
+            check.items = build_article_items(check.article_urls, articles)
+        except Exception as e:
+            fail_custom_route(check, e)
+            return 'persist'
         
-        # Create alert if quality is low
-        if quality_score < 50 and status == 'success':
-            create_alert(
-                feed_source.id,
-                'warning',
-                f"Low quality feed: {feed_source.name} (Score: {quality_score:.1f}/100)"
+        # If no items could be extracted, return an error
+        if not check.items:
+            check.fail(
+                'No articles could be extracted from the website', 'No articles could be extracted from the website',
+                host_failure=check.http_status >= 500 or check.http_status == 429, log_error=False
             )
+        return 'persist'
+    
+    entries = check.entries
+    
+    # Method 5: Apply custom selectors if available, pages are downloaded concurrently and cached
+    if check.custom_selectors:
+        short_entries = [entry for entry in entries if needs_selector_content(entry['content'], entry['link'])]
+        selector_content = prefetch_selector_content((entry['link'] for entry in short_entries), check.custom_selectors)
+        db.session.commit()
         
-        return status, message, feed_data, len(feed_data.entries)
+        replaced = []
+        for entry in short_entries:
+            content_from_selectors = selector_content.get(entry['link'])
+            if content_from_selectors:
+                entry['content'] = content_from_selectors
+                entry['extraction_method'] = 'custom_selectors'
+                replaced.append(entry)
         
-    except requests.exceptions.RequestException as e:
-        error_msg = str(e)
+        # Re-analyze the replaced content
+        if replaced:
+            for entry, analysis in zip(replaced, run_parse(analyze_entries, replaced)):
+                entry['analysis'] = analysis
+    
+    # Calculate quality metrics
+    title_lengths = []
+    content_lengths = []
+    image_count = 0
+    
+    items = []
+    for entry in entries:
+        title = entry['title']
+        analysis = entry['analysis']
+        image_url = analysis['image_url']
+        text_content = analysis['text']
+        quality_issues = analysis['quality_issues']
         
-        # Create error log
-        fetch_log = FetchLog(
-            feed_source_id=feed_source.id,
+        # Count images for metrics
+        if image_url:
+            image_count += 1
+        
+        # Calculate quality metrics
+        title_lengths.append(len(title))
+        content_lengths.append(analysis['text_length'])
+        
+        # Collect the item with extraction method tracking
+        items.append({
+            'title': title,
+            'link': entry['link'],
+            'guid': entry['guid'],
+            'description': entry['description'],
+            'content': entry['content'],
+            'author': entry['author'],
+            'image_url': image_url,
+            'published_at': entry['published_at'],
+            'has_full_content': analysis['has_full_content'],
+            'word_count': analysis['word_count'],
+            'quality_issues': json.dumps(quality_issues) if quality_issues else None,
+            'extraction_metadata': json.dumps({
+                "extraction_method": entry['extraction_method'],
+                "content_length": len(text_content) if text_content else 0
+            })
+        })
+    
+    check.items = items
+    check.metrics = {
+        'avg_title_length': sum(title_lengths) / len(title_lengths) if title_lengths else 0,
+        'avg_content_length': sum(content_lengths) / len(content_lengths) if content_lengths else 0,
+        'image_count': image_count,
+    }
+    return 'persist'
+
+def build_article_items(article_urls, articles):
+    """
+    Turn extracted articles into feed items
+    
+    Args:
+        article_urls: Article URLs in discovery order
+        articles: URL -> article record from extract_articles
+    
+    Returns:
+        list: Item dicts with a title and content, newest first
+    """
+    feed_items = []
+    for article_url in article_urls:
+        article = articles.get(article_url)
+        if article is None:
+            continue
+        try:
+            text = article['text']
+            
+            # Get article text
+            if not text or len(text.strip()) < 150:
+                logger.info(f"Skipping article with insufficient text: {article_url}")
+                continue
+            
+            # Get or generate article HTML
+            html_content = article['html']
+            if not html_content and text:
+                # Convert plain text to HTML paragraphs if article_html not available
+                paragraphs = text.split('\n\n')
+                html_content = ''.join([f"<p>{p}</p>" for p in paragraphs if p.strip()])
+            
+            # Create a unique identifier for this article
+            article_guid = hashlib.md5(article_url.encode()).hexdigest()
+            
+            # Create feed item
+            item = {
+                'title': article['title'],
+                'link': article_url,
+                'guid': article_guid,
+                'description': text[:280] + '...' if len(text) > 280 else text,
+                'content': html_content,
+                'image_url': article['top_image'] or None,
+                'published_at': normalize_datetime(article['publish_date']),
+                'author': ', '.join(article['authors']) if article['authors'] else None,
+                'has_full_content': True,
+                'word_count': len(text.split()),
+            }
+            
+            # Add extraction metadata
+            item['extraction_metadata'] = json.dumps({
+                "extraction_method": "newspaper3k",
+                "content_length": len(html_content) if html_content else 0
+            })
+            
+            feed_items.append(item)
+        except Exception as e:
+            error_details = traceback.format_exc()
+            logger.error(f"Error processing article {article_url}: {str(e)}\n{error_details}")
+            continue
+    
+    # Filter out items without title or content
+    feed_items = [item for item in feed_items if item['title'] and item['content']]
+    
+    # Sort by publication date (newest first)
+    feed_items.sort(key=lambda x: normalize_datetime(x['published_at']), reverse=True)
+    return feed_items
+
+def persist_check(check):
+    """Store the outcome of one check (not committed)"""
+    feed_source = db.session.get(FeedSource, check.feed_id)
+    if feed_source is None:
+        check.finish('error', 'Feed no longer exists')
+        return
+    
+    if check.error is not None:
+        persist_failure(check, feed_source)
+    elif check.not_modified:
+        # Nothing changed since the last fetch, only the check is recorded
+        fetch_state = feed_source.fetch_state
+        if check.update_validators:
+            fetch_state.etag = check.etag
+            fetch_state.last_modified = check.last_modified
+        status, message, _, item_count = log_not_modified(
+            feed_source, fetch_state, check.http_status, check.start_time, check.not_modified
+        )
+        check.finish(status, message, item_count=item_count)
+    elif check.custom:
+        persist_articles(check, feed_source)
+    else:
+        persist_entries(check, feed_source)
+
+def persist_stage(check):
+    """
+    Persist stage: store the items, fetch log, fetch state and circuit outcome (DB writes)
+    
+    Returns:
+        str: DONE
+    """
+    with _write_lock:
+        try:
+            persist_check(check)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            if not check.custom or check.error is not None:
+                raise
+            # Articles that cannot be stored fail the check like any other custom route error
+            fail_custom_route(check, e)
+            persist_check(check)
+            db.session.commit()
+    return DONE
+
+def persist_stage_batch(checks):
+    """
+    Persist stage of the pipeline: store the outcomes of several checks in one transaction
+    
+    Checks that reached the persist stage while it was busy are written
+    together, so a full check cycle commits far fewer times than it has
+    feeds. If the batch fails, each check is stored on its own so that one
+    bad check does not lose the others.
+    
+    Args:
+        checks: FeedCheck objects
+    
+    Returns:
+        list: DONE or the exception of each check
+    """
+    if len(checks) > 1:
+        with _write_lock:
+            try:
+                for check in checks:
+                    persist_check(check)
+                db.session.commit()
+                return [DONE] * len(checks)
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Storing {len(checks)} checks together failed, storing them one by one: {str(e)}")
+    
+    results = []
+    for check in checks:
+        try:
+            results.append(persist_stage(check))
+        except Exception as e:
+            logger.error(f"Error storing the check of feed {check.feed_id}: {str(e)}")
+            results.append(e)
+    return results
+
+def persist_failure(check, feed_source):
+    """Log a failed check and count it in the circuit breaker, an alert is raised when the circuit opens (not committed)"""
+    if check.log_error:
+        add_fetch_log(
+            feed_source,
             status='error',
-            http_status=getattr(e.response, 'status_code', None) if hasattr(e, 'response') else None,
-            error_message=error_msg,
-            fetch_duration=time.time() - start_time
+            http_status=check.error_http_status,
+            error_message=check.error,
+            fetch_duration=time.time() - check.start_time
         )
-        db.session.add(fetch_log)
-        
-        # Create alert
+    if check.save_items:
+        record_check_failure(feed_source, check.failure_message, host_failure=check.host_failure)
+    check.finish('error', check.error)
+
+def persist_articles(check, feed_source):
+    """Store the articles extracted from a custom route's website (not committed)"""
+    feed_items = check.items
+    ingest_counts = {}
+    if check.save_items:
+        ingest_counts, new_items = save_feed_items(feed_source, feed_items)
+    
+    # Calculate quality metrics
+    avg_content_length = sum(len(item['content']) for item in feed_items) / len(feed_items) if feed_items else 0
+    image_count = sum(1 for item in feed_items if item.get('image_url')) or 0
+    
+    # Calculate quality score
+    quality_score = calculate_quality_score(
+        item_count=len(feed_items),
+        avg_content_length=avg_content_length,
+        image_ratio=image_count / len(feed_items) if feed_items else 0
+    )
+    
+    # Create fetch log
+    add_fetch_log(
+        feed_source,
+        status='success',
+        item_count=len(feed_items),
+        avg_content_length=avg_content_length,
+        images_count=image_count,
+        quality_score=quality_score,
+        fetch_duration=time.time() - check.start_time,
+        new_items=ingest_counts.get('new'),
+        updated_items=ingest_counts.get('updated'),
+        unchanged_items=ingest_counts.get('unchanged')
+    )
+    if check.save_items:
+        fetch_state = get_fetch_state(feed_source)
+        fetch_state.url = check.url
+        fetch_state.body_hash = check.body_hash if check.response_ok else None
+        fetch_state.item_count = len(feed_items)
+        fetch_state.quality_score = quality_score
+        record_polling_observation(feed_source, 'success', [item['published_at'] for item in new_items])
+        record_check_success(feed_source)
+    
+    check.finish('success', f'Successfully extracted {len(feed_items)} articles from the website', item_count=len(feed_items))
+
+def persist_entries(check, feed_source):
+    """Store the items of a parsed feed with its quality metrics (not committed)"""
+    entries = check.entries
+    metrics = check.metrics
+    
+    # Process feed items
+    ingest_counts = {}
+    new_items = []
+    if check.items:
+        ingest_counts, new_items = save_feed_items(feed_source, check.items)
+    
+    # Calculate quality score (0-100)
+    quality_score = calculate_quality_score(
+        item_count=len(entries),
+        avg_content_length=metrics['avg_content_length'],
+        image_ratio=metrics['image_count'] / len(entries) if entries else 0
+    )
+    
+    # Create fetch log
+    add_fetch_log(
+        feed_source,
+        status=check.status,
+        http_status=check.http_status,
+        item_count=len(entries),
+        avg_title_length=metrics['avg_title_length'],
+        avg_content_length=metrics['avg_content_length'],
+        images_count=metrics['image_count'],
+        quality_score=quality_score,
+        fetch_duration=time.time() - check.start_time,
+        new_items=ingest_counts.get('new'),
+        updated_items=ingest_counts.get('updated'),
+        unchanged_items=ingest_counts.get('unchanged')
+    )
+    
+    # Remember the validators for the next conditional request
+    if check.save_items:
+        fetch_state = get_fetch_state(feed_source)
+        fetch_state.url = check.url
+        fetch_state.etag = check.etag
+        fetch_state.last_modified = check.last_modified
+        fetch_state.body_hash = check.body_hash
+        fetch_state.item_count = len(entries)
+        fetch_state.quality_score = quality_score
+        record_polling_observation(feed_source, check.status, [item['published_at'] for item in new_items])
+        record_check_success(feed_source)
+    
+    # Create alert if quality is low
+    if quality_score < 50 and check.status == 'success':
         create_alert(
-            feed_source.id, 
-            'error', 
-            f"Failed to fetch feed: {feed_source.name} - {error_msg}"
+            feed_source.id,
+            'warning',
+            f"Low quality feed: {feed_source.name} (Score: {quality_score:.1f}/100)"
         )
-        
-        db.session.commit()
-        return 'error', error_msg, None, 0
+    
+    check.finish(check.status, check.message, entries, len(entries))
+
+# Stages of a feed check, in order
+CHECK_STAGES = (
+    ('fetch', fetch_stage),
+    ('parse', parse_stage),
+    ('enrich', enrich_stage),
+    ('persist', persist_stage),
+)
+
+def fetch_and_parse_feed(feed_source, save_items=True):
+    """
+    Fetch and parse an RSS feed from a FeedSource with enhanced fallback handling
+    
+    Runs the check stages one after another in the calling thread, see
+    get_check_pipeline() for running many checks with overlapping stages.
+    
+    Args:
+        feed_source: FeedSource object
+        save_items: Whether to save parsed items to database
+    
+    Returns:
+        tuple: (status, message, parsed entry records or None, items_count)
+    """
+    return run_stages(CHECK_STAGES, FeedCheck(feed_source.id, save_items)).result()
+
+def get_check_pipeline(app):
+    """
+    Get the app's feed check pipeline, created on first use
+    
+    Each stage has its own threads (CHECK_WORKERS fetch, PIPELINE_*_WORKERS
+    for the others) and a bounded input queue (PIPELINE_QUEUE_SIZE), so slow database writes do not hold up
+    network fetches and the other way round, while a backed-up stage still
+    throttles the stages feeding it.
+    
+    Args:
+        app: Flask app
+    
+    Returns:
+        Pipeline: Pipeline taking FeedCheck items
+    """
+    pipeline = app.extensions.get('check_pipeline')
+    if pipeline is not None:
+        return pipeline
+    
+    with _pipeline_lock:
+        pipeline = app.extensions.get('check_pipeline')
+        if pipeline is None:
+            config = app.config
+            queue_size = config.get('PIPELINE_QUEUE_SIZE', 16)
+            stage_workers = {
+                'fetch': config.get('CHECK_WORKERS', 8),
+                'parse': config.get('PIPELINE_PARSE_WORKERS', 2),
+                'enrich': config.get('PIPELINE_ENRICH_WORKERS', 4),
+                'persist': config.get('PIPELINE_PERSIST_WORKERS', 1),
+            }
+            stages = [
+                Stage(name, func, workers=stage_workers[name], queue_size=queue_size)
+                for name, func in CHECK_STAGES if name != 'persist'
+            ]
+            # Checks waiting to be stored are written together, in one transaction
+            stages.append(Stage(
+                'persist', persist_stage_batch, workers=stage_workers['persist'], queue_size=queue_size,
+                batch_size=config.get('PIPELINE_PERSIST_BATCH', 16)
+            ))
+            pipeline = Pipeline('feed-check', stages, context=app.app_context)
+            app.extensions['check_pipeline'] = pipeline
+    return pipeline
+
+def submit_feed_check(app, feed_id, on_fetched=None):
+    """
+    Start a check of a feed in the check pipeline
+    
+    Feeds held back by an open circuit are skipped without a request.
+    Blocks while the pipeline is backed up.
+    
+    Args:
+        app: Flask app
+        feed_id: ID of the FeedSource to check
+        on_fetched: Called with the FeedCheck once its fetch stage is done
+    
+    Returns:
+        Future: Resolves to the FeedCheck, see check_outcome()
+    """
+    check = FeedCheck(feed_id, skip_open_circuit=True, on_fetched=on_fetched)
+    return get_check_pipeline(app).submit(check)
+
+def check_outcome(future, feed_id):
+    """
+    Get the outcome of a check started with submit_feed_check()
+    
+    Returns:
+        dict: Outcome with feed_id, name, status, message, item_count and duration
+    """
+    try:
+        return future.result().outcome()
+    except Exception as e:
+        logger.error(f"Unexpected error checking feed {feed_id}: {str(e)}")
+        return {'feed_id': feed_id, 'name': None, 'status': 'error', 'message': str(e), 'item_count': 0, 'duration': 0}
 
 
 def find_article_links(soup, base_url):
@@ -585,6 +1040,215 @@ def find_article_links(soup, base_url):
     return article_urls
 
 
+def discover_article_urls(url, homepage_html, limit=15):
+    """
+    Find article URLs on a website with newspaper3k, reusing a downloaded homepage
+    
+    Args:
+        url: Website URL
+        homepage_html: HTML of the homepage
+        limit: Maximum number of article URLs
+    
+    Returns:
+        list: Article URLs, newspaper's first and manually found links as a fallback
+    """
+    from newspaper import Source
+    
+    article_urls = []
+    try:
+        source = Source(url, memoize_articles=False, fetch_images=False,
+                        request_timeout=20, number_threads=4)
+        # Same steps as Source.build() without downloading the homepage again,
+        # and with the downloads going through the rate limited http_get
+        source.html = homepage_html
+        source.is_downloaded = True
+        source.parse()
+        source.set_categories()
+
+        # The homepage is one of the categories, only download the others
+        homepage_categories = [c for c in source.categories if c.url.rstrip('/') == source.url.rstrip('/')]
+        for category in homepage_categories:
+            category.html = homepage_html
+        other_categories = [c for c in source.categories if c not in homepage_categories]
+        for category, html in zip(other_categories, download_pages([c.url for c in other_categories])):
+            category.html = html
+        source.categories = homepage_categories + [c for c in other_categories if c.html]
+        source.parse_categories()
+        set_source_feeds(source)
+        for feed, rss in zip(source.feeds, download_pages([f.url for f in source.feeds])):
+            feed.rss = rss
+        source.feeds = [f for f in source.feeds if f.rss]
+        source.generate_articles()
+        article_urls = [article.url for article in source.articles[:limit]]
+    except Exception as e:
+        logger.warning(f"newspaper could not analyze {url}: {str(e)}")
+    
+    # If newspaper didn't extract enough articles, try manually finding links
+    if len(article_urls) < 3:
+        logger.info(f"Few articles detected by newspaper, trying manual link extraction")
+        from bs4 import BeautifulSoup
+        soup = BeautifulSoup(homepage_html, 'html.parser')
+        article_urls.extend(find_article_links(soup, url)[:limit])
+    
+    # Drop duplicates, keeping the discovery order
+    return list(dict.fromkeys(article_urls))[:limit]
+
+
+def set_source_feeds(source):
+    """
+    Find the RSS feeds of a newspaper Source, like Source.set_feeds()
+    
+    The common feed locations (/feed, /feeds, /rss) are probed through
+    download_pages instead of newspaper's own requests.
+    
+    Args:
+        source: newspaper Source with parsed categories
+    """
+    from newspaper.source import Category, Feed
+    
+    candidates = [Category(url=urljoin(source.url, path)) for path in ('/feed', '/feeds', '/rss')]
+    for candidate, html in zip(candidates, download_pages([c.url for c in candidates])):
+        if html:
+            candidate.html = html
+            candidate.doc = source.config.get_parser().fromstring(html)
+    candidates = [c for c in candidates if c.doc is not None]
+    
+    urls = source.extractor.get_feed_urls(source.url, source.categories + candidates)
+    source.feeds = [Feed(url=url) for url in urls]
+
+
+def download_article(url):
+    """
+    Download the HTML of an article page
+    
+    Returns:
+        str: Page HTML, or None if the download failed
+    """
+    try:
+        response = http_get(url, headers={'User-Agent': 'Mozilla/5.0'}, read_timeout=20)
+        if not response.ok:
+            logger.info(f"Could not download article {url}: HTTP {response.status_code}")
+            return None
+        return response.text
+    except Exception as e:
+        logger.error(f"Error downloading article {url}: {str(e)}")
+        return None
+
+
+def download_pages(urls, max_workers=4):
+    """
+    Download pages concurrently with download_article
+    
+    Args:
+        urls: Page URLs
+        max_workers: Maximum number of concurrent downloads
+    
+    Returns:
+        list: Page HTML (None for failed downloads), in the order of urls
+    """
+    if not urls:
+        return []
+    
+    app = current_app._get_current_object()
+    
+    def download(url):
+        with app.app_context():
+            return download_article(url)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+        return list(executor.map(download, urls))
+
+
+def extract_articles(urls, use_cache=True, max_workers=4):
+    """
+    Extract articles with newspaper3k through the persistent article cache
+    
+    Cached articles are returned as-is, only URLs not seen before are
+    downloaded (concurrently) and parsed in the parse pool. New extractions
+    are stored in the cache; the caller commits.
+    
+    Args:
+        urls: Article URLs
+        use_cache: Whether to read from and write to the cache
+        max_workers: Maximum number of concurrent downloads
+    
+    Returns:
+        dict: URL -> article record for every article that could be extracted
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    if not urls:
+        return {}
+    
+    articles = get_cached_articles(urls) if use_cache else {}
+    missing = [url for url in urls if url not in articles]
+    if articles:
+        logger.info(f"Article cache: {len(articles)} hits, {len(missing)} to download")
+    
+    if missing:
+        app = current_app._get_current_object()
+        
+        def download(url):
+            with app.app_context():
+                return download_article(url)
+        
+        # Articles are handed to the parse pool as soon as they are downloaded
+        parsing = []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as executor:
+            for url, html in zip(missing, executor.map(download, missing)):
+                if html:
+                    parsing.append((url, html, submit_parse(parse_article, url, html)))
+        
+        extracted = []
+        for url, html, future in parsing:
+            try:
+                extracted.append(parse_result(future, parse_article, url, html))
+            except Exception as e:
+                logger.error(f"Error extracting article {url}: {str(e)}")
+        
+        if use_cache:
+            store_articles(extracted)
+        articles.update((record['url'], record) for record in extracted)
+    
+    return articles
+
+
+def extract_with_selectors(url, selectors):
+    """
+    Fetch a page and extract content with custom selectors
+    
+    Args:
+        url: URL to fetch
+        selectors: Dictionary of CSS selectors
+    
+    Returns:
+        str: Extracted content or empty string if no selector matched
+    
+    Raises:
+        requests.exceptions.RequestException: If the page could not be fetched
+    """
+    response = http_get(url)
+    response.raise_for_status()
+    
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(response.content, 'lxml')
+    
+    # Use content selector if available
+    content_selector = selectors.get('content')
+    if content_selector:
+        content_element = soup.select_one(content_selector)
+        if content_element:
+            return str(content_element)
+    
+    # Fallback to article selector
+    article_selector = selectors.get('article')
+    if article_selector:
+        article_element = soup.select_one(article_selector)
+        if article_element:
+            return str(article_element)
+            
+    return ""
+
+
 def fetch_content_with_selectors(url, selectors):
     """
     Fetch content from original website using custom selectors
@@ -597,31 +1261,55 @@ def fetch_content_with_selectors(url, selectors):
         str: Extracted content or empty string if failed
     """
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'lxml')
-        
-        # Use content selector if available
-        content_selector = selectors.get('content')
-        if content_selector:
-            content_element = soup.select_one(content_selector)
-            if content_element:
-                return str(content_element)
-        
-        # Fallback to article selector
-        article_selector = selectors.get('article')
-        if article_selector:
-            article_element = soup.select_one(article_selector)
-            if article_element:
-                return str(article_element)
-                
-        return ""
+        return extract_with_selectors(url, selectors)
     except Exception as e:
-        current_app.logger.error(f"Error fetching content with selectors from {url}: {str(e)}")
+        logger.error(f"Error fetching content with selectors from {url}: {str(e)}")
         return ""
 
 
+def prefetch_selector_content(urls, selectors):
+    """
+    Get custom selector content for many article pages at once
+    
+    Fresh results come from the selector cache. Cache misses are downloaded
+    concurrently (SELECTOR_FETCH_WORKERS) and stored in the cache, failed
+    downloads are left out and retried on the next check.
+    
+    Args:
+        urls: Iterable of article URLs
+        selectors: Dictionary of CSS selectors
+    
+    Returns:
+        dict: URL -> extracted content ('' when no selector matched)
+    """
+    urls = list(dict.fromkeys(url for url in urls if url))
+    results = get_cached_selector_content(urls, selectors)
+    misses = [url for url in urls if url not in results]
+    if not misses:
+        return results
+    
+    app = current_app._get_current_object()
+    
+    def fetch(url):
+        with app.app_context():
+            return extract_with_selectors(url, selectors)
+    
+    fetched = {}
+    max_workers = min(len(misses), max(1, int(app.config.get('SELECTOR_FETCH_WORKERS', 4))))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='selector-fetch') as executor:
+        futures = {executor.submit(fetch, url): url for url in misses}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                fetched[url] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching content with selectors from {url}: {str(e)}")
+    
+    store_selector_content(fetched, selectors)
+    results.update(fetched)
+    return results
+
+
 def calculate_quality_score(item_count, avg_content_length, image_ratio):
     """Calculate a quality score from 0-100 based on various metrics"""
     # Base score
@@ -683,11 +1371,12 @@ def validate_rsshub_route(route):
     full_url = urljoin(rsshub_base_url, route)
     
     try:
-        response = requests.get(full_url, timeout=30)
+        response = http_get(full_url, stream=True)
+        body, _ = read_body(response, current_app.config.get('FEED_MAX_BYTES'))
         response.raise_for_status()
         
         # Try to parse as RSS
-        feed = feedparser.parse(response.content)
+        feed = feedparser.parse(body)
         
         if not hasattr(feed, 'feed') or not hasattr(feed, 'entries'):
             return False, "Invalid RSS feed format"
@@ -703,31 +1392,161 @@ def validate_rsshub_route(route):
         return False, f"Parse error: {str(e)}"
 
 
-def check_all_feeds():
-    """Check all active feeds and update their status"""
-    sources = FeedSource.query.filter_by(is_active=True).all()
+def get_feed_host(feed_source, rsshub_base_url=None):
+    """
+    Get the upstream host a feed check will hit
+
+    Custom routes are scraped from the original website, everything else goes
+    through the RSSHub instance.
+
+    Args:
+        feed_source: FeedSource object
+        rsshub_base_url: RSSHub base URL (defaults to the app config)
+
+    Returns:
+        str: Host name (netloc) or empty string if unknown
+    """
+    if feed_source.rsshub_route.startswith('custom/'):
+        url = feed_source.original_url or ''
+        if url and not url.startswith('http'):
+            url = 'https://' + url
+    else:
+        url = rsshub_base_url or current_app.config.get('RSSHUB_BASE_URL') or ''
+    return urlparse(url).netloc.lower()
+
+
+def run_feed_check(app, feed_id):
+    """
+    Check a single feed inside its own app context and DB session
     
-    for source in sources:
-        fetch_and_parse_feed(source)
-        
-    return len(sources)
+    Safe to call from worker threads, exceptions are turned into an error outcome.
+    Feeds held back by an open circuit are skipped without a request. The
+    stages run one after another in the calling thread.
+    
+    Args:
+        app: Flask app
+        feed_id: ID of the FeedSource to check
+    
+    Returns:
+        dict: Outcome with feed_id, name, status, message, item_count and duration
+    """
+    check = FeedCheck(feed_id, skip_open_circuit=True)
+
+    with app.app_context():
+        try:
+            run_stages(CHECK_STAGES, check)
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Unexpected error checking feed {feed_id}: {str(e)}\n{traceback.format_exc()}")
+            check.finish('error', str(e))
+
+    return check.outcome()
+
+def check_all_feeds(app=None, max_workers=None, per_host_limit=None):
+    """
+    Check all active feeds concurrently and update their status
+
+    Feeds go through the check pipeline, whose stages overlap: while some
+    feeds are being fetched, others are parsed, enriched or written to the
+    database. A feed is only handed to the pipeline while its upstream host
+    has fewer than `per_host_limit` feeds in the fetch stage, so a single
+    RSSHub instance or origin site is never hit by more checks at once while
+    the pipeline stays busy with feeds for other hosts.
 
+    Args:
+        app: Flask app (defaults to current_app, required outside app context)
+        max_workers: Max checks in the pipeline at once (defaults to its capacity)
+        per_host_limit: Max concurrent fetches per host (defaults to CHECK_PER_HOST_LIMIT)
+
+    Returns:
+        list: One outcome dict per checked feed
+    """
+    if app is None:
+        app = current_app._get_current_object()
+
+    pipeline = get_check_pipeline(app)
+    with app.app_context():
+        max_in_flight = max(1, int(max_workers or pipeline.capacity))
+        per_host_limit = max(1, int(per_host_limit or app.config.get('CHECK_PER_HOST_LIMIT', 4)))
+        rsshub_base_url = app.config.get('RSSHUB_BASE_URL')
+
+        # Group feed ids by upstream host, preserving the original order
+        pending = defaultdict(deque)
+        for source in FeedSource.query.filter_by(is_active=True).all():
+            pending[get_feed_host(source, rsshub_base_url)].append(source.id)
+
+    total = sum(len(ids) for ids in pending.values())
+    if not total:
+        return []
+
+    logger.info(f"Checking {total} feeds with up to {max_in_flight} in the pipeline (max {per_host_limit} fetches per host)")
+
+    outcomes = []
+    in_flight = {}
+    fetching_per_host = defaultdict(int)
+    lock = threading.Lock()
+    wake = threading.Event()
+
+    def fetched(host):
+        def release(check):
+            with lock:
+                fetching_per_host[host] -= 1
+            wake.set()
+        return release
+
+    while pending or in_flight:
+        # Hand out work while the pipeline has room and hosts have spare capacity
+        start = []
+        with lock:
+            for host in list(pending):
+                while pending[host] and len(in_flight) + len(start) < max_in_flight and fetching_per_host[host] < per_host_limit:
+                    start.append((pending[host].popleft(), host))
+                    fetching_per_host[host] += 1
+                if not pending[host]:
+                    del pending[host]
+
+        for feed_id, host in start:
+            try:
+                future = submit_feed_check(app, feed_id, on_fetched=fetched(host))
+            except Exception as e:
+                # e.g. the pipeline was shut down: free the host's slot, the feed gets an error outcome
+                with lock:
+                    fetching_per_host[host] -= 1
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda f: wake.set())
+            in_flight[future] = (feed_id, host)
+
+        done = [future for future in in_flight if future.done()]
+        if not done:
+            wake.wait()
+            wake.clear()
+            continue
+        for future in done:
+            feed_id, host = in_flight.pop(future)
+            outcome = check_outcome(future, feed_id)
+            outcome['host'] = host
+            outcomes.append(outcome)
+
+    return outcomes
 
 def get_feed_health(feed_source_id, days=7):
-    """Get feed health metrics for the given period"""
-    logs = FetchLog.query.filter_by(
-        feed_source_id=feed_source_id
-    ).order_by(FetchLog.fetched_at.desc()).limit(days).all()
+    """Get feed health metrics for the last `days` days, from the daily rollups"""
+    rollups = get_rollups(feed_source_id, 'day', since=datetime.utcnow() - timedelta(days=days - 1))
     
-    success_rate = sum(1 for log in logs if log.status == 'success') / len(logs) if logs else 0
-    avg_quality = sum(log.quality_score for log in logs if log.quality_score) / len(logs) if logs else 0
-    avg_items = sum(log.item_count for log in logs) / len(logs) if logs else 0
+    total_checks = sum(rollup.check_count for rollup in rollups)
+    scored = [rollup for rollup in rollups if rollup.quality_avg is not None]
+    scored_checks = sum(rollup.quality_count for rollup in scored)
+    
+    success_rate = sum(rollup.success_count for rollup in rollups) / total_checks if total_checks else 0
+    avg_quality = sum(rollup.quality_avg * rollup.quality_count for rollup in scored) / scored_checks if scored_checks else 0
+    avg_items = sum(rollup.item_count_avg * rollup.check_count for rollup in rollups) / total_checks if total_checks else 0
     
     return {
         'success_rate': success_rate,
         'avg_quality': avg_quality,
         'avg_items': avg_items,
-        'total_checks': len(logs)
+        'total_checks': total_checks
     }
 
 
@@ -740,54 +1559,37 @@ def get_feed_preview(rsshub_route, max_items=3):
             domain = rsshub_route.replace('custom/', '')
             url = f"https://{domain.replace('-', '.')}"
             
-            # Create sample preview with newspaper3k
-            article = Article(url)
-            article.download()
-            article.parse()
+            def preview_item(article):
+                text_content = article['text']
+                return {
+                    'title': article['title'],
+                    'link': article['url'],
+                    'description': article['meta_description'] or text_content[:200],
+                    'content': article['html'] or f"<p>{text_content}</p>",
+                    'text_content': text_content[:500] + '...' if len(text_content) > 500 else text_content,
+                    'image_url': article['top_image'],
+                    'published': article['publish_date'],
+                    'word_count': len(text_content.split()) if text_content else 0,
+                }
             
-            # If no content found, try to build a source and get top articles
-            if not article.text:
-                source = build(url, memoize_articles=False)
-                source.download()
-                source.parse()
-                
-                # Get articles
-                preview_items = []
-                for article_url in source.article_urls()[:max_items]:
-                    try:
-                        preview_article = Article(article_url)
-                        preview_article.download()
-                        preview_article.parse()
-                        
-                        text_content = preview_article.text or ''
-                        
-                        preview_items.append({
-                            'title': preview_article.title,
-                            'link': preview_article.url,
-                            'description': preview_article.meta_description or text_content[:200],
-                            'content': preview_article.article_html or f"<p>{text_content}</p>",
-                            'text_content': text_content[:500] + '...' if len(text_content) > 500 else text_content,
-                            'image_url': preview_article.top_image,
-                            'published': preview_article.publish_date,
-                            'word_count': len(text_content.split()) if text_content else 0,
-                        })
-                    except Exception as e:
-                        logger.error(f"Error creating preview for {article_url}: {str(e)}")
+            # Create sample preview with newspaper3k, the homepage itself is never cached
+            response = http_get(url, headers={'User-Agent': 'Mozilla/5.0'}, read_timeout=20, stream=True)
+            body, _ = read_body(response, current_app.config.get('FEED_MAX_BYTES'))
+            response.raise_for_status()
+            homepage_html = decode_body(response, body)
+            homepage = run_parse(parse_article, url, homepage_html)
+            
+            # If no content found, get top articles through the article cache
+            if not homepage['text']:
+                article_urls = discover_article_urls(url, homepage_html, limit=max_items)
+                articles = extract_articles(article_urls)
+                db.session.commit()
                 
+                preview_items = [preview_item(articles[article_url]) for article_url in article_urls if article_url in articles]
                 return preview_items or None
             
             # Return single article preview
-            text_content = article.text or ''
-            return [{
-                'title': article.title,
-                'link': article.url,
-                'description': article.meta_description or text_content[:200],
-                'content': article.article_html or f"<p>{text_content}</p>",
-                'text_content': text_content[:500] + '...' if len(text_content) > 500 else text_content,
-                'image_url': article.top_image,
-                'published': article.publish_date,
-                'word_count': len(text_content.split()) if text_content else 0,
-            }]
+            return [preview_item(homepage)]
         except Exception as e:
             logger.error(f"Error previewing custom route {rsshub_route}: {str(e)}")
             return None
@@ -802,72 +1604,27 @@ def get_feed_preview(rsshub_route, max_items=3):
     full_url = urljoin(rsshub_base_url, route)
     
     try:
-        response = requests.get(full_url, timeout=30)
+        response = http_get(full_url, stream=True)
+        body, _ = read_body(response, current_app.config.get('FEED_MAX_BYTES'), stop=FeedItemCounter(max_items))
         response.raise_for_status()
         
-        # Parse the feed
-        feed_data = feedparser.parse(response.content)
+        # Parse the feed in the parse pool
+        entries = run_parse(parse_feed, body, True, max_items)
         
         preview_items = []
-        for entry in feed_data.entries[:max_items]:
-            # Extract content with fallbacks
-            content = ''
-            if hasattr(entry, 'content'):
-                content = entry.content[0].value
-            elif hasattr(entry, 'content_encoded'):
-                content = entry.content_encoded
-            elif hasattr(entry, 'description'):
-                content = entry.description
-            elif hasattr(entry, 'summary'):
-                content = entry.summary
-            
-            # Find image with multiple fallbacks
-            image_url = None
-            
-            # Method 1: Check media_content
-            if hasattr(entry, 'media_content') and entry.media_content:
-                for media in entry.media_content:
-                    if 'url' in media and (
-                        'image' in media.get('type', '') or 
-                        media.get('url', '').lower().endswith(('.jpg', '.jpeg', '.png', '.gif'))
-                    ):
-                        image_url = media.get('url')
-                        break
-            
-            # Method 2: Check enclosures
-            if not image_url and hasattr(entry, 'enclosures') and entry.enclosures:
-                for enclosure in entry.enclosures:
-                    if 'type' in enclosure and 'image' in enclosure.get('type', ''):
-                        image_url = enclosure.get('href', None) or enclosure.get('url', None)
-                        if image_url:
-                            break
-            
-            # Method 3: Extract from content HTML
-            if not image_url and content:
-                soup = BeautifulSoup(content, 'lxml')
-                img_tag = soup.find('img')
-                if img_tag and img_tag.get('src'):
-                    image_url = img_tag.get('src')
-            
-            # Method 4: Try to get from media_thumbnail
-            if not image_url and hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
-                for thumbnail in entry.media_thumbnail:
-                    if 'url' in thumbnail:
-                        image_url = thumbnail['url']
-                        break
-            
-            # Get text content for display
-            text_content = BeautifulSoup(content, 'lxml').get_text() if content else ''
+        for entry in entries:
+            analysis = entry['analysis']
+            text_content = analysis['text']
             
             item = {
-                'title': getattr(entry, 'title', 'No Title'),
-                'link': getattr(entry, 'link', ''),
-                'description': getattr(entry, 'summary', ''),
-                'content': content,
+                'title': entry['title'],
+                'link': entry['link'],
+                'description': entry['description'],
+                'content': entry['content'],
                 'text_content': text_content[:500] + '...' if len(text_content) > 500 else text_content,
-                'image_url': image_url,
-                'published': getattr(entry, 'published', None),
-                'word_count': len(re.findall(r'\w+', text_content)) if text_content else 0,
+                'image_url': analysis['image_url'],
+                'published': entry['published'],
+                'word_count': analysis['word_count'],
             }
             preview_items.append(item)
         
@@ -889,10 +1646,11 @@ def suggest_selectors(url):
         dict: Suggested selectors (minimal as newspaper3k handles extraction)
     """
     try:
-        # Try to extract content with newspaper3k
-        article = Article(url)
-        article.download()
-        article.parse()
+        # Try to extract content with newspaper3k (cached for the next check)
+        articles = extract_articles([url])
+        db.session.commit()
+        if url not in articles:
+            return {}
         
         # If successful, just return basic selectors
         # (these won't actually be used by the newspaper implementation
@@ -0,0 +1,156 @@
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from job_queue import claim_jobs, renew_leases, complete_job, fail_abandoned_jobs, purge_finished_jobs
+from models import db
+from system_settings import refresh_settings
+from utils import run_feed_check
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# How often an idle worker does housekeeping (abandoned and old jobs)
+HOUSEKEEPING_SECONDS = 300
+
+# How often the worker reloads settings saved through the web process
+SETTINGS_REFRESH_SECONDS = 30
+
+
+def default_worker_id():
+    """Identify a worker by host and process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class Worker:
+    """
+    Feed check worker fed by the DB job queue
+
+    The worker claims as many jobs as it has free threads, runs them with
+    run_feed_check and records their outcome. Leases of running jobs are
+    renewed well before they expire; if the worker dies, its jobs are
+    claimed again by another worker once their lease runs out.
+    """
+
+    def __init__(self, app, worker_id=None, concurrency=None, poll_interval=None):
+        self.app = app
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = max(1, int(concurrency or app.config.get('CHECK_WORKERS', 8)))
+        self.poll_interval = float(poll_interval or app.config.get('JOB_POLL_SECONDS', 5))
+        self.lease_seconds = int(app.config.get('JOB_LEASE_SECONDS', 300))
+
+        self._running = {}                    # lease token -> set of job IDs
+        self._jobs = {}                       # job ID -> lease token
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='worker-check')
+        self.processed = 0
+
+    def stop(self):
+        """Stop claiming jobs, running ones are finished"""
+        self._stop.set()
+
+    def _free_slots(self):
+        with self._lock:
+            return self.concurrency - len(self._jobs)
+
+    def _run_job(self, job_id, lease_token, feed_id):
+        """Check a feed and record the outcome on its job"""
+        outcome = run_feed_check(self.app, feed_id)
+        with self.app.app_context():
+            try:
+                complete_job(job_id, lease_token, outcome)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Could not record the outcome of job {job_id}: {str(e)}")
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            tokens = self._running.get(lease_token)
+            if tokens is not None:
+                tokens.discard(job_id)
+                if not tokens:
+                    del self._running[lease_token]
+            self.processed += 1
+        return outcome
+
+    def claim(self):
+        """Claim jobs for every free thread and start them"""
+        free = self._free_slots()
+        if free <= 0:
+            return 0
+
+        with self.app.app_context():
+            jobs = claim_jobs(self.worker_id, free)
+            claimed = [(job.id, job.lease_token, job.feed_source_id) for job in jobs]
+
+        with self._lock:
+            for job_id, lease_token, _ in claimed:
+                self._jobs[job_id] = lease_token
+                self._running.setdefault(lease_token, set()).add(job_id)
+        for job_id, lease_token, feed_id in claimed:
+            self._executor.submit(self._run_job, job_id, lease_token, feed_id)
+
+        if claimed:
+            logger.info(f"Worker {self.worker_id} claimed {len(claimed)} jobs")
+        return len(claimed)
+
+    def heartbeat(self):
+        """Renew the leases of the running jobs"""
+        with self._lock:
+            tokens = list(self._running)
+        if tokens:
+            with self.app.app_context():
+                renew_leases(self.worker_id, tokens)
+
+    def housekeeping(self):
+        """Fail jobs that keep losing their lease and purge old finished jobs"""
+        with self.app.app_context():
+            failed = fail_abandoned_jobs()
+            purged = purge_finished_jobs()
+        if failed or purged:
+            logger.info(f"Job queue housekeeping: {failed} abandoned jobs failed, {purged} finished jobs purged")
+
+    def run(self, max_jobs=None, idle_exit=False):
+        """
+        Process jobs until stopped
+
+        Args:
+            max_jobs: Stop after this many jobs (for tests and one-off runs)
+            idle_exit: Stop once the queue is empty and nothing is running
+        """
+        logger.info(f"Worker {self.worker_id} started with {self.concurrency} threads")
+        heartbeat_every = max(1.0, self.lease_seconds / 3)
+        last_heartbeat = last_housekeeping = last_settings_refresh = 0.0
+
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                try:
+                    if now - last_housekeeping >= HOUSEKEEPING_SECONDS:
+                        self.housekeeping()
+                        last_housekeeping = now
+                    if now - last_heartbeat >= heartbeat_every:
+                        self.heartbeat()
+                        last_heartbeat = now
+                    if now - last_settings_refresh >= SETTINGS_REFRESH_SECONDS:
+                        refresh_settings(self.app)
+                        last_settings_refresh = now
+                    claimed = self.claim()
+                except Exception as e:
+                    with self.app.app_context():
+                        db.session.rollback()
+                    logger.error(f"Worker {self.worker_id} could not reach the job queue: {str(e)}")
+                    claimed = 0
+
+                if max_jobs is not None and self.processed >= max_jobs:
+                    break
+                if idle_exit and not claimed and self._free_slots() == self.concurrency:
+                    break
+                if not claimed or self._free_slots() <= 0:
+                    self._stop.wait(self.poll_interval)
+        finally:
+            logger.info(f"Worker {self.worker_id} stopping, waiting for running checks")
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,11 @@
+"""
+WSGI entry point, e.g. gunicorn --bind 0.0.0.0:5000 wsgi:app
+
+Every worker process creates the app and runs the one-time initialization
+(schema, settings, scheduler, warm-up) while it boots, before it accepts
+its first request.
+"""
+from app import create_app, init_app
+
+app = create_app()
+init_app(app)